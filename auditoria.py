@@ -2,6 +2,61 @@ import pandas as pd
 import os
 from datetime import datetime
 from config import carpeta_con_fecha
+from cache_excel import leer_excel_normalizado
+
+# Dimensiones del cubo de auditoría: nombre de la pestaña -> columna
+DIMENSIONES_CUBO = {
+    'Por Programa': None,   # PNF o PNFA, según el reporte
+    'Por Eje': 'EJE',
+    'Por ASIC': 'ASIC',
+    'Por Hospital Sede': 'HOSPITAL SEDE',
+    'Por Causal': 'CAUSAL',
+    'Por Día': 'Día',
+    'Por Hora': 'Hora',
+}
+
+
+def construir_cubo(df, col_pnf=None):
+    """Éxitos, fallos y tasa por cada dimensión disponible del reporte.
+
+    Se agrupa una sola vez por todas las dimensiones juntas y cada pestaña
+    sale de sumar ese cubo sobre las demás (todo vectorizado).
+
+    Returns:
+        dict: nombre de la vista -> DataFrame [dimensión, Total, Éxitos, Fallos, Tasa de Éxito]
+    """
+    base = pd.DataFrame(index=df.index)
+    if 'FECHA_PROCESO' in df.columns:
+        fechas = pd.to_datetime(df['FECHA_PROCESO'], format="%d/%m/%Y %H:%M:%S", errors='coerce')
+        base['Día'] = fechas.dt.strftime("%Y-%m-%d").fillna("")
+        base['Hora'] = fechas.dt.strftime("%H:00").fillna("")
+
+    columnas = {}
+    for vista, columna in DIMENSIONES_CUBO.items():
+        columna = columna or col_pnf
+        if columna in base.columns:
+            columnas[vista] = columna
+        elif columna and columna in df.columns:
+            base[columna] = df[columna]
+            columnas[vista] = columna
+    if not columnas:
+        return {}
+
+    base['Total'] = 1
+    base['Éxitos'] = (df['ESTADO_BOT'] == 'EXITO').astype(int)
+    dims = list(dict.fromkeys(columnas.values()))
+    cubo = base.groupby(dims, observed=True, dropna=False)[['Total', 'Éxitos']].sum()
+
+    vistas = {}
+    for vista, columna in columnas.items():
+        tabla = cubo.groupby(level=columna, observed=True).sum().reset_index()
+        tabla['Fallos'] = tabla['Total'] - tabla['Éxitos']
+        tabla['Tasa de Éxito'] = (tabla['Éxitos'] / tabla['Total'] * 100).round(1)
+        orden = columna if columna in ('Día', 'Hora') else 'Total'
+        vistas[vista] = tabla.sort_values(orden, ascending=orden != 'Total', ignore_index=True)[
+            [columna, 'Total', 'Éxitos', 'Fallos', 'Tasa de Éxito']]
+    return vistas
+
 
 class AuditorSIGAE:
     def __init__(self):
@@ -14,7 +69,7 @@ class AuditorSIGAE:
 
         try:
             print(f"📄 Analizando reporte: {os.path.basename(archivo_reporte)}")
-            df = pd.read_excel(archivo_reporte, dtype={'CÉDULA': str})
+            df = leer_excel_normalizado(archivo_reporte)
             
             if 'ESTADO_BOT' not in df.columns:
                 print("❌ El archivo no tiene el formato correcto (Falta ESTADO_BOT).")
@@ -51,6 +106,8 @@ class AuditorSIGAE:
             cols_listado.append('NOTA_SISTEMA')
             cols_listado = [c for c in cols_listado if c in df.columns]
 
+            cubo = construir_cubo(df, col_pnf)
+
             # --- 4. CREACIÓN DEL EXCEL ENRIQUECIDO ---
             with pd.ExcelWriter(ruta_salida, engine='openpyxl') as writer:
                 
@@ -88,9 +145,13 @@ class AuditorSIGAE:
                 if not resumen_errores.empty:
                     resumen_errores.to_excel(writer, sheet_name='Desglose Errores', index=False)
 
+                # Pestañas 5+: Cubo por programa, eje, ASIC, sede, causal, día y hora
+                for vista, tabla in cubo.items():
+                    tabla.to_excel(writer, sheet_name=vista, index=False)
+
             print(f"💾 Auditoría exportada en: {carpeta_salida}")
             
-            datos = {'exitosos': exitosos, 'fallidos': fallidos}
+            datos = {'exitosos': exitosos, 'fallidos': fallidos, 'ruta_salida': ruta_salida, 'cubo': cubo}
             return True, datos
 
         except Exception as e:
@@ -0,0 +1,77 @@
+"""Caché en disco de hojas Excel ya leídas y normalizadas.
+
+El mismo libro suele leerse varias veces (bot, generador Word, auditoría) y
+cada ``pd.read_excel`` vuelve a interpretar todo el XML del xlsx. Aquí la
+hoja normalizada se guarda en binario (pickle de pandas, conserva las
+columnas categóricas) bajo una clave de ruta + hoja + fecha de modificación
++ tamaño: si el archivo cambia, la clave cambia y se vuelve a leer. La
+carpeta se poda por tamaño, descartando primero lo usado hace más tiempo.
+"""
+import os
+import hashlib
+import pandas as pd
+from registros import normalizar_dataframe
+from config import DIR_CACHE_EXCEL, LIMITE_CACHE_EXCEL_MB
+
+# Subir si cambia normalizar_dataframe, para no reutilizar entradas viejas
+VERSION_CACHE = 1
+
+
+def _clave(ruta, hoja):
+    info = os.stat(ruta)
+    texto = f"{os.path.abspath(ruta)}|{hoja}|{info.st_mtime_ns}|{info.st_size}|{VERSION_CACHE}"
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+
+def leer_excel_normalizado(ruta, hoja=0):
+    """Equivale a normalizar_dataframe(pd.read_excel(ruta, hoja)) pero con caché.
+
+    Lanza las mismas excepciones que pd.read_excel (archivo u hoja inexistente).
+    """
+    ruta_cache = os.path.join(DIR_CACHE_EXCEL, _clave(ruta, hoja) + ".pkl")
+    if os.path.exists(ruta_cache):
+        try:
+            df = pd.read_pickle(ruta_cache)
+            os.utime(ruta_cache)   # marca de uso para la poda LRU
+            return df
+        except Exception:
+            try:
+                os.remove(ruta_cache)
+            except OSError:
+                pass
+
+    df = normalizar_dataframe(pd.read_excel(ruta, sheet_name=hoja, dtype={'CÉDULA': str}))
+    try:
+        os.makedirs(DIR_CACHE_EXCEL, exist_ok=True)
+        temporal = ruta_cache + ".tmp"
+        df.to_pickle(temporal)
+        os.replace(temporal, ruta_cache)
+        podar_cache()
+    except OSError as e:
+        print(f"    ⚠ No se pudo guardar la hoja en caché: {e}")
+    return df
+
+
+def podar_cache(limite_mb=LIMITE_CACHE_EXCEL_MB):
+    """Borra las entradas menos usadas hasta quedar bajo el límite de tamaño."""
+    if not os.path.isdir(DIR_CACHE_EXCEL):
+        return
+    entradas = []
+    for nombre in os.listdir(DIR_CACHE_EXCEL):
+        ruta = os.path.join(DIR_CACHE_EXCEL, nombre)
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    limite = limite_mb * 1024 * 1024
+    for _, tamano, ruta in sorted(entradas):
+        if total <= limite:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except OSError:
+            pass
@@ -0,0 +1,341 @@
+"""Ejecución por línea de comandos (sin interfaz gráfica).
+
+Permite programar corridas nocturnas o en equipos sin pantalla:
+
+    python cli.py bot --archivo bajas.xlsx --tipo pnf
+    python cli.py word --archivo bajas.xlsx --plantilla plantilla_bajas.docx --salida zip
+    python cli.py auditoria --reporte Reportes/2025/01\\ -\\ Enero/resultado_x.xlsx
+    python cli.py particionar --archivo bajas.xlsx --partes 3
+    python cli.py combinar --reportes r1.xlsx r2.xlsx r3.xlsx --recuperaciones p1.xlsx p2.xlsx
+    python cli.py replay --carpeta grabacion --latencia   (+ SIGAE_URL=http://127.0.0.1:8800 en el bot)
+
+Los parámetros pueden venir de un archivo JSON (--config); los argumentos de
+la línea de comandos tienen prioridad. El archivo admite claves generales
+(usuario, clave, tipo, ...) y secciones por comando ("bot", "word",
+"auditoria"). Por defecto se usa config_sigae.json, el mismo que guarda la
+aplicación, así que las credenciales ya verificadas en la GUI sirven aquí.
+
+Códigos de salida: 0 = completado, 1 = completado con fallos o pendientes,
+2 = error de configuración o de ejecución, 130 = detenido por el usuario.
+"""
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+from datetime import datetime
+
+from config import ARCHIVO_CONFIG, ARCHIVO_RECUPERACION
+
+SALIDA_OK = 0
+SALIDA_PARCIAL = 1
+SALIDA_ERROR = 2
+SALIDA_DETENIDO = 130
+
+
+class Consola:
+    """Reemplaza los callbacks de la GUI (messagebox, set_driver, ui_update).
+
+    En modo --json cada aviso se emite como una línea JSON por stdout y los
+    print() de los servicios se desvían a stderr para no mezclarse.
+    """
+
+    def __init__(self, modo_json):
+        self.modo_json = modo_json
+        self.errores = []
+        self._stdout = sys.stdout
+        if modo_json:
+            sys.stdout = sys.stderr
+
+    def evento(self, nombre, **datos):
+        if self.modo_json:
+            linea = json.dumps({"evento": nombre, "hora": datetime.now().isoformat(timespec="seconds"), **datos},
+                               ensure_ascii=False, default=str)
+            self._stdout.write(linea + "\n")
+            self._stdout.flush()
+
+    def messagebox(self, tipo, titulo, mensaje=None):
+        if mensaje is None:
+            mensaje = titulo
+        if tipo == "error":
+            self.errores.append(mensaje)
+        if self.modo_json:
+            self.evento("aviso", tipo=tipo, titulo=titulo, mensaje=mensaje)
+        else:
+            print(f"[{tipo.upper()}] {mensaje}", file=sys.stderr)
+
+    def callbacks(self):
+        return {
+            "messagebox": self.messagebox,
+            "set_driver": lambda driver: None,
+            "ui_update": lambda func, *args: func(*args),
+        }
+
+
+def cargar_configuracion(ruta, comando):
+    """Une las claves generales del JSON con las de la sección del comando."""
+    if not ruta or not os.path.exists(ruta):
+        return {}
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    general = {k: v for k, v in datos.items() if not isinstance(v, dict)}
+    general.update(datos.get(comando, {}))
+    return general
+
+
+def _valor(args, conf, nombre, defecto=None):
+    valor = getattr(args, nombre, None)
+    if valor is not None:
+        return valor
+    return conf.get(nombre, defecto)
+
+
+def ejecutar_bot(args, conf, consola, stop_event):
+    from seguridad import descifrar_texto
+    from services import bot_service
+
+    archivo = _valor(args, conf, "archivo")
+    usuario = _valor(args, conf, "usuario", "")
+    clave = descifrar_texto(_valor(args, conf, "clave", ""))
+    if not archivo or not usuario or not clave:
+        consola.messagebox("error", "Faltan parámetros: archivo, usuario y clave son obligatorios.")
+        return SALIDA_ERROR, {}
+
+    resultado = bot_service.ejecutar_proceso_bot(
+        archivo=archivo,
+        plantilla=_plantillas_bot(args, conf),
+        headless=not _valor(args, conf, "con_ventana", False),
+        es_recuperacion=bool(_valor(args, conf, "recuperacion", False)),
+        usuario=usuario,
+        clave=clave,
+        tipo_programa=_valor(args, conf, "tipo", "pnf"),
+        stop_event=stop_event,
+        callbacks=consola.callbacks(),
+        trazar=bool(_valor(args, conf, "trazar", False)),
+        grabar=_valor(args, conf, "grabar", ""),
+    )
+
+    filas = resultado["resultados"]
+    exitos = sum(1 for r in filas if r.get("ESTADO_BOT") == "EXITO")
+    resumen = {
+        "procesados": len(filas),
+        "exitos": exitos,
+        "fallos": len(filas) - exitos,
+        "pendientes": resultado["pendientes"],
+        "reporte": resultado["reporte"],
+        "trazas": resultado["trazas"],
+    }
+    if consola.errores:
+        codigo = SALIDA_ERROR
+    elif resumen["fallos"] or resumen["pendientes"]:
+        codigo = SALIDA_PARCIAL
+    else:
+        codigo = SALIDA_OK
+    return codigo, resumen
+
+
+def _plantillas_bot(args, conf):
+    """Con --tipo ambos, --plantilla-pnfa (si se da) se usa para el PNFA."""
+    plantilla = _valor(args, conf, "plantilla", "")
+    plantilla_pnfa = _valor(args, conf, "plantilla_pnfa")
+    if _valor(args, conf, "tipo", "pnf") == "ambos" and plantilla_pnfa:
+        return {"pnf": plantilla, "pnfa": plantilla_pnfa}
+    return plantilla
+
+
+def ejecutar_word(args, conf, consola, stop_event):
+    from services import word_service
+
+    archivo = _valor(args, conf, "archivo")
+    if not archivo:
+        consola.messagebox("error", "Falta el parámetro: archivo.")
+        return SALIDA_ERROR, {}
+
+    creados, detenido = word_service.generar_words_desde_excel(
+        archivo=archivo,
+        plantilla=_valor(args, conf, "plantilla", "plantilla_bajas.docx"),
+        tipo_programa=_valor(args, conf, "tipo", "pnf"),
+        stop_event=stop_event,
+        callbacks=consola.callbacks(),
+        modo_salida=_valor(args, conf, "salida", "individual"),
+        motor=_valor(args, conf, "motor", "docx"),
+        forzar=bool(_valor(args, conf, "forzar", False)),
+    )
+    resumen = {"documentos": creados, "detenido": detenido}
+    if consola.errores:
+        return SALIDA_ERROR, resumen
+    return (SALIDA_PARCIAL if detenido else SALIDA_OK), resumen
+
+
+def ejecutar_auditoria(args, conf, consola, stop_event):
+    from auditoria import AuditorSIGAE
+
+    reporte = _valor(args, conf, "reporte")
+    ok, datos = AuditorSIGAE().generar_auditoria(reporte)
+    if not ok:
+        consola.messagebox("error", f"No se pudo auditar: {reporte}")
+        return SALIDA_ERROR, {}
+    resumen = {
+        "exitosos": len(datos["exitosos"]),
+        "fallidos": len(datos["fallidos"]),
+        "auditoria": datos.get("ruta_salida", ""),
+    }
+    return (SALIDA_PARCIAL if resumen["fallidos"] else SALIDA_OK), resumen
+
+
+def ejecutar_particionar(args, conf, consola, stop_event):
+    from services import particion_service
+
+    archivo = _valor(args, conf, "archivo")
+    partes = int(_valor(args, conf, "partes", 0))
+    if not archivo or partes < 2:
+        consola.messagebox("error", "Indique el archivo y al menos 2 partes.")
+        return SALIDA_ERROR, {}
+    rutas = particion_service.particionar_excel(
+        archivo, partes, _valor(args, conf, "tipo", "pnf"), _valor(args, conf, "carpeta"))
+    return SALIDA_OK, {"partes": rutas}
+
+
+def ejecutar_combinar(args, conf, consola, stop_event):
+    from services import particion_service
+
+    reportes = _valor(args, conf, "reportes", [])
+    if not reportes:
+        consola.messagebox("error", "Indique al menos un reporte resultado_*.xlsx.")
+        return SALIDA_ERROR, {}
+    resumen = particion_service.combinar_resultados(
+        reportes,
+        _valor(args, conf, "recuperaciones", []),
+        _valor(args, conf, "tipo", "pnf"),
+        _valor(args, conf, "pendientes", ARCHIVO_RECUPERACION),
+    )
+    codigo = SALIDA_PARCIAL if resumen["fallos"] or resumen["total_pendientes"] else SALIDA_OK
+    return codigo, resumen
+
+
+def ejecutar_replay(args, conf, consola, stop_event):
+    from grabacion import servir, INDICE
+
+    carpeta = _valor(args, conf, "carpeta")
+    if not carpeta or not os.path.exists(os.path.join(carpeta, INDICE)):
+        consola.messagebox("error", f"No hay una grabación ({INDICE}) en: {carpeta}")
+        return SALIDA_ERROR, {}
+    servir(carpeta, int(_valor(args, conf, "puerto", 8800)),
+           con_latencia=bool(_valor(args, conf, "latencia", False)),
+           detallado=bool(_valor(args, conf, "detallado", False)),
+           stop_event=stop_event)
+    return SALIDA_OK, {"carpeta": carpeta}
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Gestor de Bajas y Notificaciones SIGAE (modo consola)")
+    parser.add_argument("--config", default=ARCHIVO_CONFIG,
+                        help=f"JSON con los parámetros (por defecto {ARCHIVO_CONFIG})")
+    parser.add_argument("--json", action="store_true",
+                        help="Emitir eventos JSON por stdout (los logs van a stderr)")
+    parser.add_argument("--resumen", help="Ruta donde escribir el resumen final en JSON")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_bot = sub.add_parser("bot", help="Procesar bajas en SIGAE")
+    p_bot.add_argument("--archivo", help="Excel con las cédulas")
+    p_bot.add_argument("--plantilla", help="Plantilla Word (opcional)")
+    p_bot.add_argument("--plantilla-pnfa", dest="plantilla_pnfa",
+                       help="Plantilla para el PNFA con --tipo ambos (por defecto, la misma)")
+    p_bot.add_argument("--tipo", choices=["pnf", "pnfa", "ambos"],
+                       help="ambos = las dos hojas a la vez, cada una en su navegador")
+    p_bot.add_argument("--usuario")
+    p_bot.add_argument("--clave")
+    p_bot.add_argument("--recuperacion", action="store_true", default=None,
+                       help="El archivo es uno de recuperación")
+    p_bot.add_argument("--con-ventana", dest="con_ventana", action="store_true", default=None,
+                       help="Mostrar el navegador (por defecto corre oculto)")
+    p_bot.add_argument("--trazar", action="store_true", default=None,
+                       help="Registrar cada comando WebDriver y guardar un resumen de idas y vueltas")
+    p_bot.add_argument("--grabar", metavar="CARPETA",
+                       help="Guardar las páginas vistas (depuradas) para reproducirlas con 'replay'")
+
+    p_word = sub.add_parser("word", help="Generar notificaciones Word")
+    p_word.add_argument("--archivo", help="Excel con los datos")
+    p_word.add_argument("--plantilla", help="Plantilla Word (.docx)")
+    p_word.add_argument("--tipo", choices=["pnf", "pnfa"])
+    p_word.add_argument("--salida", choices=["individual", "combinado", "zip"])
+    p_word.add_argument("--motor", choices=["docx", "xml"])
+    p_word.add_argument("--forzar", action="store_true", default=None,
+                        help="Regenerar aunque el documento ya esté al día")
+
+    p_aud = sub.add_parser("auditoria", help="Auditar un reporte resultado_*.xlsx")
+    p_aud.add_argument("--reporte", help="Reporte a auditar")
+
+    p_part = sub.add_parser("particionar", help="Dividir un listado en partes para varios equipos")
+    p_part.add_argument("--archivo", help="Excel con las cédulas")
+    p_part.add_argument("--partes", type=int, help="Cantidad de partes (equipos)")
+    p_part.add_argument("--tipo", choices=["pnf", "pnfa"])
+    p_part.add_argument("--carpeta", help="Carpeta de salida (por defecto, la del archivo)")
+
+    p_comb = sub.add_parser("combinar", help="Unir los reportes y pendientes de varios equipos")
+    p_comb.add_argument("--reportes", nargs="+", help="Archivos resultado_*.xlsx")
+    p_comb.add_argument("--recuperaciones", nargs="*", help="Archivos de pendientes de cada equipo")
+    p_comb.add_argument("--tipo", choices=["pnf", "pnfa"])
+    p_comb.add_argument("--pendientes", help=f"Ruta del archivo de pendientes combinado (por defecto {ARCHIVO_RECUPERACION})")
+
+    p_rep = sub.add_parser("replay", help="Servir localmente una grabación hecha con bot --grabar")
+    p_rep.add_argument("--carpeta", help="Carpeta de la grabación")
+    p_rep.add_argument("--puerto", type=int, help="Puerto local (por defecto 8800)")
+    p_rep.add_argument("--latencia", action="store_true", default=None,
+                       help="Responder con las latencias grabadas")
+    p_rep.add_argument("--detallado", action="store_true", default=None,
+                       help="Mostrar cada pedido atendido")
+    return parser
+
+
+COMANDOS = {
+    "bot": ejecutar_bot,
+    "word": ejecutar_word,
+    "auditoria": ejecutar_auditoria,
+    "particionar": ejecutar_particionar,
+    "combinar": ejecutar_combinar,
+    "replay": ejecutar_replay,
+}
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    consola = Consola(args.json)
+    stop_event = threading.Event()
+
+    def _detener(*_):
+        print("\n!!! DETENIENDO... se guardará el progreso actual !!!", file=sys.stderr)
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, _detener)
+
+    inicio = datetime.now()
+    consola.evento("inicio", comando=args.comando)
+    try:
+        conf = cargar_configuracion(args.config, args.comando)
+        codigo, resumen = COMANDOS[args.comando](args, conf, consola, stop_event)
+    except Exception as e:
+        consola.messagebox("error", f"Error crítico: {e}")
+        codigo, resumen = SALIDA_ERROR, {}
+
+    if stop_event.is_set() and codigo != SALIDA_ERROR:
+        codigo = SALIDA_DETENIDO
+
+    resumen = {
+        "comando": args.comando,
+        "codigo_salida": codigo,
+        "inicio": inicio.isoformat(timespec="seconds"),
+        "fin": datetime.now().isoformat(timespec="seconds"),
+        "errores": consola.errores,
+        **resumen,
+    }
+    consola.evento("fin", **resumen)
+    if args.resumen:
+        with open(args.resumen, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=4, default=str)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,13 +12,28 @@ with open(os.path.join(_BASE_DIR, "version.txt"), "r") as _f:
 APP_NOMBRE = f"Gestor de Bajas y Notificaciones SIGAE v{VERSION_ACTUAL}"
 
 # --- URLs ---
-SIGAE_URL = "http://sigae.ucs.gob.ve"
+# SIGAE_URL se puede sobrescribir por entorno (p. ej. un servidor de replay local)
+SIGAE_URL = os.environ.get("SIGAE_URL", "http://sigae.ucs.gob.ve").rstrip("/")
 URL_VERSION = "https://raw.githubusercontent.com/dbloodmoon/Gestor-de-Bajas-y-Notificaciones-SIGAE/refs/heads/main/version.txt"
 URL_DESCARGA = "https://github.com/dbloodmoon/Gestor-de-Bajas-y-Notificaciones-SIGAE/releases/latest"
+URL_API_RELEASE = "https://api.github.com/repos/dbloodmoon/Gestor-de-Bajas-y-Notificaciones-SIGAE/releases/latest"
 
 # --- Archivos ---
 ARCHIVO_RECUPERACION = "pendientes_recuperacion.xlsx"
 ARCHIVO_CONFIG = "config_sigae.json"
+ARCHIVO_SESION = "sesion_sigae.dat"
+ARCHIVO_RITMO = "ritmo_sigae.json"
+DIR_CACHE_EXCEL = ".cache_excel"
+ARCHIVO_MANIFIESTO = os.path.join("Notificaciones", "manifiesto_notificaciones.json")
+
+# --- Sesión SIGAE ---
+DURACION_SESION_MIN = 20   # minutos que se confía en una sesión guardada
+
+# --- Programas: hoja del Excel de bajas de cada uno ---
+HOJAS_PROGRAMA = {"pnf": "BAJAS TOTALES", "pnfa": "BAJAS PNFA TOTALES"}
+
+# --- Caché de hojas Excel ---
+LIMITE_CACHE_EXCEL_MB = 200
 
 # --- Meses en español (reutilizable) ---
 MESES_ES = {
@@ -1,4 +1,9 @@
 import os
+import re
+import io
+import posixpath
+import zipfile
+from xml.sax.saxutils import escape
 import pandas as pd
 from datetime import datetime
 from docx import Document
@@ -14,8 +19,12 @@ def limpiar_articulo_excel(valor):
         return val_str[:-2]
     return val_str
 
+_FECHA_DMY = re.compile(r"\d{2}/\d{2}/\d{4}")
+
 def limpiar_fecha_excel(valor):
     """Limpia y formatea fechas desde Excel."""
+    if isinstance(valor, str) and _FECHA_DMY.fullmatch(valor):
+        return valor  # Ya normalizada por registros.normalizar_dataframe
     if pd.isna(valor) or str(valor).lower() == 'nan' or valor == "":
         return ""
     try:
@@ -26,112 +35,472 @@ def limpiar_fecha_excel(valor):
     except Exception:
         return str(valor)
 
-def generar_notificacion_baja_word(datos, plantilla_path="plantilla_bajas.docx"):
-    """Rellena la plantilla de Word con los datos del diccionario 'datos'."""
+def construir_reemplazos(datos):
+    """Arma el diccionario {{MARCADOR}} -> texto a partir de una fila del Excel."""
+    raw_trayecto = str(datos.get('AÑO', '')).strip().upper()
+    if raw_trayecto == 'NAN' or not raw_trayecto:
+        texto_trayecto = ""
+    else:
+        texto_trayecto = f"de {raw_trayecto} "
     
-    if not os.path.exists(plantilla_path):
-        print(f"⚠ Error: No se encuentra la plantilla {plantilla_path}")
-        return
-
-    try:
-        doc = Document(plantilla_path)
+    # Diccionario de reemplazos
+    return {
+        "{{NOMBRE}}": str(datos.get('NOMBRES', '')).upper(),
+        "{{APELLIDO}}": str(datos.get('APELLIDO 1', '')).upper(),
+        "{{CEDULA}}": str(datos.get('CÉDULA', '')),
         
-        raw_trayecto = str(datos.get('AÑO', '')).strip().upper()
-        if raw_trayecto == 'NAN' or not raw_trayecto:
-            texto_trayecto = ""
-        else:
-            texto_trayecto = f"de {raw_trayecto} "
+        # Específicos de PNF
+        "{{EJE}}": str(datos.get('EJE', '')).upper(),
+        "{{ASIC}}": str(datos.get('ASIC', '')).upper(),
         
-        # Diccionario de reemplazos
-        reemplazos = {
-            "{{NOMBRE}}": str(datos.get('NOMBRES', '')).upper(),
-            "{{APELLIDO}}": str(datos.get('APELLIDO 1', '')).upper(),
-            "{{CEDULA}}": str(datos.get('CÉDULA', '')),
-            
-            # Específicos de PNF
-            "{{EJE}}": str(datos.get('EJE', '')).upper(),
-            "{{ASIC}}": str(datos.get('ASIC', '')).upper(),
-            
-            # Específicos de PNFA
-            "{{HOSPITAL}}": str(datos.get('HOSPITAL SEDE', '')).upper(),
-            
-            # Variables compartidas (Busca en PNF y si no, en PNFA)
-            "{{TRAYECTO}}": texto_trayecto, 
-            "{{CAUSAL}}": str(datos.get('CAUSAL', datos.get('MOTIVO', ''))).upper(),
-            "{{FECHA_TRAMITE}}": limpiar_fecha_excel(datos.get('FECHA TRAMITE', datos.get('FECHA SOLICITUD'))),
-            
-            # Soportar ambas etiquetas de programa
-            "{{PNF}}": str(datos.get('PNF', datos.get('PNFA', ''))).upper(),
-            "{{PNFA}}": str(datos.get('PNF', datos.get('PNFA', ''))).upper(),
-            
-            "{{CABES}}": str(datos.get('CABES', '')).upper(),
-            "{{ARTICULO}}": limpiar_articulo_excel(datos.get('ARTICULO')),
-            "{{FECHA_CABES}}": limpiar_fecha_excel(datos.get('FECHA', datos.get('FECHA CABES'))),
-        }
+        # Específicos de PNFA
+        "{{HOSPITAL}}": str(datos.get('HOSPITAL SEDE', '')).upper(),
         
-        def reemplazar_texto_preservando_formato(parrafo):
-            """Reemplaza texto iterando sobre los runs para intentar mantener negritas."""
-            full_text = parrafo.text
-            match_found = False
-            for key in reemplazos.keys():
-                if key in full_text:
-                    match_found = True
-                    break
-            
-            if match_found:
-                for key, value in reemplazos.items():
-                    if key in parrafo.text:
-                        parrafo.text = parrafo.text.replace(key, value)
-                
-                # Reaplicar fuente Calibri 10
-                for run in parrafo.runs:
-                    run.font.name = 'Calibri'
-                    run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Calibri')
-                    run.font.size = Pt(10)
-
-        # 1. Reemplazar en párrafos
-        for p in doc.paragraphs:
-            reemplazar_texto_preservando_formato(p)
-
-        # 2. Reemplazar en tablas
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for p in cell.paragraphs:
-                        reemplazar_texto_preservando_formato(p)
-
-        # --- SECCIÓN DE NOMBRE DE ARCHIVO ---
-        fecha_hoy = datetime.now().strftime("%d-%m-%Y")
+        # Variables compartidas (Busca en PNF y si no, en PNFA)
+        "{{TRAYECTO}}": texto_trayecto, 
+        "{{CAUSAL}}": str(datos.get('CAUSAL', datos.get('MOTIVO', ''))).upper(),
+        "{{FECHA_TRAMITE}}": limpiar_fecha_excel(datos.get('FECHA TRAMITE', datos.get('FECHA SOLICITUD'))),
+        
+        # Soportar ambas etiquetas de programa
+        "{{PNF}}": str(datos.get('PNF', datos.get('PNFA', ''))).upper(),
+        "{{PNFA}}": str(datos.get('PNF', datos.get('PNFA', ''))).upper(),
+        
+        "{{CABES}}": str(datos.get('CABES', '')).upper(),
+        "{{ARTICULO}}": limpiar_articulo_excel(datos.get('ARTICULO')),
+        "{{FECHA_CABES}}": limpiar_fecha_excel(datos.get('FECHA', datos.get('FECHA CABES'))),
+    }
+
+def rellenar_plantilla(datos, plantilla_path):
+    """Devuelve el Document de la plantilla con los marcadores ya reemplazados."""
+    doc = Document(plantilla_path)
+    reemplazos = construir_reemplazos(datos)
+    
+    def reemplazar_texto_preservando_formato(parrafo):
+        """Reemplaza texto iterando sobre los runs para intentar mantener negritas."""
+        full_text = parrafo.text
+        match_found = False
+        for key in reemplazos.keys():
+            if key in full_text:
+                match_found = True
+                break
         
-        # 1. Obtener Nombre y Apellido limpios
-        raw_nombre = str(datos.get('NOMBRES', 'Estudiante')).strip().upper()
-        raw_apellido = str(datos.get('APELLIDO 1', '')).strip().upper()
-        if not raw_apellido:
-            raw_apellido = str(datos.get('APELLIDOS', '')).strip().upper()
+        if match_found:
+            for key, value in reemplazos.items():
+                if key in parrafo.text:
+                    parrafo.text = parrafo.text.replace(key, value)
             
-        # 2. Obtener Cédula
-        raw_cedula = str(datos.get('CÉDULA', '')).strip()
-        if not raw_cedula or raw_cedula.lower() == 'nan':
-            raw_cedula = str(datos.get('cedula', 'SN')).strip()
-
-        # 3. Limpieza de caracteres prohibidos en nombres de archivo
-        caracteres_prohibidos = ['/', '\\', ':', '*', '?', '"', '<', '>', '|']
-        for char in caracteres_prohibidos:
-            raw_nombre = raw_nombre.replace(char, '')
-            raw_apellido = raw_apellido.replace(char, '')
-            raw_cedula = raw_cedula.replace(char, '')
-
-        # 4. Construir el nombre final INCLUYENDO la fecha de hoy
-        nombre_salida = f"Notificacion_{raw_nombre}_{raw_apellido}_{raw_cedula}_{fecha_hoy}.docx"
-        # --- FIN SECCIÓN MODIFICADA ---
+            # Reaplicar fuente Calibri 10
+            for run in parrafo.runs:
+                run.font.name = 'Calibri'
+                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Calibri')
+                run.font.size = Pt(10)
+
+    # 1. Reemplazar en párrafos
+    for p in doc.paragraphs:
+        reemplazar_texto_preservando_formato(p)
+
+    # 2. Reemplazar en tablas
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for p in cell.paragraphs:
+                    reemplazar_texto_preservando_formato(p)
+
+    return doc
+
+# --- MOTOR XML (sin python-docx) ---
+
+_PARTE_CON_MARCADORES = re.compile(r"^word/(document|header\d*|footer\d*)\.xml$")
+_NODO_TEXTO = re.compile(r"(<w:t(?:\s[^>]*)?>)([^<]*)</w:t>")
+_MARCADOR = re.compile(r"\{\{[^{}]+\}\}")
+_ENTIDADES = {"&amp;": "&", "&lt;": "<", "&gt;": ">", "&quot;": '"', "&apos;": "'"}
+
+
+def _desescapar(texto):
+    if "&" not in texto:
+        return texto
+    return re.sub(r"&(amp|lt|gt|quot|apos);", lambda m: _ENTIDADES[m.group(0)], texto)
+
+
+def reemplazar_marcadores_xml(xml, reemplazos):
+    """Sustituye los {{MARCADORES}} de una parte WordprocessingML en una pasada.
+
+    Word suele partir un marcador entre varios runs (p. ej. "{{NOM" + "BRE}}").
+    Se concatena el texto de todos los <w:t>, se ubican los marcadores sobre
+    ese texto y el valor queda en el run donde empieza cada uno; los trozos
+    sobrantes se vacían. El formato (negritas, cursivas, fuente) de cada run
+    no se toca.
+    """
+    nodos = list(_NODO_TEXTO.finditer(xml))
+    if not nodos:
+        return xml
+
+    textos = [_desescapar(n.group(2)) for n in nodos]
+    completo = "".join(textos)
+    if "{{" not in completo:
+        return xml
+
+    inicios = []
+    acumulado = 0
+    for texto in textos:
+        inicios.append(acumulado)
+        acumulado += len(texto)
+
+    def nodo_de(posicion):
+        # Último nodo cuyo inicio es <= posicion (búsqueda binaria)
+        bajo, alto = 0, len(inicios) - 1
+        while bajo < alto:
+            medio = (bajo + alto + 1) // 2
+            if inicios[medio] <= posicion:
+                bajo = medio
+            else:
+                alto = medio - 1
+        return bajo
+
+    modificados = set()
+    # De derecha a izquierda: así las posiciones pendientes siguen siendo válidas
+    for marcador in reversed(list(_MARCADOR.finditer(completo))):
+        valor = reemplazos.get(marcador.group(0))
+        if valor is None:
+            continue
+        ini, fin = marcador.start(), marcador.end()
+        n_ini, n_fin = nodo_de(ini), nodo_de(fin - 1)
+        local_ini = ini - inicios[n_ini]
+        local_fin = fin - inicios[n_fin]
+
+        if n_ini == n_fin:
+            t = textos[n_ini]
+            textos[n_ini] = t[:local_ini] + valor + t[local_fin:]
+        else:
+            textos[n_ini] = textos[n_ini][:local_ini] + valor
+            for k in range(n_ini + 1, n_fin):
+                textos[k] = ""
+            textos[n_fin] = textos[n_fin][local_fin:]
+            modificados.update(range(n_ini + 1, n_fin + 1))
+        modificados.add(n_ini)
+
+    if not modificados:
+        return xml
+
+    partes = []
+    previo = 0
+    for k in sorted(modificados):
+        nodo = nodos[k]
+        etiqueta = nodo.group(1)
+        if "xml:space" not in etiqueta:
+            etiqueta = etiqueta[:-1] + ' xml:space="preserve">'
+        partes.append(xml[previo:nodo.start()])
+        partes.append(f"{etiqueta}{escape(textos[k])}</w:t>")
+        previo = nodo.end()
+    partes.append(xml[previo:])
+    return "".join(partes)
+
+
+class PlantillaXML:
+    """Plantilla .docx tratada como zip, cargada una sola vez por corrida.
+
+    Solo se reescriben document.xml, encabezados y pies de página; el resto de
+    las partes (estilos, imágenes, numeración...) se comprimen una única vez en
+    un zip base que luego se copia tal cual para cada documento.
+    """
+
+    _cache = {}
+
+    def __init__(self, plantilla_path):
+        self.partes = []
+        with zipfile.ZipFile(plantilla_path, "r") as zf:
+            for info in zf.infolist():
+                self.partes.append((info, zf.read(info)))
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as base:
+            for info, contenido in self.partes:
+                if not _PARTE_CON_MARCADORES.match(info.filename):
+                    base.writestr(info, contenido)
+        self._zip_base = buffer.getvalue()
+
+    @classmethod
+    def cargar(cls, plantilla_path):
+        """Devuelve la plantilla en caché (se recarga si el archivo cambió)."""
+        clave = os.path.abspath(plantilla_path)
+        firma = os.path.getmtime(plantilla_path)
+        en_cache = cls._cache.get(clave)
+        if en_cache is None or en_cache[0] != firma:
+            en_cache = (firma, cls(plantilla_path))
+            cls._cache[clave] = en_cache
+        return en_cache[1]
+
+    def renderizar_partes(self, reemplazos):
+        """Lista de (ZipInfo, bytes) con los marcadores ya sustituidos."""
+        resultado = []
+        for info, contenido in self.partes:
+            if _PARTE_CON_MARCADORES.match(info.filename):
+                xml = contenido.decode("utf-8")
+                contenido = reemplazar_marcadores_xml(xml, reemplazos).encode("utf-8")
+            resultado.append((info, contenido))
+        return resultado
+
+    def renderizar(self, reemplazos):
+        """Devuelve los bytes del .docx ya rellenado."""
+        buffer = io.BytesIO(self._zip_base)
+        # En modo 'a' las entradas del zip base no se vuelven a comprimir
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as zf:
+            for info, contenido in self.partes:
+                if _PARTE_CON_MARCADORES.match(info.filename):
+                    xml = reemplazar_marcadores_xml(contenido.decode("utf-8"), reemplazos)
+                    zf.writestr(info, xml.encode("utf-8"))
+        return buffer.getvalue()
+
+
+def renderizar_notificacion(datos, plantilla_path, motor="docx"):
+    """Devuelve los bytes del .docx de un estudiante con el motor indicado.
+
+    motor: 'docx' (python-docx, reaplica Calibri 10) o 'xml' (conserva el
+    formato de la plantilla y es mucho más rápido).
+    """
+    if motor == "xml":
+        return PlantillaXML.cargar(plantilla_path).renderizar(construir_reemplazos(datos))
+    buffer = io.BytesIO()
+    rellenar_plantilla(datos, plantilla_path).save(buffer)
+    return buffer.getvalue()
+
+def nombre_archivo_notificacion(datos):
+    """Nombre del .docx de salida: Notificacion_NOMBRE_APELLIDO_CEDULA_dd-mm-aaaa.docx"""
+    fecha_hoy = datetime.now().strftime("%d-%m-%Y")
+    
+    # 1. Obtener Nombre y Apellido limpios
+    raw_nombre = str(datos.get('NOMBRES', 'Estudiante')).strip().upper()
+    raw_apellido = str(datos.get('APELLIDO 1', '')).strip().upper()
+    if not raw_apellido:
+        raw_apellido = str(datos.get('APELLIDOS', '')).strip().upper()
+        
+    # 2. Obtener Cédula
+    raw_cedula = str(datos.get('CÉDULA', '')).strip()
+    if not raw_cedula or raw_cedula.lower() == 'nan':
+        raw_cedula = str(datos.get('cedula', 'SN')).strip()
+
+    # 3. Limpieza de caracteres prohibidos en nombres de archivo
+    caracteres_prohibidos = ['/', '\\', ':', '*', '?', '"', '<', '>', '|']
+    for char in caracteres_prohibidos:
+        raw_nombre = raw_nombre.replace(char, '')
+        raw_apellido = raw_apellido.replace(char, '')
+        raw_cedula = raw_cedula.replace(char, '')
+
+    # 4. Construir el nombre final INCLUYENDO la fecha de hoy
+    return f"Notificacion_{raw_nombre}_{raw_apellido}_{raw_cedula}_{fecha_hoy}.docx"
+
+def generar_notificacion_baja_word(datos, plantilla_path="plantilla_bajas.docx", motor="docx"):
+    """Rellena la plantilla de Word con los datos del diccionario 'datos'.
+
+    motor: 'docx' (python-docx) o 'xml' (sustitución directa sobre el zip).
+    Devuelve la ruta del documento generado, o None si no se pudo generar.
+    """
+    
+    if not os.path.exists(plantilla_path):
+        print(f"⚠ Error: No se encuentra la plantilla {plantilla_path}")
+        return None
+
+    try:
+        nombre_salida = nombre_archivo_notificacion(datos)
 
         # Organizar por año/mes
         from config import carpeta_con_fecha
         carpeta_fecha = carpeta_con_fecha("Notificaciones")
             
         ruta_salida = os.path.join(carpeta_fecha, nombre_salida)
-        doc.save(ruta_salida)
+        if motor == "xml":
+            with open(ruta_salida, "wb") as f:
+                f.write(renderizar_notificacion(datos, plantilla_path, motor))
+        else:
+            rellenar_plantilla(datos, plantilla_path).save(ruta_salida)
         print(f"   Word generado: {ruta_salida}")
+        return ruta_salida
 
     except Exception as e:
         print(f"   ⚠ Error generando Word: {e}")
+        return None
+
+
+# --- SALIDA POR LOTES ---
+
+class LoteNotificacionesZip:
+    """Agrupa las notificaciones de una corrida en un único .zip.
+
+    Cada documento se renderiza, se escribe como entrada del zip y se descarta,
+    así que en memoria solo vive uno a la vez.
+    """
+
+    def __init__(self, ruta_salida, motor="docx"):
+        self.ruta_salida = ruta_salida
+        self.motor = motor
+        self.cantidad = 0
+        self._nombres = set()
+        self._zip = zipfile.ZipFile(ruta_salida, "w", zipfile.ZIP_DEFLATED)
+
+    def _nombre_unico(self, nombre):
+        base, ext = os.path.splitext(nombre)
+        candidato, n = nombre, 2
+        while candidato in self._nombres:
+            candidato = f"{base}_{n}{ext}"
+            n += 1
+        self._nombres.add(candidato)
+        return candidato
+
+    def agregar(self, datos, plantilla_path):
+        contenido = renderizar_notificacion(datos, plantilla_path, self.motor)
+        with self._zip.open(self._nombre_unico(nombre_archivo_notificacion(datos)), "w") as destino:
+            destino.write(contenido)
+        self.cantidad += 1
+
+    def cerrar(self):
+        self._zip.close()
+        print(f"   Zip generado: {self.ruta_salida}")
+
+
+class LoteNotificacionesCombinadoXML:
+    """Une todas las notificaciones de una corrida en un solo .docx.
+
+    Cada estudiante se renderiza con el motor XML y queda en una sección que
+    comienza en página nueva. El cuerpo de document.xml se escribe en streaming dentro del zip de salida
+    a medida que llega cada estudiante; nada del lote se acumula en memoria.
+    Estilos e imágenes se toman del primer documento. Si el encabezado o pie
+    de un estudiante difiere del primero (marcadores en la cabecera), su
+    sección recibe copias propias de esas partes con relaciones nuevas.
+    """
+
+    DOCUMENTO = "word/document.xml"
+    RELACIONES = "word/_rels/document.xml.rels"
+    TIPOS = "[Content_Types].xml"
+    _REFERENCIA = re.compile(r'(<w:(?:header|footer)Reference\b[^>]*\br:id=")([^"]+)(")')
+    _RELACION = re.compile(r"<Relationship\b[^>]*>")
+
+    def __init__(self, ruta_salida):
+        self.ruta_salida = ruta_salida
+        self.cantidad = 0
+        self._zip = None
+        self._stream = None
+        self._partes_base = None
+        self._cola = ""
+        self._sect_actual = ""
+        self._cabeceras = {}      # rId -> (tipo de relación, parte) de encabezados y pies
+        self._originales = {}     # parte -> contenido renderizado del primer estudiante
+        self._partes_extra = []   # (nombre, contenido) de encabezados/pies propios
+        self._relaciones_extra = []
+        self._tipos_extra = []
+        self._tipos_base = ""
+
+    @staticmethod
+    def _dividir(xml):
+        """(cabecera hasta <w:body>, cuerpo sin sectPr final, sectPr final, cola)."""
+        ini = xml.index("<w:body>") + len("<w:body>")
+        fin = xml.rindex("</w:body>")
+        cuerpo = xml[ini:fin]
+        pos_sect = cuerpo.rfind("<w:sectPr")
+        if pos_sect == -1:
+            return xml[:ini], cuerpo, "", xml[fin:]
+        return xml[:ini], cuerpo[:pos_sect], cuerpo[pos_sect:], xml[fin:]
+
+    def _indexar_cabeceras(self):
+        """Localiza en las relaciones del documento sus encabezados y pies."""
+        base = {i.filename: c for i, c in self._partes_base}
+        rels = base.get(self.RELACIONES, b"").decode("utf-8")
+        for etiqueta in self._RELACION.findall(rels):
+            attrs = dict(re.findall(r'(\w+)="([^"]*)"', etiqueta))
+            tipo = attrs.get("Type", "")
+            if tipo.endswith(("/header", "/footer")):
+                parte = posixpath.normpath(posixpath.join("word", attrs.get("Target", "")))
+                self._cabeceras[attrs.get("Id")] = (tipo, parte)
+        self._tipos_base = base.get(self.TIPOS, b"").decode("utf-8")
+
+    def _tipo_contenido(self, parte, tipo_relacion):
+        m = re.search(rf'<Override PartName="/{re.escape(parte)}" ContentType="([^"]+)"', self._tipos_base)
+        if m:
+            return m.group(1)
+        clase = "header" if tipo_relacion.endswith("/header") else "footer"
+        return f"application/vnd.openxmlformats-officedocument.wordprocessingml.{clase}+xml"
+
+    def _cabeceras_propias(self, contenidos, *fragmentos):
+        """Apunta las secciones del estudiante a copias propias de los
+        encabezados/pies cuyo contenido renderizado difiere del primero."""
+        sufijo = f"_n{self.cantidad}"
+        nuevos = {}
+
+        def sustituir(m):
+            rid = m.group(2)
+            if rid not in nuevos:
+                nuevos[rid] = rid
+                tipo, parte = self._cabeceras.get(rid, (None, None))
+                if parte is not None and contenidos.get(parte) != self._originales.get(parte):
+                    raiz, ext = posixpath.splitext(parte)
+                    nueva = raiz + sufijo + ext
+                    self._partes_extra.append((nueva, contenidos[parte]))
+                    carpeta, nombre = posixpath.split(parte)
+                    rels_parte = posixpath.join(carpeta, "_rels", nombre + ".rels")
+                    if rels_parte in contenidos:
+                        self._partes_extra.append(
+                            (posixpath.join(carpeta, "_rels", posixpath.basename(nueva) + ".rels"),
+                             contenidos[rels_parte]))
+                    nuevos[rid] = rid + sufijo
+                    self._relaciones_extra.append(
+                        f'<Relationship Id="{nuevos[rid]}" Type="{tipo}" '
+                        f'Target="{posixpath.relpath(nueva, "word")}"/>')
+                    self._tipos_extra.append(
+                        f'<Override PartName="/{nueva}" ContentType="{self._tipo_contenido(parte, tipo)}"/>')
+            return m.group(1) + nuevos[rid] + m.group(3)
+
+        return [self._REFERENCIA.sub(sustituir, f) for f in fragmentos]
+
+    def agregar(self, datos, plantilla_path):
+        partes = PlantillaXML.cargar(plantilla_path).renderizar_partes(construir_reemplazos(datos))
+        xml = next(c for i, c in partes if i.filename == self.DOCUMENTO).decode("utf-8")
+        cabecera, cuerpo, sect, cola = self._dividir(xml)
+
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.ruta_salida, "w", zipfile.ZIP_DEFLATED)
+            self._stream = self._zip.open(self.DOCUMENTO, "w")
+            self._stream.write(cabecera.encode("utf-8"))
+            self._partes_base = [(i, c) for i, c in partes if i.filename != self.DOCUMENTO]
+            self._cola = cola
+            self._indexar_cabeceras()
+            self._originales = {i.filename: c for i, c in partes
+                                if i.filename in {p for _, p in self._cabeceras.values()}}
+        else:
+            # Salto de sección (página nueva) que cierra la notificación anterior
+            self._stream.write(f"<w:p><w:pPr>{self._sect_actual}</w:pPr></w:p>".encode("utf-8"))
+            cuerpo, sect = self._cabeceras_propias({i.filename: c for i, c in partes}, cuerpo, sect)
+
+        self._sect_actual = sect
+        self._stream.write(cuerpo.encode("utf-8"))
+        self.cantidad += 1
+
+    def cerrar(self):
+        if self._zip is None:
+            return
+        self._stream.write((self._sect_actual + self._cola).encode("utf-8"))
+        self._stream.close()
+        for info, contenido in self._partes_base:
+            if info.filename == self.RELACIONES and self._relaciones_extra:
+                contenido = contenido.replace(
+                    b"</Relationships>", "".join(self._relaciones_extra).encode("utf-8") + b"</Relationships>")
+            elif info.filename == self.TIPOS and self._tipos_extra:
+                contenido = contenido.replace(
+                    b"</Types>", "".join(self._tipos_extra).encode("utf-8") + b"</Types>")
+            self._zip.writestr(info, contenido)
+        for nombre, contenido in self._partes_extra:
+            self._zip.writestr(nombre, contenido)
+        self._zip.close()
+        print(f"   Word combinado generado: {self.ruta_salida}")
+
+
+def crear_lote_notificaciones(modo_salida, carpeta, motor="docx"):
+    """Crea el acumulador de lote para 'combinado' o 'zip' (None si es 'individual').
+
+    El combinado siempre usa el motor XML, que escribe el documento en
+    streaming; con python-docx habría que tener el lote entero en memoria.
+    """
+    marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if modo_salida == "combinado":
+        return LoteNotificacionesCombinadoXML(os.path.join(carpeta, f"Notificaciones_Lote_{marca}.docx"))
+    if modo_salida == "zip":
+        return LoteNotificacionesZip(os.path.join(carpeta, f"Notificaciones_Lote_{marca}.zip"), motor)
+    return None
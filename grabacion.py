@@ -0,0 +1,356 @@
+"""Grabación y reproducción de las páginas de SIGAE para pruebas sin producción.
+
+``GrabadorSigae`` guarda, durante una corrida real, el HTML que ve el bot en
+cada paso (login, listado, búsqueda vacía, fila con enlace directo o con menú,
+formulario de baja y redirección tras enviarlo) junto con la URL y la
+latencia medida. Antes de escribir nada se depuran los datos sensibles:
+
+* cédulas y demás números de 6 a 9 dígitos -> seudónimos estables (la misma
+  cédula da el mismo seudónimo en todas las páginas y URLs),
+* tokens CSRF, correos y teléfonos,
+* textos de las filas de las tablas (nombres de otros estudiantes),
+* los datos del estudiante en proceso y el usuario de la sesión.
+
+La depuración es de mejor esfuerzo: revisar la carpeta antes de compartirla.
+
+``servir()`` levanta un ``http.server`` local que responde con esas páginas
+(y los .js/.css guardados), opcionalmente con las latencias grabadas, para
+correr el bot con ``SIGAE_URL=http://127.0.0.1:<puerto>``.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import mimetypes
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import SIGAE_URL
+
+INDICE = "indice.json"
+CARPETA_RECURSOS = "recursos"
+ARCHIVO_BAJAS_REPLAY = "bajas_replay.xlsx"
+CAMPOS_SENSIBLES = ('NOMBRES', 'APELLIDO 1', 'APELLIDO 2', 'APELLIDOS', 'CORREO',
+                    'TELÉFONO', 'TELEFONO', 'DIRECCIÓN', 'DIRECCION')
+PARAMETROS_IGNORADOS = ('_', '_pjax')   # anti-caché de jQuery/pjax
+
+_RE_NUMERO = re.compile(r'(?<![\w.])\d{6,9}(?!\w)')
+_RE_NUMERO_PUNTOS = re.compile(r'(?<![\w.])\d{1,3}(?:\.\d{3}){2}(?![\w]|\.\d)')   # 12.345.678
+_RE_CSRF = re.compile(r'((?:name|content)="[^"]*csrf[^"]*"[^>]*?(?:value|content)=")[^"]*"', re.I)
+_RE_CSRF_META = re.compile(r'(<meta name="csrf-token" content=")[^"]*"', re.I)
+_RE_CORREO = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+')
+_RE_TELEFONO = re.compile(r'(?<!\d)0\d{3}-?\d{7}(?!\d)')
+_RE_TBODY = re.compile(r'<tbody\b.*?</tbody>', re.S | re.I)
+_RE_TEXTO = re.compile(r'>([^<>]*[A-Za-zÁÉÍÓÚÑáéíóúñ][^<>]*)<')
+_RE_CRUDO = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.S | re.I)
+_RE_ETIQUETA = re.compile(r'<[^>]*>')
+_RE_VALOR_ATRIBUTO = re.compile(r'(=\s*)("[^"]*"|\'[^\']*\')')
+_RE_CEDULA_CELDA = re.compile(r'\s*[VvEe]-?[\d.]+\s*')   # V-12345678: la reconoce el bot
+
+
+def seudonimo(numero):
+    """Reemplazo estable de un número sensible, con la misma cantidad de dígitos."""
+    digitos = str(int(hashlib.sha256(f"sigae:{numero}".encode()).hexdigest(), 16))
+    return str(int(digitos[0]) % 9 + 1) + digitos[1:len(numero)]
+
+
+def depurar_texto(texto, sensibles=None):
+    """Quita datos personales de un HTML o una URL (ver docstring del módulo).
+
+    ``sensibles`` es un patrón compilado con valores a tapar (nombres, usuario).
+    """
+    texto = texto.replace(SIGAE_URL, "")
+    if sensibles is not None:
+        texto = _tapar_sensibles(texto, sensibles)
+    texto = _RE_CSRF_META.sub(r'\1REPLAY"', texto)
+    texto = _RE_CSRF.sub(r'\1REPLAY"', texto)
+    texto = _RE_CORREO.sub("correo@ejemplo.com", texto)
+    texto = _RE_TBODY.sub(lambda m: _RE_TEXTO.sub(_ocultar_celda, m.group(0)), texto)
+    texto = _RE_NUMERO.sub(lambda m: seudonimo(m.group(0)), texto)
+    texto = _RE_NUMERO_PUNTOS.sub(lambda m: f"{int(seudonimo(m.group(0).replace('.', ''))):,}".replace(",", "."), texto)
+    return _RE_TELEFONO.sub("0000-0000000", texto)
+
+
+def _tapar_sensibles(html, sensibles):
+    """Tapa los valores sensibles solo en texto visible y valores de atributos.
+
+    Scripts, estilos, comentarios, nombres de etiquetas y de atributos quedan
+    intactos, para no alterar la forma de la página (p. ej. "Mary" dentro de
+    class="summary").
+    """
+    def en_etiqueta(m):
+        return _RE_VALOR_ATRIBUTO.sub(lambda a: a.group(1) + sensibles.sub("XXXX", a.group(2)), m.group(0))
+
+    def en_tramo(tramo):
+        partes, pos = [], 0
+        for m in _RE_ETIQUETA.finditer(tramo):
+            partes.append(sensibles.sub("XXXX", tramo[pos:m.start()]))
+            partes.append(en_etiqueta(m))
+            pos = m.end()
+        partes.append(sensibles.sub("XXXX", tramo[pos:]))
+        return "".join(partes)
+
+    partes, pos = [], 0
+    for m in _RE_CRUDO.finditer(html):
+        partes.append(en_tramo(html[pos:m.start()]))
+        partes.append(m.group(0))
+        pos = m.end()
+    partes.append(en_tramo(html[pos:]))
+    return "".join(partes)
+
+
+def _ocultar_celda(m):
+    contenido = m.group(1)
+    if not contenido.strip() or _RE_CEDULA_CELDA.fullmatch(contenido):
+        return m.group(0)
+    return ">" + re.sub(r'[A-Za-zÁÉÍÓÚÑáéíóúñ]', "x", contenido) + "<"
+
+
+def ruta_recurso(carpeta, ruta):
+    """Archivo de recursos/ para la ruta pedida; None si se sale de esa carpeta."""
+    base = os.path.realpath(os.path.join(carpeta, CARPETA_RECURSOS))
+    destino = os.path.realpath(os.path.join(base, *ruta.strip("/").split("/")))
+    if os.path.commonpath([base, destino]) != base or destino == base:
+        return None
+    return destino
+
+
+def clave_url(url):
+    """Ruta + query ordenada, sin parámetros anti-caché (para emparejar pedidos)."""
+    partes = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                   if k not in PARAMETROS_IGNORADOS)
+    return (partes.path or "/") + ("?" + urlencode(query) if query else "")
+
+
+class GrabadorSigae:
+    """Guarda las páginas que ve SigaeBot, depuradas, en ``carpeta``."""
+
+    def __init__(self, carpeta, usuario=""):
+        self.carpeta = carpeta
+        self.paginas = []
+        self.bajas = {}                  # tipo -> filas de bajas_replay.xlsx
+        self._sensibles = set()
+        self._patron = None
+        self._agregar_sensibles([usuario])
+        self._recursos = set()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(carpeta, CARPETA_RECURSOS), exist_ok=True)
+
+    def _agregar_sensibles(self, valores):
+        nuevos = {v for v in valores if len(v) >= 3} - self._sensibles
+        if nuevos:
+            # Se acumulan los de toda la corrida: una página (el listado, por
+            # ejemplo) puede mostrar datos de un estudiante anterior.
+            self._sensibles |= nuevos
+            alternativas = sorted(self._sensibles, key=len, reverse=True)
+            self._patron = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, alternativas)) + r")(?!\w)", re.I)
+
+    def iniciar_registro(self, registro, tipo_programa):
+        """Anota los datos del estudiante que hay que borrar de las páginas."""
+        valores = [str(registro.get(campo, "")).strip() for campo in CAMPOS_SENSIBLES]
+        with self._lock:
+            self._agregar_sensibles(valores)
+            self.bajas.setdefault(tipo_programa, []).append({
+                'CÉDULA': seudonimo(registro.cedula) if registro.cedula.isdigit() else registro.cedula,
+                'CAUSAL': registro.causal,
+            })
+
+    def capturar(self, driver, etiqueta, latencia=None, **extra):
+        """Guarda la página actual del driver bajo ``etiqueta``."""
+        try:
+            html = driver.page_source
+            url = driver.current_url
+        except Exception as e:
+            print(f"    ⚠ No se pudo grabar la página ({etiqueta}): {e}")
+            return
+        with self._lock:
+            sensibles = self._patron
+            nombre = f"{len(self.paginas):04d}_{etiqueta}.html"
+            self.paginas.append({
+                'archivo': nombre,
+                'etiqueta': etiqueta,
+                'url': clave_url(depurar_texto(url, sensibles)),
+                'latencia': round(latencia, 3) if latencia is not None else None,
+                **{k: clave_url(depurar_texto(v, sensibles)) for k, v in extra.items()},
+            })
+        with open(os.path.join(self.carpeta, nombre), "w", encoding="utf-8") as f:
+            f.write(depurar_texto(html, sensibles))
+        self._guardar_recursos(driver)
+
+    def _guardar_recursos(self, driver):
+        """Descarga una vez los .js/.css del mismo sitio que usa la página."""
+        try:
+            urls = driver.execute_script("""
+                var urls = [];
+                document.querySelectorAll('script[src], link[rel="stylesheet"][href]').forEach(function (n) {
+                    var u = new URL(n.src || n.href, location.href);
+                    if (u.origin === location.origin) urls.push(u.pathname);
+                });
+                return urls;
+            """)
+        except Exception:
+            return
+        for ruta in urls or []:
+            with self._lock:
+                if ruta in self._recursos:
+                    continue
+                self._recursos.add(ruta)
+            try:
+                contenido = driver.execute_async_script("""
+                    var listo = arguments[arguments.length - 1];
+                    fetch(arguments[0]).then(function (r) { return r.text(); })
+                        .then(listo, function () { listo(null); });
+                """, ruta)
+            except Exception:
+                contenido = None
+            if contenido is None:
+                continue
+            destino = ruta_recurso(self.carpeta, ruta)
+            if destino is None:
+                continue
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write(contenido)
+
+    def cerrar(self):
+        """Escribe el índice y un Excel de bajas con las cédulas seudonimizadas."""
+        with self._lock:
+            with open(os.path.join(self.carpeta, INDICE), "w", encoding="utf-8") as f:
+                json.dump({'paginas': self.paginas}, f, indent=1, ensure_ascii=False)
+            if self.bajas:
+                import pandas as pd
+                from config import HOJAS_PROGRAMA
+                with pd.ExcelWriter(os.path.join(self.carpeta, ARCHIVO_BAJAS_REPLAY)) as writer:
+                    for tipo, filas in self.bajas.items():
+                        pd.DataFrame(filas).to_excel(writer, index=False, sheet_name=HOJAS_PROGRAMA.get(tipo, tipo))
+        print(f"✓ Grabación guardada: {self.carpeta} ({len(self.paginas)} páginas)")
+
+
+class _ManejadorReplay(BaseHTTPRequestHandler):
+    """Responde con las páginas grabadas; ver ServidorReplay para el emparejado."""
+
+    def log_message(self, formato, *args):
+        if self.server.detallado:
+            print(f"    ↔ {self.command} {self.path} -> " + (formato % args))
+
+    def _enviar(self, pagina):
+        if self.server.con_latencia and pagina.get('latencia'):
+            time.sleep(pagina['latencia'])
+        with open(os.path.join(self.server.carpeta, pagina['archivo']), "rb") as f:
+            cuerpo = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _redirigir(self, destino):
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        clave = clave_url(self.path)
+        ruta = urlsplit(self.path).path
+        if ruta not in ("/", "/index.php"):
+            archivo = ruta_recurso(self.server.carpeta, ruta)
+            if archivo is None or not os.path.isfile(archivo):
+                self.send_error(404)
+                return
+            with open(archivo, "rb") as f:
+                cuerpo = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", mimetypes.guess_type(archivo)[0] or "application/octet-stream")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+
+        pagina = self.server.buscar(clave)
+        if pagina is None:
+            self.send_error(404, "Sin grabación para esta URL")
+            return
+        self._enviar(pagina)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        destino = self.server.destino_post(clave_url(self.path))
+        if destino is None:
+            self.send_error(404, "Sin grabación para este envío")
+            return
+        self._redirigir(destino)
+
+
+class ServidorReplay(ThreadingHTTPServer):
+    """Servidor HTTP local que reproduce una carpeta grabada con GrabadorSigae.
+
+    Emparejado de pedidos GET: URL exacta (sin parámetros anti-caché); si no
+    hay, una búsqueda por cédula sin grabar recibe la página de búsqueda vacía
+    de ese listado; si no, la primera página grabada con la misma ruta ``r``.
+    Un POST del formulario de baja redirige a donde redirigió SIGAE al
+    grabarlo; cualquier otro POST (login) redirige al primer listado.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, carpeta, puerto=8800, con_latencia=False, detallado=False):
+        with open(os.path.join(carpeta, INDICE), "r", encoding="utf-8") as f:
+            self.paginas = json.load(f)['paginas']
+        self.carpeta = carpeta
+        self.con_latencia = con_latencia
+        self.detallado = detallado
+        self._por_url = {}
+        for pagina in self.paginas:
+            self._por_url.setdefault(pagina['url'], pagina)
+        super().__init__(("127.0.0.1", puerto), _ManejadorReplay)
+
+    @staticmethod
+    def _ruta_r(clave):
+        return dict(parse_qsl(urlsplit(clave).query)).get('r', '')
+
+    def buscar(self, clave):
+        if clave in self._por_url:
+            return self._por_url[clave]
+        ruta_r = self._ruta_r(clave)
+        mismas = [p for p in self.paginas if self._ruta_r(p['url']) == ruta_r]
+        if 'AlumnoSearch' in clave:
+            for pagina in mismas:
+                if pagina['etiqueta'] == 'busqueda_vacia':
+                    return pagina
+        for etiqueta in ('listado', None):
+            for pagina in mismas:
+                if etiqueta is None or pagina['etiqueta'] == etiqueta:
+                    return pagina
+        return None
+
+    def destino_post(self, clave):
+        redirecciones = [p for p in self.paginas if p['etiqueta'] == 'redireccion']
+        for pagina in redirecciones:
+            if pagina.get('desde') == clave:
+                return pagina['url']
+        if 'solicitar-baja' in clave and redirecciones:
+            return redirecciones[0]['url']
+        for pagina in self.paginas:
+            if pagina['etiqueta'] == 'listado':
+                return pagina['url']
+        return None
+
+
+def servir(carpeta, puerto=8800, con_latencia=False, detallado=False, stop_event=None):
+    """Atiende la carpeta grabada hasta Ctrl+C (o hasta que se active stop_event)."""
+    servidor = ServidorReplay(carpeta, puerto, con_latencia, detallado)
+    print(f"▶ Reproduciendo {carpeta} ({len(servidor.paginas)} páginas) en http://127.0.0.1:{puerto}")
+    print(f"  Ejecute el bot con SIGAE_URL=http://127.0.0.1:{puerto}")
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        while hilo.is_alive() and not (stop_event and stop_event.is_set()):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
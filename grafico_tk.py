@@ -0,0 +1,148 @@
+"""Gráficos simples dibujados directamente sobre un tk.Canvas.
+
+Reemplaza a matplotlib en el dashboard: torta, barras apiladas y serie de
+tiempo. Cada elemento del dibujo tiene una clave; al redibujar se actualizan
+las coordenadas y colores de los elementos existentes (sin borrar el lienzo
+ni crear figuras nuevas) y solo se eliminan los que ya no hacen falta.
+"""
+import tkinter as tk
+
+FONDO = '#f0f0f0'
+TEXTO = '#333333'
+EJE = '#999999'
+FUENTE = ('Segoe UI', 9)
+FUENTE_NEGRITA = ('Segoe UI', 10, 'bold')
+COLOR_EXITO = '#28a745'
+COLOR_FALLO = '#dc3545'
+COLOR_SERIE = '#0078d7'
+
+
+class GraficoTk(tk.Canvas):
+    """Lienzo que dibuja y re-dibuja en el lugar un único gráfico."""
+
+    def __init__(self, parent, **kwargs):
+        kwargs.setdefault('bg', FONDO)
+        kwargs.setdefault('highlightthickness', 0)
+        super().__init__(parent, **kwargs)
+        self._items = {}            # clave -> id del elemento en el canvas
+        self._usados = set()
+        self._ultimo = None         # (método, args) para redibujar al cambiar de tamaño
+        self.bind('<Configure>', lambda e: self._redibujar())
+
+    # --- INFRAESTRUCTURA ---
+    def _item(self, clave, tipo, coords, **opciones):
+        """Crea el elemento la primera vez; después solo lo actualiza."""
+        self._usados.add(clave)
+        item = self._items.get(clave)
+        if item is None or self.type(item) != tipo:
+            if item is not None:
+                self.delete(item)
+            self._items[clave] = getattr(self, f"create_{tipo}")(*coords, **opciones)
+            return
+        self.coords(item, *coords)
+        self.itemconfigure(item, **opciones)
+
+    def _dibujar(self, metodo, *args):
+        self._ultimo = (metodo, args)
+        self._usados = set()
+        metodo(*args)
+        for clave in [c for c in self._items if c not in self._usados]:
+            self.delete(self._items.pop(clave))
+
+    def _redibujar(self):
+        if self._ultimo:
+            metodo, args = self._ultimo
+            self._dibujar(metodo, *args)
+
+    def _tamano(self):
+        return max(self.winfo_width(), 50), max(self.winfo_height(), 50)
+
+    # --- TIPOS DE GRÁFICO ---
+    def mensaje(self, texto):
+        """Deja solo un texto centrado (p. ej. 'Sin datos')."""
+        self._dibujar(self._mensaje, texto)
+
+    def _mensaje(self, texto):
+        ancho, alto = self._tamano()
+        self._item('mensaje', 'text', (ancho / 2, alto / 2), text=texto, fill=EJE, font=FUENTE_NEGRITA)
+
+    def torta(self, valores, etiquetas, colores):
+        """Gráfico de torta con porcentaje por porción."""
+        self._dibujar(self._torta, list(valores), list(etiquetas), list(colores))
+
+    def _torta(self, valores, etiquetas, colores):
+        total = sum(valores)
+        if not total:
+            return self._mensaje("Sin datos para graficar")
+        ancho, alto = self._tamano()
+        radio = min(ancho * 0.6, alto) / 2 - 20
+        cx, cy = ancho * 0.38, alto / 2
+        caja = (cx - radio, cy - radio, cx + radio, cy + radio)
+        inicio = 90.0
+        for n, (valor, etiqueta, color) in enumerate(zip(valores, etiquetas, colores)):
+            extension = -360.0 * valor / total
+            if valor == total:
+                extension = -359.99   # un arco de 360° no se dibuja
+            self._item(('porcion', n), 'arc', caja, start=inicio, extent=extension,
+                       fill=color, outline=FONDO, width=2, style='pieslice')
+            # Leyenda a la derecha
+            ly = cy - radio + n * 24
+            self._item(('leyenda_color', n), 'rectangle', (ancho * 0.72, ly, ancho * 0.72 + 14, ly + 14),
+                       fill=color, outline=color)
+            self._item(('leyenda_texto', n), 'text', (ancho * 0.72 + 20, ly + 7), anchor='w',
+                       text=f"{etiqueta}: {valor} ({valor / total:.1%})", fill=TEXTO, font=FUENTE_NEGRITA)
+            inicio += extension
+
+    def barras(self, categorias, exitos, fallos):
+        """Barras horizontales apiladas (éxitos + fallos) por categoría."""
+        self._dibujar(self._barras, list(categorias), list(exitos), list(fallos))
+
+    def _barras(self, categorias, exitos, fallos):
+        if not categorias:
+            return self._mensaje("Sin datos para graficar")
+        ancho, alto = self._tamano()
+        margen_izq, margen = min(180, ancho * 0.35), 10
+        maximo = max(e + f for e, f in zip(exitos, fallos)) or 1
+        alto_barra = max(4, min(22, (alto - 2 * margen) / len(categorias) - 4))
+        escala = (ancho - margen_izq - 50) / maximo
+        for n, (categoria, e, f) in enumerate(zip(categorias, exitos, fallos)):
+            y = margen + n * (alto_barra + 4)
+            if y + alto_barra > alto:
+                break
+            x_exito = margen_izq + e * escala
+            self._item(('etiqueta', n), 'text', (margen_izq - 6, y + alto_barra / 2), anchor='e',
+                       text=str(categoria)[:28] or "(vacío)", fill=TEXTO, font=FUENTE)
+            self._item(('exito', n), 'rectangle', (margen_izq, y, x_exito, y + alto_barra),
+                       fill=COLOR_EXITO, outline='')
+            self._item(('fallo', n), 'rectangle', (x_exito, y, x_exito + f * escala, y + alto_barra),
+                       fill=COLOR_FALLO, outline='')
+            self._item(('total', n), 'text', (x_exito + f * escala + 4, y + alto_barra / 2), anchor='w',
+                       text=str(e + f), fill=TEXTO, font=FUENTE)
+
+    def serie(self, etiquetas, valores, unidad=""):
+        """Serie de tiempo: línea con puntos y eje X rotulado en los extremos."""
+        self._dibujar(self._serie, list(etiquetas), list(valores), unidad)
+
+    def _serie(self, etiquetas, valores, unidad):
+        if not valores:
+            return self._mensaje("Sin datos para graficar")
+        ancho, alto = self._tamano()
+        izq, der, arriba, abajo = 45, ancho - 15, 15, alto - 25
+        maximo = max(valores) or 1
+        paso = (der - izq) / max(1, len(valores) - 1)
+        puntos = []
+        for n, valor in enumerate(valores):
+            puntos += [izq + n * paso, abajo - (abajo - arriba) * valor / maximo]
+        if len(puntos) == 2:
+            puntos += puntos   # una línea necesita al menos dos puntos
+
+        self._item('eje_x', 'line', (izq, abajo, der, abajo), fill=EJE)
+        self._item('eje_y', 'line', (izq, arriba, izq, abajo), fill=EJE)
+        self._item('max_y', 'text', (izq - 4, arriba), anchor='e', text=f"{maximo:g}{unidad}", fill=TEXTO, font=FUENTE)
+        self._item('min_y', 'text', (izq - 4, abajo), anchor='e', text=f"0{unidad}", fill=TEXTO, font=FUENTE)
+        self._item('x_inicio', 'text', (izq, abajo + 4), anchor='nw', text=str(etiquetas[0]), fill=TEXTO, font=FUENTE)
+        self._item('x_fin', 'text', (der, abajo + 4), anchor='ne', text=str(etiquetas[-1]), fill=TEXTO, font=FUENTE)
+        self._item('linea', 'line', puntos, fill=COLOR_SERIE, width=2)
+        for n in range(len(valores)):
+            x, y = puntos[2 * n], puntos[2 * n + 1]
+            self._item(('punto', n), 'oval', (x - 3, y - 3, x + 3, y + 3), fill=COLOR_SERIE, outline='')
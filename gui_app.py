@@ -1,56 +1,73 @@
+import time
+_INICIO_ARRANQUE = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import sys
+import importlib
 import threading
 import os
-import time
 import webbrowser
 import json
+import queue
+from collections import Counter, deque
 from datetime import datetime
 
+from grafico_tk import GraficoTk, COLOR_EXITO, COLOR_FALLO
 from config import (
-    VERSION_ACTUAL, APP_NOMBRE, URL_VERSION, URL_DESCARGA,
-    SIGAE_URL, ARCHIVO_RECUPERACION, ARCHIVO_CONFIG, carpeta_con_fecha
+    VERSION_ACTUAL, APP_NOMBRE, URL_VERSION, URL_DESCARGA, URL_API_RELEASE,
+    ARCHIVO_RECUPERACION, ARCHIVO_CONFIG, carpeta_con_fecha
 )
 
-# Imports pesados diferidos (se cargan después del splash)
-cifrar_texto = None
-descifrar_texto = None
-AuditorSIGAE = None
-plt = None
-FigureCanvasTkAgg = None
-pd = None
-
-# Servicios (se importan después del splash)
-update_service = None
-word_service = None
-bot_service = None
-
-def _importar_dependencias():
-    """Carga los módulos pesados. Se llama después de mostrar el splash."""
-    global cifrar_texto, descifrar_texto, AuditorSIGAE
-    global plt, FigureCanvasTkAgg, pd
-    global update_service, word_service, bot_service
-
-    import pandas
-    pd = pandas
-
-    from seguridad import cifrar_texto as _ct, descifrar_texto as _dt
-    cifrar_texto = _ct
-    descifrar_texto = _dt
-
-    from auditoria import AuditorSIGAE as _Aud
-    AuditorSIGAE = _Aud
-
-    import matplotlib.pyplot as _plt
-    plt = _plt
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as _FCA
-    FigureCanvasTkAgg = _FCA
-
-    from services import update_service as _us, word_service as _ws, bot_service as _bs
-    update_service = _us
-    word_service = _ws
-    bot_service = _bs
+INTERVALO_PANEL_MS = 1000   # refresco del panel en vivo mientras corre el bot
+
+# --- Carga de módulos bajo demanda ---
+# Nada pesado se importa al arrancar: selenium solo al hacer login o correr el
+# bot y pandas al leer un Excel. Los gráficos se dibujan con tk.Canvas.
+TIEMPOS_IMPORTACION = {}
+_modulos_cargados = {}
+_lock_importacion = threading.Lock()
+
+def _importar(nombre_modulo):
+    """Importa un módulo la primera vez que se necesita y registra su costo."""
+    with _lock_importacion:
+        if nombre_modulo in _modulos_cargados:
+            return _modulos_cargados[nombre_modulo]
+        inicio = time.perf_counter()
+        modulo = importlib.import_module(nombre_modulo)
+        TIEMPOS_IMPORTACION[nombre_modulo] = (time.perf_counter() - inicio) * 1000
+        _modulos_cargados[nombre_modulo] = modulo
+    print(f"⏱ Módulo '{nombre_modulo}' cargado en {TIEMPOS_IMPORTACION[nombre_modulo]:.0f} ms")
+    return modulo
+
+def _seguridad():
+    return _importar("seguridad")
+
+def _update_service():
+    return _importar("services.update_service")
+
+def _bot_service():
+    _importar("pandas")
+    _importar("selenium.webdriver")
+    return _importar("services.bot_service")
+
+def _word_service():
+    _importar("pandas")
+    _importar("docx")
+    return _importar("services.word_service")
+
+def _auditor():
+    _importar("pandas")
+    return _importar("auditoria").AuditorSIGAE
+
+def reporte_tiempos_arranque():
+    """Texto con el costo de cada importación realizada hasta ahora."""
+    if not TIEMPOS_IMPORTACION:
+        return "⏱ Sin módulos pesados cargados todavía."
+    lineas = ["⏱ Costo de importación por módulo:"]
+    for nombre, ms in sorted(TIEMPOS_IMPORTACION.items(), key=lambda x: -x[1]):
+        lineas.append(f"    {ms:8.0f} ms  {nombre}")
+    return "\n".join(lineas)
 
 class PrintRedirector:
     """Redirige print() al widget de texto de manera segura para hilos."""
@@ -108,7 +125,7 @@ class SigaeApp:
         self.root.state('zoomed')
 
         self.is_closing = False
-        self.driver = None
+        self.drivers = []   # navegadores abiertos por el bot (dos con PNF y PNFA a la vez)
         self.sesion_valida = False
                
         self._configurar_estilos()
@@ -119,28 +136,41 @@ class SigaeApp:
         self.archivo_excel_word_var = tk.StringVar()
         self.plantilla_word_var = tk.StringVar(value="plantilla_bajas.docx")
         self.plantilla_bot_var = tk.StringVar(value="plantilla_bajas.docx")
+        self.modo_salida_word_var = tk.StringVar(value="individual")
+        self.motor_xml_word_var = tk.BooleanVar(value=False)
+        self.forzar_word_var = tk.BooleanVar(value=False)
         self.headless_var = tk.BooleanVar(value=False)
         self.tipo_programa_var = tk.StringVar(value="pnf")
+        self.ambos_programas_var = tk.BooleanVar(value=False)
         self.archivo_auditoria_var = tk.StringVar()
+        self.vista_cubo_var = tk.StringVar()
 
         # --- RASTREADOR PARA CAMBIAR NOMBRE DE PLANTILLA ---
         self.tipo_programa_var.trace_add("write", self._actualizar_nombres_plantillas)
         
         self.stop_event = threading.Event()
         self.stop_word_event = threading.Event()
+        self.bot_activo = threading.Event()   # frena la pre-descarga de actualizaciones
+        self.cola_resultados = queue.Queue()  # resultados del bot para el panel en vivo
         
         self.crear_carpetas()
-        self.cargar_credenciales_config()
         
         self.crear_interfaz()
         sys.stdout = PrintRedirector(self.console_text, self.root)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-        
+        self.root.bind("<F12>", lambda e: print(reporte_tiempos_arranque()))
+
+        print(f"⏱ Ventana principal lista en {(time.perf_counter() - _INICIO_ARRANQUE) * 1000:.0f} ms")
+        self.cargar_credenciales_config()
         self.verificar_actualizacion()
 
     # --- MANEJO DE CONFIGURACIÓN (JSON) ---
     def cargar_credenciales_config(self):
-        """Carga los datos desde el archivo JSON si existe."""
+        """Carga los datos desde el archivo JSON si existe.
+
+        La clave se descifra en segundo plano para no cargar cryptography
+        antes de mostrar la ventana.
+        """
         if os.path.exists(ARCHIVO_CONFIG):
             try:
                 with open(ARCHIVO_CONFIG, "r", encoding="utf-8") as f:
@@ -149,15 +179,22 @@ class SigaeApp:
                     # Intentar descifrar la clave
                     clave_cifrada = datos.get('clave', '')
                     if clave_cifrada:
-                        self.clave_var.set(descifrar_texto(clave_cifrada))
+                        threading.Thread(target=self._thread_descifrar_clave, args=(clave_cifrada,), daemon=True).start()
             except Exception as e:
                 print(f"Nota: No se pudo cargar config previa: {e}")
 
+    def _thread_descifrar_clave(self, clave_cifrada):
+        try:
+            clave = _seguridad().descifrar_texto(clave_cifrada)
+            self.safe_ui_update(self.clave_var.set, clave)
+        except Exception as e:
+            print(f"Nota: No se pudo descifrar la clave guardada: {e}")
+
     def guardar_credenciales_config(self):
         """Guarda los datos en un archivo JSON independiente del .exe."""
         usuario = self.usuario_var.get()
         clave_plana = self.clave_var.get()
-        clave_cifrada = cifrar_texto(clave_plana)
+        clave_cifrada = _seguridad().cifrar_texto(clave_plana)
         
         datos = {
             "usuario": usuario,
@@ -174,10 +211,18 @@ class SigaeApp:
         threading.Thread(target=self._thread_verificar_update).start()
 
     def _thread_verificar_update(self):
+        update_service = _update_service()
         hay_update, version_remota = update_service.verificar_actualizacion(VERSION_ACTUAL, URL_VERSION)
         if hay_update:
             print(f"¡Actualización disponible! ({version_remota})")
             self.safe_ui_update(lambda: self.mostrar_aviso_update(version_remota))
+            try:
+                print("↻ Descargando la actualización en segundo plano...")
+                lista = update_service.predescargar_actualizacion(URL_API_RELEASE, bot_activo=self.bot_activo)
+                if lista:
+                    print(f"✓ Versión {lista} lista. Se instalará al abrir de nuevo el programa.")
+            except Exception as e:
+                print(f"Nota: No se pudo pre-descargar la actualización: {e}")
         elif version_remota:
             print("El sistema está actualizado.")
 
@@ -185,9 +230,11 @@ class SigaeApp:
         if messagebox.askyesno("Actualización Disponible", 
                                f"Hay una nueva versión disponible ({nueva_version}).\n"
                                f"Tienes la versión {VERSION_ACTUAL}.\n\n"
+                               "Se está descargando en segundo plano y se instalará "
+                               "la próxima vez que abra el programa.\n\n"
                                "¿Deseas ir a la página de descarga ahora?"):
+            # Sin cerrar la app: el cierre forzado cortaría la pre-descarga
             webbrowser.open(URL_DESCARGA)
-            self.on_closing() 
 
     def _configurar_estilos(self):
         style = ttk.Style()
@@ -241,12 +288,13 @@ class SigaeApp:
         if messagebox.askokcancel("Salir", "¿Desea salir de la aplicación?\nSi hay un proceso activo, se detendrá y guardará el respaldo."):
             self.is_closing = True
             print("\n=== CERRANDO APLICACIÓN... GUARDANDO DATOS ===")
+            print(reporte_tiempos_arranque())
             self.stop_event.set()
             self.stop_word_event.set()
             
-            if self.driver:
+            for driver in list(self.drivers):
                 try:
-                    self.driver.quit()
+                    driver.quit()
                 except:
                     pass
             
@@ -344,6 +392,14 @@ class SigaeApp:
         ttk.Radiobutton(f_prog, text="PNF (Pregrado)", variable=self.tipo_programa_var, value="pnf").pack(side='left', padx=(0, 20))
         ttk.Radiobutton(f_prog, text="PNFA (Postgrado)", variable=self.tipo_programa_var, value="pnfa").pack(side='left')
 
+        ttk.Label(lf_files, text="🗃 Salida:").pack(anchor='w')
+        f_salida = ttk.Frame(lf_files); f_salida.pack(fill='x', pady=(0, 10))
+        ttk.Radiobutton(f_salida, text="Un archivo por estudiante", variable=self.modo_salida_word_var, value="individual").pack(side='left', padx=(0, 20))
+        ttk.Radiobutton(f_salida, text="Un solo Word combinado", variable=self.modo_salida_word_var, value="combinado").pack(side='left', padx=(0, 20))
+        ttk.Radiobutton(f_salida, text="Un .zip con todos", variable=self.modo_salida_word_var, value="zip").pack(side='left')
+        ttk.Checkbutton(lf_files, text="Motor rápido (conserva el formato de la plantilla)", variable=self.motor_xml_word_var).pack(anchor='w')
+        ttk.Checkbutton(lf_files, text="Regenerar también los que no cambiaron", variable=self.forzar_word_var).pack(anchor='w')
+
         lf_action = ttk.LabelFrame(container, text="Acciones", padding=15)
         lf_action.pack(fill='x', pady=10)
         
@@ -377,8 +433,9 @@ class SigaeApp:
         f_prog = ttk.Frame(lf_config); f_prog.pack(fill='x', pady=(0, 10))
         ttk.Radiobutton(f_prog, text="PNF (Pregrado)", variable=self.tipo_programa_var, value="pnf").pack(side='left', padx=(0, 20))
         ttk.Radiobutton(f_prog, text="PNFA (Postgrado)", variable=self.tipo_programa_var, value="pnfa").pack(side='left')
+        ttk.Checkbutton(lf_config, text="Procesar PNF y PNFA a la vez (dos navegadores)", variable=self.ambos_programas_var).pack(anchor='w')
         ttk.Checkbutton(lf_config, text="Modo Silencioso (Ocultar Navegador)", variable=self.headless_var).pack(anchor='w', pady=5)
-        
+
         lf_control = ttk.Frame(container, padding=10)
         lf_control.pack(fill='x', pady=10)
         
@@ -400,12 +457,10 @@ class SigaeApp:
     def _thread_login(self):
         driver_login = None
         try:
-            ops = bot_service.Options(); ops.add_argument("--headless")
-            servicio = bot_service.Service(bot_service.ChromeDriverManager().install())
-            driver_login = bot_service.webdriver.Chrome(service=servicio, options=ops)
-            driver_login.get(SIGAE_URL)
+            bot_service = _bot_service()
+            driver_login = bot_service.crear_driver(headless=True)
             bot = bot_service.SigaeBot(driver_login)
-            if bot.login(self.usuario_var.get(), self.clave_var.get()):
+            if bot_service.iniciar_sesion(bot, self.usuario_var.get(), self.clave_var.get()):
                 self.safe_ui_update(self.login_exitoso)
             else:
                 self.safe_ui_update(lambda: self.lbl_status.config(text="❌ Usuario o clave incorrectos", foreground="red"))
@@ -449,12 +504,15 @@ class SigaeApp:
             'ui_update': self.safe_ui_update,
         }
         try:
-            word_service.generar_words_desde_excel(
+            _word_service().generar_words_desde_excel(
                 archivo=self.archivo_excel_word_var.get(),
                 plantilla=self.plantilla_word_var.get(),
                 tipo_programa=self.tipo_programa_var.get(),
                 stop_event=self.stop_word_event,
                 callbacks=callbacks,
+                modo_salida=self.modo_salida_word_var.get(),
+                motor="xml" if self.motor_xml_word_var.get() else "docx",
+                forzar=self.forzar_word_var.get(),
             )
         finally:
             self.safe_ui_update(lambda: self.btn_run_word.config(state='normal'))
@@ -494,38 +552,61 @@ class SigaeApp:
         self.console_text.configure(state='normal')
         self.console_text.delete(1.0, tk.END)
         self.console_text.configure(state='disabled')
+        self._iniciar_panel_vivo()
         
         threading.Thread(
             target=self._thread_bot, 
-            args=(archivo_a_usar, self.plantilla_bot_var.get(), self.headless_var.get(), usar_recuperacion)
+            args=(archivo_a_usar, self._plantilla_bot(), self.headless_var.get(), usar_recuperacion)
         ).start()
 
+    def _plantilla_bot(self):
+        """Plantilla del bot; con ambos programas, un dict con la de cada uno.
+
+        La plantilla elegida se usa para el programa marcado y el otro toma
+        su plantilla por defecto.
+        """
+        plantilla = self.plantilla_bot_var.get()
+        if not plantilla or not self.ambos_programas_var.get():
+            return plantilla
+        plantillas = {'pnf': "plantilla_bajas.docx", 'pnfa': "plantilla_bajas_pnfa.docx"}
+        plantillas[self.tipo_programa_var.get()] = plantilla
+        return plantillas
+
     def detener_bot(self):
         if messagebox.askyesno("Detener", "¿Seguro que desea detener el proceso?\nSe guardará el progreso actual."):
             self.stop_event.set()
             print("\n!!! DETENIENDO PROCESO... Por favor espere a que termine la tarea actual !!!\n")
 
     def _thread_bot(self, archivo, plantilla, headless, es_recuperacion):
+        self.bot_activo.set()
+
         def set_driver(d):
-            self.driver = d
+            if d is None:
+                self.drivers.clear()
+            else:
+                self.drivers.append(d)
 
         callbacks = {
             'messagebox': self.safe_messagebox,
             'set_driver': set_driver,
+            'inicio': lambda total: self.cola_resultados.put(('inicio', total)),
+            'resultado': lambda fila: self.cola_resultados.put(('resultado', fila)),
         }
         try:
-            bot_service.ejecutar_proceso_bot(
+            _bot_service().ejecutar_proceso_bot(
                 archivo=archivo,
                 plantilla=plantilla,
                 headless=headless,
                 es_recuperacion=es_recuperacion,
                 usuario=self.usuario_var.get(),
                 clave=self.clave_var.get(),
-                tipo_programa=self.tipo_programa_var.get(),
+                tipo_programa="ambos" if self.ambos_programas_var.get() else self.tipo_programa_var.get(),
                 stop_event=self.stop_event,
                 callbacks=callbacks,
             )
         finally:
+            self.bot_activo.clear()
+            self.cola_resultados.put(('fin', None))
             self.safe_ui_update(lambda: self.btn_run_bot.config(state='normal'))
             self.safe_ui_update(lambda: self.btn_stop_bot.config(state='disabled'))
 
@@ -551,6 +632,8 @@ class SigaeApp:
         # Pestaña del Gráfico
         self.tab_grafico = ttk.Frame(self.notebook_audit)
         self.notebook_audit.add(self.tab_grafico, text=" 📊 Gráfico de Rendimiento ")
+        self.grafico = GraficoTk(self.tab_grafico)
+        self.grafico.pack(fill='both', expand=True)
 
         # Pestaña de Exitosos
         self.tab_exitosos = ttk.Frame(self.notebook_audit)
@@ -562,6 +645,142 @@ class SigaeApp:
         self.notebook_audit.add(self.tab_fallidos, text=" ❌ Estudiantes Fallidos ")
         self.tree_fallidos = self.crear_treeview(self.tab_fallidos)
 
+        # Pestaña del Cubo (éxitos/fallos por programa, eje, ASIC, causal, día, hora)
+        self.tab_cubo = ttk.Frame(self.notebook_audit)
+        self.notebook_audit.add(self.tab_cubo, text=" 🧮 Desglose ")
+        self.cubo_auditoria = {}
+        f_cubo = ttk.Frame(self.tab_cubo); f_cubo.pack(fill='x', pady=(5, 0))
+        ttk.Label(f_cubo, text="Agrupar:").pack(side='left', padx=(0, 5))
+        self.combo_cubo = ttk.Combobox(f_cubo, textvariable=self.vista_cubo_var, state='readonly', width=25)
+        self.combo_cubo.pack(side='left')
+        self.combo_cubo.bind('<<ComboboxSelected>>', lambda e: self.mostrar_vista_cubo())
+        f_tree_cubo = ttk.Frame(self.tab_cubo); f_tree_cubo.pack(fill='both', expand=True, pady=5)
+        columnas = ('Grupo', 'Total', 'Éxitos', 'Fallos', 'Tasa')
+        self.tree_cubo = ttk.Treeview(f_tree_cubo, columns=columnas, show='headings', height=6)
+        for col, ancho in zip(columnas, (220, 70, 70, 70, 80)):
+            self.tree_cubo.heading(col, text=col)
+            self.tree_cubo.column(col, width=ancho, anchor='w' if col == 'Grupo' else 'center')
+        scroll = ttk.Scrollbar(f_tree_cubo, orient="vertical", command=self.tree_cubo.yview)
+        self.tree_cubo.configure(yscrollcommand=scroll.set)
+        self.tree_cubo.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+        self.grafico_cubo = GraficoTk(self.tab_cubo, height=200)
+        self.grafico_cubo.pack(fill='both', expand=True)
+
+        self._construir_panel_vivo()
+
+    def _construir_panel_vivo(self):
+        """Sub-pestaña que se alimenta de los resultados del bot mientras corre."""
+        self.tab_vivo = ttk.Frame(self.notebook_audit)
+        self.notebook_audit.add(self.tab_vivo, text=" ⏱ En Vivo ")
+        self.lbl_vivo = ttk.Label(self.tab_vivo, text="Sin proceso en curso.", font=('Segoe UI', 10, 'bold'))
+        self.lbl_vivo.pack(anchor='w', pady=5)
+        self.lbl_vivo_ritmo = ttk.Label(self.tab_vivo, text="")
+        self.lbl_vivo_ritmo.pack(anchor='w')
+
+        f_motivos = ttk.Frame(self.tab_vivo); f_motivos.pack(fill='both', expand=True, pady=5)
+        self.tree_motivos = ttk.Treeview(f_motivos, columns=('Motivo', 'Cantidad'), show='headings', height=5)
+        self.tree_motivos.heading('Motivo', text='Motivo del Fallo')
+        self.tree_motivos.heading('Cantidad', text='Cantidad')
+        self.tree_motivos.column('Motivo', width=380)
+        self.tree_motivos.column('Cantidad', width=80, anchor='center')
+        self.tree_motivos.pack(fill='both', expand=True)
+
+    def _iniciar_panel_vivo(self):
+        """Reinicia el panel en vivo y arranca su refresco periódico."""
+        self.vivo = {'total': 0, 'exitos': 0, 'fallos': 0, 'tiempos': deque(maxlen=30)}
+        self.motivos_vivo = Counter()
+        self._items_motivo = {}
+        for tree in (self.tree_exitosos, self.tree_fallidos, self.tree_motivos):
+            tree.delete(*tree.get_children())
+        while not self.cola_resultados.empty():
+            self.cola_resultados.get_nowait()
+        self.lbl_vivo.config(text="⏳ Iniciando proceso...")
+        self.lbl_vivo_ritmo.config(text="")
+        # Cada corrida tiene su propio ciclo de refresco; uno viejo se detiene solo
+        self._corrida_vivo = getattr(self, '_corrida_vivo', 0) + 1
+        self.root.after(INTERVALO_PANEL_MS, self._refrescar_panel_vivo, self._corrida_vivo)
+
+    def _refrescar_panel_vivo(self, corrida):
+        """Aplica solo los resultados nuevos de la cola y reprograma el refresco."""
+        if corrida != self._corrida_vivo:
+            return
+        terminado = False
+        nuevos = 0
+        while True:
+            try:
+                tipo, dato = self.cola_resultados.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == 'inicio':
+                self.vivo['total'] = dato
+            elif tipo == 'resultado':
+                self._aplicar_resultado_vivo(dato)
+                nuevos += 1
+            elif tipo == 'fin':
+                terminado = True
+
+        if nuevos or terminado:
+            self._actualizar_resumen_vivo(terminado)
+        if not terminado and not self.is_closing:
+            self.root.after(INTERVALO_PANEL_MS, self._refrescar_panel_vivo, corrida)
+
+    def _aplicar_resultado_vivo(self, fila):
+        """Agrega una fila del bot a las tablas y al desglose de motivos."""
+        self.vivo['tiempos'].append(time.perf_counter())
+        nombre = f"{fila.get('NOMBRES', '')} {fila.get('APELLIDO 1', '')}".strip()
+        pnf = fila.get('PNF', fila.get('PNFA', ''))
+        valores = (fila.get('CÉDULA', ''), nombre, pnf, fila.get('NOTA_SISTEMA', ''))
+        if fila.get('ESTADO_BOT') == 'EXITO':
+            self.vivo['exitos'] += 1
+            self.tree_exitosos.insert('', 'end', values=valores)
+            return
+
+        self.vivo['fallos'] += 1
+        self.tree_fallidos.insert('', 'end', values=valores)
+        motivo = fila.get('NOTA_SISTEMA', '') or '(sin nota)'
+        self.motivos_vivo[motivo] += 1
+        if motivo in self._items_motivo:
+            self.tree_motivos.set(self._items_motivo[motivo], 'Cantidad', self.motivos_vivo[motivo])
+        else:
+            self._items_motivo[motivo] = self.tree_motivos.insert('', 'end', values=(motivo, 1))
+
+    def _actualizar_resumen_vivo(self, terminado=False):
+        """Contadores, registros por minuto (últimos 30) y tiempo restante estimado."""
+        hechos = self.vivo['exitos'] + self.vivo['fallos']
+        total = self.vivo['total'] or hechos
+        estado = "🏁 Finalizado" if terminado else "🔴 En curso"
+        self.lbl_vivo.config(text=f"{estado}: {hechos}/{total} procesados   ✅ {self.vivo['exitos']}   ❌ {self.vivo['fallos']}")
+        self.dibujar_grafico(self.vivo['exitos'], self.vivo['fallos'])
+
+        tiempos = self.vivo['tiempos']
+        if len(tiempos) < 2 or tiempos[-1] == tiempos[0]:
+            return
+        por_minuto = (len(tiempos) - 1) / (tiempos[-1] - tiempos[0]) * 60
+        texto = f"Ritmo: {por_minuto:.1f} registros/min"
+        if not terminado and total > hechos:
+            segundos = int((total - hechos) / por_minuto * 60)
+            texto += f"   |   Tiempo restante estimado: {segundos // 3600}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+        self.lbl_vivo_ritmo.config(text=texto)
+
+    def mostrar_vista_cubo(self):
+        """Muestra en la tabla del desglose la vista elegida en el combo."""
+        vista = self.vista_cubo_var.get()
+        tabla = self.cubo_auditoria.get(vista)
+        self.tree_cubo.delete(*self.tree_cubo.get_children())
+        if tabla is None:
+            self.grafico_cubo.mensaje("Sin datos para graficar")
+            return
+        for fila in tabla.itertuples(index=False):
+            grupo, total, exitos, fallos, tasa = fila
+            self.tree_cubo.insert('', 'end', values=(grupo or "(vacío)", total, exitos, fallos, f"{tasa:.1f}%"))
+
+        grupos = tabla.iloc[:, 0].tolist()
+        if vista in ('Por Día', 'Por Hora'):
+            self.grafico_cubo.serie(grupos, tabla['Total'].tolist())
+        else:
+            self.grafico_cubo.barras(grupos, tabla['Éxitos'].tolist(), tabla['Fallos'].tolist())
+
     def crear_treeview(self, parent):
         """Crea una tabla bonita para mostrar estudiantes"""
         columnas = ('Cédula', 'Nombre Completo', 'PNF', 'Nota del Sistema')
@@ -585,25 +804,11 @@ class SigaeApp:
         return tree
 
     def dibujar_grafico(self, cant_exitos, cant_fallos):
-        """Dibuja un gráfico de torta en la interfaz"""
-        for widget in self.tab_grafico.winfo_children():
-            widget.destroy() # Limpia gráfico anterior
-            
-        fig, ax = plt.subplots(figsize=(4, 3), facecolor='#f0f0f0')
+        """Dibuja (o actualiza en el lugar) la torta de éxitos y fallos."""
         if cant_exitos == 0 and cant_fallos == 0:
+            self.grafico.mensaje("Sin datos para graficar")
             return
-
-        etiquetas = [f'Exitosos: {cant_exitos}', f'Fallidos: {cant_fallos}']
-        valores = [cant_exitos, cant_fallos]
-        colores = ['#28a745', '#dc3545'] # Verde y Rojo
-        
-        ax.pie(valores, labels=etiquetas, colors=colores, autopct='%1.1f%%', startangle=140, 
-               textprops={'fontsize': 10, 'weight': 'bold'})
-        ax.axis('equal') 
-        
-        canvas = FigureCanvasTkAgg(fig, master=self.tab_grafico)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.grafico.torta([cant_exitos, cant_fallos], ['Exitosos', 'Fallidos'], [COLOR_EXITO, COLOR_FALLO])
 
     def ejecutar_auditoria(self):
         archivo = self.archivo_auditoria_var.get()
@@ -616,93 +821,51 @@ class SigaeApp:
         self.console_text.configure(state='disabled')
         
         print("=== GENERANDO DASHBOARD ANALÍTICO ===")
-        auditor = AuditorSIGAE()
-        
-        exito, datos = auditor.generar_auditoria(archivo)
-        
-        if exito and datos:
-            df_exito = datos['exitosos']
-            df_fallo = datos['fallidos']
-            
-            # Detectar columna PNF o PNFA
-            col_pnf = 'PNF' if 'PNF' in df_exito.columns else ('PNFA' if 'PNFA' in df_exito.columns else None)
-            
-            # Poblar la tabla de Exitosos
-            self.tree_exitosos.delete(*self.tree_exitosos.get_children())
-            for _, row in df_exito.iterrows():
-                nombre = str(row.get('NOMBRES', '')) + " " + str(row.get('APELLIDO 1', ''))
-                pnf = str(row.get(col_pnf, '')) if col_pnf else ''
-                if pnf == 'nan': pnf = ''
-                self.tree_exitosos.insert('', 'end', values=(row.get('CÉDULA', ''), nombre.strip(), pnf, row.get('NOTA_SISTEMA', '')))
-                
-            # Poblar la tabla de Fallidos
-            self.tree_fallidos.delete(*self.tree_fallidos.get_children())
-            for _, row in df_fallo.iterrows():
-                nombre = str(row.get('NOMBRES', '')) + " " + str(row.get('APELLIDO 1', ''))
-                pnf = str(row.get(col_pnf, '')) if col_pnf else ''
-                if pnf == 'nan': pnf = ''
-                self.tree_fallidos.insert('', 'end', values=(row.get('CÉDULA', ''), nombre.strip(), pnf, row.get('NOTA_SISTEMA', '')))
-                
-            # Dibujar el gráfico!
-            self.dibujar_grafico(len(df_exito), len(df_fallo))
-            
-            self.safe_messagebox("info", "Dashboard Listo", "Gráficos y tablas generadas con éxito.")
+        self.btn_run_auditoria.config(state='disabled')
+        threading.Thread(target=self._thread_auditoria, args=(archivo,), daemon=True).start()
 
-if __name__ == "__main__":
-    # ── Splash de carga (se muestra al instante) ──
-    splash = tk.Tk()
-    splash.title("Cargando...")
-    splash.overrideredirect(True)
-    splash.configure(bg="#f0f0f0")
-    sw, sh = 380, 140
-    sx = (splash.winfo_screenwidth() - sw) // 2
-    sy = (splash.winfo_screenheight() - sh) // 2
-    splash.geometry(f"{sw}x{sh}+{sx}+{sy}")
-    splash.attributes("-topmost", True)
-
-    header_sp = tk.Frame(splash, bg="#0078d7", height=45)
-    header_sp.pack(fill="x")
-    header_sp.pack_propagate(False)
-    tk.Label(header_sp, text="Gestor de Bajas y Notificaciones SIGAE",
-             bg="#0078d7", fg="white", font=("Segoe UI", 11, "bold")).pack(expand=True)
-
-    lbl_sp = tk.Label(splash, text="Cargando módulos, por favor espere...",
-                      bg="#f0f0f0", fg="#666", font=("Segoe UI", 9))
-    lbl_sp.pack(pady=(15, 8))
-
-    style_sp = ttk.Style(splash)
-    style_sp.theme_use("clam")
-    style_sp.configure("Splash.Horizontal.TProgressbar",
-                       troughcolor="#d0d0d0", background="#0078d7",
-                       bordercolor="#ccc", thickness=10)
-    pb = ttk.Progressbar(splash, mode="indeterminate",
-                         style="Splash.Horizontal.TProgressbar", length=320)
-    pb.pack(pady=(0, 10))
-    pb.start(15)
-
-    splash.update()
-
-    # Cargar dependencias pesadas en hilo separado
-    carga_ok = threading.Event()
-
-    def _cargar():
-        _importar_dependencias()
-        carga_ok.set()
-
-    threading.Thread(target=_cargar, daemon=True).start()
-
-    # Esperar a que termine, manteniendo el splash vivo
-    def _verificar_carga():
-        if carga_ok.is_set():
-            pb.stop()
-            splash.destroy()
-        else:
-            splash.after(100, _verificar_carga)
+    def _thread_auditoria(self, archivo):
+        """Carga pandas/auditoria y procesa el reporte fuera del hilo de Tk."""
+        try:
+            exito, datos = _auditor()().generar_auditoria(archivo)
+            if exito and datos:
+                _importar("registros")
+                self.safe_ui_update(self._mostrar_auditoria, datos)
+        except Exception as e:
+            print(f"Error generando la auditoría: {e}")
+        finally:
+            self.safe_ui_update(lambda: self.btn_run_auditoria.config(state='normal'))
 
-    _verificar_carga()
-    splash.mainloop()
+    def _mostrar_auditoria(self, datos):
+        df_exito = datos['exitosos']
+        df_fallo = datos['fallidos']
 
-    # ── Iniciar la aplicación principal ──
+        # Detectar columna PNF o PNFA
+        col_pnf = 'PNF' if 'PNF' in df_exito.columns else ('PNFA' if 'PNFA' in df_exito.columns else None)
+
+        # Poblar las tablas de Exitosos y Fallidos (datos ya normalizados)
+        iterar_registros = _importar("registros").iterar_registros
+        for tree, df in ((self.tree_exitosos, df_exito), (self.tree_fallidos, df_fallo)):
+            tree.delete(*tree.get_children())
+            for registro in iterar_registros(df):
+                nombre = f"{registro.get('NOMBRES')} {registro.get('APELLIDO 1')}"
+                pnf = registro.get(col_pnf) if col_pnf else ''
+                tree.insert('', 'end', values=(registro.cedula, nombre.strip(), pnf, registro.get('NOTA_SISTEMA')))
+
+        # Desglose por dimensiones
+        self.cubo_auditoria = datos.get('cubo', {})
+        vistas = list(self.cubo_auditoria)
+        self.combo_cubo.configure(values=vistas)
+        if self.vista_cubo_var.get() not in vistas:
+            self.vista_cubo_var.set(vistas[0] if vistas else "")
+        self.mostrar_vista_cubo()
+
+        # Dibujar el gráfico!
+        self.dibujar_grafico(len(df_exito), len(df_fallo))
+
+        self.safe_messagebox("info", "Dashboard Listo", "Gráficos y tablas generadas con éxito.")
+
+if __name__ == "__main__":
     root = tk.Tk()
     app = SigaeApp(root)
     root.mainloop()
@@ -1,23 +1,26 @@
 """
 launcher.py — Auto-Updater Launcher para Gestor de Bajas y Notificaciones SIGAE
 Requisitos: solo biblioteca estándar de Python + tkinter + packaging
+           (+ services.update_service, que también es solo biblioteca estándar)
 PROHIBIDO importar: selenium, pandas, matplotlib
 """
 
 import os
 import sys
-import json
 import threading
 import subprocess
-import urllib.request
-import urllib.error
-import zipfile
-import tempfile
-import shutil
 import tkinter as tk
 from tkinter import ttk
 from packaging import version
 
+from services.update_service import (
+    consultar_version_remota,
+    obtener_url_descarga,
+    descargar_reanudable,
+    extraer_zip_incremental,
+    aplicar_actualizacion_preparada,
+)
+
 # ─────────────────────────────────────────────
 #  CONFIGURACIÓN CENTRAL
 # ─────────────────────────────────────────────
@@ -65,59 +68,15 @@ def guardar_version_local(nueva_version: str) -> None:
 
 
 def obtener_version_remota() -> str | None:
-    """Descarga y retorna la versión remota, o None si falla."""
-    try:
-        req = urllib.request.Request(
-            URL_VERSION_REMOTA,
-            headers={"User-Agent": "SIGAE-Launcher/1.0"},
-        )
-        with urllib.request.urlopen(req, timeout=TIMEOUT_HTTP) as resp:
-            return resp.read().decode("utf-8").strip()
-    except Exception:
-        return None
-
-
-def obtener_url_descarga() -> tuple[str, str, str] | tuple[None, None, None]:
     """
-    Consulta la API de GitHub para obtener el asset del último release.
-    Prioridad: .exe > .zip > primero disponible.
-    Retorna (url_descarga, tag_version, nombre_archivo) o (None, None, None) si falla.
+    Retorna la versión remota, o None si falla. Usa la caché compartida con la
+    aplicación (cache_version.json), así que la app no repite la consulta.
     """
     try:
-        req = urllib.request.Request(
-            URL_API_RELEASE,
-            headers={
-                "User-Agent": "SIGAE-Launcher/1.0",
-                "Accept": "application/vnd.github+json",
-            },
-        )
-        with urllib.request.urlopen(req, timeout=TIMEOUT_HTTP) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-
-        tag = data.get("tag_name", "").lstrip("v")
-        assets = data.get("assets", [])
-
-        # 1) Preferir asset .exe directo
-        for asset in assets:
-            nombre = asset.get("name", "")
-            if nombre.endswith(".exe"):
-                return asset["browser_download_url"], tag, nombre
-
-        # 2) Aceptar .zip (se extrae el .exe dentro)
-        for asset in assets:
-            nombre = asset.get("name", "")
-            if nombre.endswith(".zip"):
-                return asset["browser_download_url"], tag, nombre
-
-        # 3) Primer asset disponible
-        if assets:
-            nombre = assets[0].get("name", "asset")
-            return assets[0]["browser_download_url"], tag, nombre
-
-        return None, None, None
-
+        return consultar_version_remota(URL_VERSION_REMOTA, _directorio_base())
     except Exception:
-        return None, None, None
+        return None
+
 
 
 def lanzar_aplicacion() -> None:
@@ -136,6 +95,7 @@ def lanzar_aplicacion() -> None:
                 break
 
 
+
 # ─────────────────────────────────────────────
 #  INTERFAZ GRÁFICA
 # ─────────────────────────────────────────────
@@ -265,16 +225,32 @@ class LauncherUI:
 def flujo_actualizacion(ui: LauncherUI) -> None:
     """
     Hilo principal del launcher:
+    0. Aplica la actualización que la app dejó pre-descargada (si existe)
     1. Verifica versión remota
     2. Descarga si hay actualización
     3. Lanza la aplicación y cierra el launcher
     """
     try:
+        version_local   = leer_version_local()
+        nombre_launcher = os.path.basename(sys.executable).lower()
+
+        # ── 0. Actualización pre-descargada ──
+        preparada = aplicar_actualizacion_preparada(
+            _directorio_base(), EXE_NAME, version_local, omitir=(nombre_launcher,)
+        )
+        if preparada:
+            guardar_version_local(preparada)
+            ui.set_version(preparada)
+            ui.set_estado(f"¡Actualizado a v{preparada}! Iniciando...")
+            ui.set_progreso(100)
+            lanzar_aplicacion()
+            ui.cerrar()
+            return
+
         # ── 1. Verificar versión ──────────────
         ui.set_modo_indeterminado()
         ui.set_estado("Buscando actualizaciones...")
 
-        version_local  = leer_version_local()
         version_remota = obtener_version_remota()
 
         ui.set_modo_determinado()
@@ -284,7 +260,6 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
             # Sin internet → modo offline
             ui.set_estado("Sin conexión — iniciando en modo offline...")
             ui.set_progreso(100)
-            import time; time.sleep(1.5)
             lanzar_aplicacion()
             ui.cerrar()
             return
@@ -295,7 +270,6 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
             # Ya es la última versión
             ui.set_estado(f"Ya tienes la última versión ({version_local}) ✓")
             ui.set_progreso(100)
-            import time; time.sleep(1.2)
             lanzar_aplicacion()
             ui.cerrar()
             return
@@ -304,12 +278,11 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
         ui.set_estado(f"Descargando versión {version_remota}...")
         ui.set_progreso(15)
 
-        url_descarga, tag_version, nombre_asset = obtener_url_descarga()
+        url_descarga, tag_version, nombre_asset, sha256 = obtener_url_descarga(URL_API_RELEASE)
 
         if url_descarga is None:
             ui.set_estado("No se encontró release — iniciando versión actual...")
             ui.set_progreso(100)
-            import time; time.sleep(1.5)
             lanzar_aplicacion()
             ui.cerrar()
             return
@@ -319,39 +292,37 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
         extension    = ".zip" if es_zip else ".tmp"
         ruta_tmp     = ruta_destino + extension
 
-        def _reporthook(bloque, tam_bloque, tam_total):
+        ultimo_mb = [-1]
+
+        def _progreso(descargado, tam_total):
             if tam_total > 0:
-                porcentaje = 15 + (bloque * tam_bloque / tam_total) * 80
+                mb_descargado = descargado // (1024 * 1024)
+                if mb_descargado == ultimo_mb[0]:
+                    return
+                ultimo_mb[0] = mb_descargado
+                porcentaje = 15 + (descargado / tam_total) * 80
                 ui.set_progreso(min(porcentaje, 95))
-                mb_descargado = min(bloque * tam_bloque, tam_total) // (1024 * 1024)
                 mb_total      = tam_total // (1024 * 1024)
                 ui.set_estado(
                     f"Descargando {version_remota} — {mb_descargado} MB / {mb_total} MB"
                 )
 
-        urllib.request.urlretrieve(url_descarga, ruta_tmp, _reporthook)
+        descargar_reanudable(url_descarga, ruta_tmp, sha256=sha256, progreso=_progreso)
 
         # Si es ZIP: extraer TODO el contenido al directorio de la app
         if es_zip:
             ui.set_estado("Descomprimiendo actualización...")
-            dir_base = _directorio_base()
-            nombre_launcher = os.path.basename(sys.executable).lower()
-
-            with zipfile.ZipFile(ruta_tmp, "r") as zf:
-                entradas = zf.infolist()
-                total    = len(entradas)
-
-                for i, entrada in enumerate(entradas, start=1):
-                    # Nunca sobreescribir el propio launcher
-                    nombre_entrada = os.path.basename(entrada.filename).lower()
-                    if nombre_entrada and nombre_entrada == nombre_launcher:
-                        continue
-
-                    zf.extract(entrada, dir_base)
 
-                    # Actualizar progreso durante la extracción (95→98)
-                    progreso_extraccion = 95 + (i / total) * 3
-                    ui.set_progreso(min(progreso_extraccion, 98))
+            # Nunca sobreescribir el propio launcher; progreso 95→98
+            escritos, sin_cambios = extraer_zip_incremental(
+                ruta_tmp,
+                _directorio_base(),
+                omitir=(nombre_launcher,),
+                progreso=lambda f: ui.set_progreso(min(95 + f * 3, 98)),
+            )
+            ui.set_estado(
+                f"Actualizados {escritos} archivos ({sin_cambios} sin cambios)"
+            )
 
             os.remove(ruta_tmp)
         else:
@@ -370,7 +341,6 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
         ui.set_estado(f"¡Actualizado a v{nueva_ver}! Iniciando...")
         ui.set_progreso(100)
 
-        import time; time.sleep(1.0)
         lanzar_aplicacion()
         ui.cerrar()
 
@@ -382,7 +352,6 @@ def flujo_actualizacion(ui: LauncherUI) -> None:
             pass
         ui.set_estado(f"Error: {exc} — iniciando de todos modos...")
         ui.set_progreso(100)
-        import time; time.sleep(2.0)
         lanzar_aplicacion()
         ui.cerrar()
 
@@ -0,0 +1,75 @@
+"""Manifiesto de notificaciones ya generadas, para no rehacerlas.
+
+Cada cédula guarda la huella de la plantilla, la huella de los datos que
+entran en el documento (los reemplazos de la plantilla), el motor usado, la
+carpeta de destino (Notificaciones/AAAA/MM) y la ruta del .docx. Si al volver
+a correr el generador nada de eso cambió y el archivo sigue existiendo, la
+fila se omite; solo se rehacen las filas nuevas o corregidas, y todas al
+cambiar de mes.
+"""
+import os
+import json
+import hashlib
+from generar_notificacion import construir_reemplazos
+from config import ARCHIVO_MANIFIESTO
+
+
+def huella_archivo(ruta):
+    """SHA-256 del contenido de un archivo (p. ej. la plantilla)."""
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def huella_datos(datos):
+    """SHA-256 de los valores que realmente se escriben en el documento."""
+    texto = json.dumps(construir_reemplazos(datos), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class ManifiestoNotificaciones:
+    """Índice cédula -> documento generado, persistido en JSON."""
+
+    def __init__(self, archivo=ARCHIVO_MANIFIESTO):
+        self.archivo = archivo
+        self.entradas = {}
+        self._cambios = False
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, "r", encoding="utf-8") as f:
+                    self.entradas = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"    ⚠ Manifiesto ilegible, se regenerará: {e}")
+
+    def vigente(self, cedula, plantilla, datos, motor, carpeta):
+        """Ruta del documento existente si sigue al día; None si hay que generarlo."""
+        entrada = self.entradas.get(cedula)
+        if not entrada:
+            return None
+        if (entrada.get("plantilla") != plantilla or entrada.get("datos") != datos
+                or entrada.get("motor") != motor
+                or entrada.get("carpeta") != os.path.normpath(carpeta)):
+            return None
+        ruta = entrada.get("ruta")
+        return ruta if ruta and os.path.exists(ruta) else None
+
+    def registrar(self, cedula, plantilla, datos, motor, carpeta, ruta):
+        self.entradas[cedula] = {"plantilla": plantilla, "datos": datos, "motor": motor,
+                                 "carpeta": os.path.normpath(carpeta), "ruta": ruta}
+        self._cambios = True
+
+    def guardar(self):
+        """Escribe el manifiesto (vía archivo temporal) si hubo cambios."""
+        if not self._cambios:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.archivo) or ".", exist_ok=True)
+            temporal = self.archivo + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.entradas, f, indent=1, ensure_ascii=False)
+            os.replace(temporal, self.archivo)
+            self._cambios = False
+        except OSError as e:
+            print(f"    ⚠ No se pudo guardar el manifiesto: {e}")
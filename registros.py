@@ -0,0 +1,106 @@
+"""Normalización única de los listados Excel y registro compacto por estudiante.
+
+Toda hoja leída por el bot, el generador Word o la auditoría pasa una sola vez
+por ``normalizar_dataframe``: fechas a dd/mm/aaaa, cédulas sin '.0', NaN a ""
+y columnas de pocos valores (PNF, EJE, ASIC, ...) como categóricas. Después
+cada fila viaja como un ``Registro`` con los valores ya limpios, en lugar de
+repetir ``str()``, chequeos de 'nan' y conversiones de fecha en cada paso.
+"""
+from datetime import datetime
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_float_dtype
+
+COLUMNAS_CATEGORICAS = ('PNF', 'PNFA', 'EJE', 'ASIC', 'CAUSAL', 'HOSPITAL SEDE')
+COLUMNAS_FECHA = ('FECHA', 'FECHA CABES', 'FECHA TRAMITE', 'FECHA SOLICITUD')
+CAUSAL_POR_DEFECTO = 'DESINCORPORACION POR MOTIVOS PERSONALES'
+
+
+def limpiar_cedulas(serie):
+    """'12345678.0' -> '12345678', espacios fuera, vacíos como ""."""
+    texto = serie.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return texto.where(serie.notna() & (texto.str.lower() != 'nan'), "")
+
+
+def _formatear_fechas(serie):
+    """Fechas (datetime o texto día/mes) a 'dd/mm/aaaa'; lo no interpretable queda igual."""
+    if is_datetime64_any_dtype(serie):
+        fechas = serie
+    else:
+        fechas = pd.to_datetime(serie, dayfirst=True, errors='coerce', format='mixed')
+    original = serie.astype(str).where(serie.notna(), "")
+    return fechas.dt.strftime("%d/%m/%Y").where(fechas.notna(), original)
+
+
+def _a_texto(serie):
+    """NaN -> "", enteros guardados como float (87.0) sin decimales, resto como str."""
+    if is_float_dtype(serie):
+        enteros = serie.dropna()
+        if (enteros == enteros.round()).all():
+            serie = serie.astype('Int64')
+    texto = serie.astype(str).str.replace(r'^(\d{4}-\d{2}-\d{2}) 00:00:00$', r'\1', regex=True)
+    return texto.where(serie.notna(), "")
+
+
+def normalizar_dataframe(df):
+    """Limpia un listado en una sola pasada vectorizada y lo devuelve."""
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+
+    for columna in df.columns:
+        serie = df[columna]
+        if columna == 'CÉDULA':
+            df[columna] = limpiar_cedulas(serie)
+        elif columna in COLUMNAS_FECHA or is_datetime64_any_dtype(serie):
+            df[columna] = _formatear_fechas(serie)
+        else:
+            df[columna] = _a_texto(serie)
+
+        if columna in COLUMNAS_CATEGORICAS:
+            df[columna] = df[columna].str.strip().astype('category')
+    return df
+
+
+class Registro:
+    """Un estudiante del listado, con sus valores ya normalizados (texto)."""
+
+    __slots__ = ('indice', 'cedula', 'causal', 'datos')
+
+    def __init__(self, indice, datos):
+        self.indice = indice
+        self.datos = datos
+        self.cedula = datos.get('CÉDULA', '') or 'SN'
+        self.causal = datos.get('CAUSAL') or datos.get('MOTIVO') or ''
+
+    def get(self, columna, defecto=""):
+        return self.datos.get(columna, defecto)
+
+    def para_word(self, causal_por_defecto=""):
+        """Datos para la plantilla de notificación (incluye las claves auxiliares).
+
+        ``causal_por_defecto`` se usa solo si la fila no trae CAUSAL ni MOTIVO.
+        """
+        causal = self.causal or causal_por_defecto
+        datos = dict(self.datos)
+        datos.update({
+            'cedula': self.cedula,
+            'fecha': self.datos.get('FECHA', ''),
+            'causal': causal,
+            'CAUSAL': causal,
+        })
+        return datos
+
+    def fila_resultado(self, exito, nota):
+        """Fila del reporte final del bot para este estudiante."""
+        fila = dict(self.datos)
+        fila.update({
+            "ESTADO_BOT": "EXITO" if exito else "FALLO",
+            "NOTA_SISTEMA": nota,
+            "FECHA_PROCESO": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        })
+        return fila
+
+
+def iterar_registros(df):
+    """Recorre el DataFrame normalizado como Registro (sin iterrows)."""
+    for indice, datos in zip(df.index, df.to_dict('records')):
+        yield Registro(indice, datos)
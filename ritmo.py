@@ -0,0 +1,129 @@
+"""Control adaptativo del ritmo del bot según cómo responde SIGAE.
+
+Mide la latencia de las cargas de página (promedio y variación suavizados,
+como el RTO de TCP) y la tasa de errores técnicos. Con eso:
+
+* alarga los timeouts de las esperas cuando SIGAE va lento (``timeout(base)``),
+* ajusta la pausa entre estudiantes (``pausa()``): se reduce mientras SIGAE
+  va bien y se duplica cuando sube la latencia o los errores.
+
+Lo aprendido se guarda por hora del día en ``ARCHIVO_RITMO``, así la próxima
+corrida a la misma hora arranca con valores realistas.
+"""
+import os
+import json
+import threading
+from datetime import datetime
+from config import ARCHIVO_RITMO
+
+ALFA = 0.125            # peso de cada muestra en la latencia promedio
+BETA = 0.25             # peso de cada muestra en la variación
+ALFA_ERROR = 0.2        # peso de cada resultado en la tasa de error
+PAUSA_MIN = 0.0
+PAUSA_MAX = 10.0
+UMBRAL_ERROR_ALTO = 0.2
+FACTOR_SOBRECARGA = 2.0  # latencia > 2x la mejor observada = SIGAE saturado
+
+
+class ControladorRitmo:
+    """Aprende la latencia de SIGAE y decide pausas, timeouts y concurrencia."""
+
+    def __init__(self, archivo=ARCHIVO_RITMO):
+        self.archivo = archivo
+        self.hora = f"{datetime.now().hour:02d}"
+        self.latencia = None        # segundos, promedio suavizado
+        self.variacion = 0.0
+        self.latencia_base = None   # mejor latencia promedio vista
+        self.tasa_error = 0.0
+        self._pausa = 1.0
+        self._lock = threading.Lock()
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.archivo):
+            return
+        try:
+            with open(self.archivo, "r", encoding="utf-8") as f:
+                datos = json.load(f).get(self.hora)
+        except (OSError, ValueError):
+            return
+        if datos:
+            self.latencia = datos.get("latencia")
+            self.variacion = datos.get("variacion", 0.0)
+            self.latencia_base = datos.get("latencia_base")
+            self._pausa = datos.get("pausa", self._pausa)
+            print(f"    ⏱ Ritmo aprendido para las {self.hora}h: latencia {self.latencia:.2f}s, pausa {self._pausa:.2f}s")
+
+    def guardar(self):
+        """Guarda el estado actual en el tramo horario de esta corrida."""
+        if self.latencia is None:
+            return
+        try:
+            datos = {}
+            if os.path.exists(self.archivo):
+                with open(self.archivo, "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+            datos[self.hora] = {
+                "latencia": round(self.latencia, 3),
+                "variacion": round(self.variacion, 3),
+                # Sin ninguna carga exitosa no hay línea base que recordar
+                "latencia_base": round(self.latencia_base, 3) if self.latencia_base is not None else None,
+                "pausa": round(self._pausa, 3),
+            }
+            with open(self.archivo, "w", encoding="utf-8") as f:
+                json.dump(datos, f, indent=4)
+        except (OSError, ValueError) as e:
+            print(f"    ⚠ No se pudo guardar el ritmo aprendido: {e}")
+
+    # --- MEDICIONES ---
+    def registrar_latencia(self, segundos, exito=True):
+        """Registra cuánto tardó SIGAE en responder a una carga o envío."""
+        with self._lock:
+            if self.latencia is None:
+                self.latencia = segundos
+                self.variacion = segundos / 2
+            else:
+                self.variacion = (1 - BETA) * self.variacion + BETA * abs(segundos - self.latencia)
+                self.latencia = (1 - ALFA) * self.latencia + ALFA * segundos
+            if exito and (self.latencia_base is None or self.latencia < self.latencia_base):
+                self.latencia_base = self.latencia
+            if not exito:
+                self.tasa_error = (1 - ALFA_ERROR) * self.tasa_error + ALFA_ERROR
+
+    def registrar_resultado(self, error_tecnico):
+        """Registra el cierre de un estudiante y ajusta la pausa entre registros."""
+        with self._lock:
+            muestra = 1.0 if error_tecnico else 0.0
+            self.tasa_error = (1 - ALFA_ERROR) * self.tasa_error + ALFA_ERROR * muestra
+            if self.sobrecargado():
+                self._pausa = min(PAUSA_MAX, max(self._pausa * 2, 0.5))
+            else:
+                self._pausa = max(PAUSA_MIN, self._pausa * 0.7)
+                if self._pausa < 0.05:
+                    self._pausa = 0.0
+
+    # --- DECISIONES ---
+    def sobrecargado(self):
+        """True si SIGAE responde lento o con errores respecto a lo habitual."""
+        if self.tasa_error > UMBRAL_ERROR_ALTO:
+            return True
+        if self.latencia is None or not self.latencia_base:
+            return False
+        return self.latencia > self.latencia_base * FACTOR_SOBRECARGA
+
+    def pausa(self):
+        """Segundos a esperar antes del siguiente estudiante."""
+        return self._pausa
+
+    def timeout(self, base):
+        """Timeout para una espera cuyo valor fijo original era ``base``.
+
+        Sin mediciones devuelve ``base``; luego usa latencia + 4x variación,
+        acotado entre el original y su doble. Nunca baja de ``base``: las
+        esperas de Select2, datepicker o AJAX no siguen la latencia de carga
+        de página, y acortarlas daría timeouts falsos con respuestas lentas.
+        """
+        if self.latencia is None:
+            return base
+        calculado = self.latencia + 4 * self.variacion
+        return max(base, min(base * 2, calculado))
@@ -1,8 +1,14 @@
 import os
-from cryptography.fernet import Fernet
+import json
+import threading
+from cryptography.fernet import Fernet, InvalidToken
 
 ARCHIVO_LLAVE = "secret.key"
 
+# Instancia única de Fernet: secret.key se lee una sola vez por proceso
+_fernet = None
+_lock_fernet = threading.Lock()
+
 def obtener_o_crear_llave():
     """Obtiene la llave existente o crea una nueva si no existe."""
     if not os.path.exists(ARCHIVO_LLAVE):
@@ -14,18 +20,36 @@ def obtener_o_crear_llave():
             llave = archivo_llave.read()
     return llave
 
+def _obtener_fernet():
+    """Devuelve el Fernet en memoria, creándolo la primera vez."""
+    global _fernet
+    if _fernet is None:
+        with _lock_fernet:
+            if _fernet is None:
+                _fernet = Fernet(obtener_o_crear_llave())
+    return _fernet
+
 def cifrar_texto(texto):
     """Cifra un texto plano."""
     if not texto: return ""
-    f = Fernet(obtener_o_crear_llave())
-    return f.encrypt(texto.encode()).decode()
+    return _obtener_fernet().encrypt(texto.encode()).decode()
 
 def descifrar_texto(texto_cifrado):
     """Descifra un texto cifrado. Retorna el mismo texto si falla."""
     if not texto_cifrado: return ""
     try:
-        f = Fernet(obtener_o_crear_llave())
-        return f.decrypt(texto_cifrado.encode()).decode()
+        return _obtener_fernet().decrypt(texto_cifrado.encode()).decode()
     except Exception:
         # Si falla el descifrado (ej. era una contraseña plana antigua), retorna la original
-        return texto_cifrado
\ No newline at end of file
+        return texto_cifrado
+
+def cifrar_json(datos):
+    """Serializa y cifra un objeto JSON. Retorna bytes listos para guardar."""
+    return _obtener_fernet().encrypt(json.dumps(datos).encode())
+
+def descifrar_json(contenido):
+    """Descifra lo producido por cifrar_json. Retorna None si no es válido."""
+    try:
+        return json.loads(_obtener_fernet().decrypt(contenido).decode())
+    except (InvalidToken, ValueError, TypeError):
+        return None
\ No newline at end of file
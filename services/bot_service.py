@@ -1,6 +1,7 @@
 """Servicio de ejecución del bot de bajas SIGAE."""
 import os
 import time
+import threading
 import pandas as pd
 from datetime import datetime
 from selenium import webdriver
@@ -8,146 +9,255 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from sigae_bot import SigaeBot
+from ritmo import ControladorRitmo
+from trazador import TrazadorComandos
+from grabacion import GrabadorSigae
+from registros import iterar_registros
+from cache_excel import leer_excel_normalizado
 from generar_notificacion import generar_notificacion_baja_word
-from config import SIGAE_URL, ARCHIVO_RECUPERACION, carpeta_con_fecha
+from config import ARCHIVO_RECUPERACION, HOJAS_PROGRAMA, carpeta_con_fecha
+from services.sesion_service import iniciar_sesion
+
+
+def crear_driver(headless):
+    """Inicia Chrome con las opciones usadas por el bot.
+
+    Args:
+        headless: bool, ejecutar Chrome sin ventana.
+    """
+    ops = Options()
+    ops.add_argument("--start-maximized")
+    if headless:
+        ops.add_argument("--headless")
+
+    servicio = Service(ChromeDriverManager().install())
+    return webdriver.Chrome(service=servicio, options=ops)
+
+
+def _procesar_registro(bot, registro, tipo_programa, plantilla):
+    """Procesa un estudiante en SIGAE y, si se dio de baja, genera su Word.
+
+    Devuelve ``{'exito': bool, 'nota': str, 'error': bool}``; ``error`` marca
+    fallas técnicas (no un estudiante inexistente) para el control de ritmo.
+    """
+    cedula = registro.cedula
+    if bot.grabador:
+        bot.grabador.iniciar_registro(registro, tipo_programa)
+    salida = {'exito': False, 'nota': "", 'error': False}
+
+    try:
+        if not bot.buscar_estudiante(cedula, tipo_programa) or not bot.solicitar_baja_estudiante(cedula):
+            salida['nota'] = "Estudiante no encontrado. Verifique la cédula en SIGAE."
+            return salida
+
+        if not bot.procesar_formulario_baja(registro.causal):
+            salida['nota'] = bot.ultimo_error or "No se pudo completar el formulario"
+            salida['error'] = True
+            return salida
+
+        salida['exito'] = True
+        salida['nota'] = "Procesado correctamente"
+        if plantilla and os.path.exists(plantilla):
+            try:
+                generar_notificacion_baja_word(registro.para_word(), plantilla)
+            except Exception as ew:
+                print(f"Error Word: {ew}")
+                salida['nota'] = "Baja registrada en SIGAE, pero falló al generar el Word."
+    except Exception as e_proc:
+        salida['nota'] = f"Error Critico: {str(e_proc)[:50]}"
+        salida['error'] = True
+        print(salida['nota'])
+    return salida
+
+
+def _plantilla_de(plantilla, tipo_programa):
+    """La plantilla puede ser una ruta única o un dict {tipo: ruta} (modo 'ambos')."""
+    if isinstance(plantilla, dict):
+        return plantilla.get(tipo_programa, "")
+    return plantilla
+
+
+def _leer_hoja_bot(archivo, nombre_hoja):
+    df = leer_excel_normalizado(archivo, nombre_hoja)
+    if 'CÉDULA' in df.columns:
+        df = df[df['CÉDULA'] != ""]
+        df = df.drop_duplicates(subset=['CÉDULA'])
+    return df
+
+
+def _procesar_programa(df, tipo_programa, plantilla, headless, usuario, clave,
+                       stop_event, callbacks, ritmo, trazar, registrar,
+                       usar_sesion_guardada=True, grabador=None):
+    """Procesa la hoja de un programa con su propio Chrome y su propia sesión.
+
+    Devuelve el trazador usado (o None) para que el llamador guarde la traza.
+    """
+    driver = None
+    trazador = None
+    total = len(df)
+    etiqueta = tipo_programa.upper()
+
+    try:
+        # Iniciar navegador
+        driver = crear_driver(headless)
+        callbacks['set_driver'](driver)
+        if trazar:
+            trazador = TrazadorComandos(driver)
+        bot = SigaeBot(driver, ritmo)
+        bot.grabador = grabador
+
+        # Login (o sesión guardada, si sigue vigente)
+        if not iniciar_sesion(bot, usuario, clave, tipo_programa, usar_cache=usar_sesion_guardada):
+            print(f"Error de Login ({etiqueta}). Abortando.")
+            return trazador
+
+        # Procesar cada estudiante
+        for registro in iterar_registros(df):
+            if stop_event.is_set():
+                print(f"--- PROCESO {etiqueta} DETENIDO ---")
+                break
+
+            print(f"\n[{etiqueta} {registro.indice+1}/{total}] Procesando: {registro.cedula}")
+            if trazador:
+                trazador.iniciar_registro(registro.cedula)
+
+            salida = _procesar_registro(bot, registro, tipo_programa, plantilla)
+            registrar(tipo_programa, registro, salida['exito'], salida['nota'])
+            ritmo.registrar_resultado(salida['error'])
+            espera = ritmo.pausa()
+            if espera:
+                time.sleep(espera)
+
+    except Exception as e:
+        if "invalid session id" not in str(e).lower() and "chrome not reachable" not in str(e).lower():
+            print(f"\nERROR GENERAL DEL HILO ({etiqueta}): {e}")
+            callbacks['messagebox']('error', f'Error fatal ({etiqueta}): {e}')
+
+    finally:
+        if trazador:
+            trazador.detener()
+        if driver:
+            try:
+                driver.quit()
+            except:
+                pass
+
+    return trazador
 
 
 def ejecutar_proceso_bot(archivo, plantilla, headless, es_recuperacion,
-                         usuario, clave, tipo_programa, stop_event, callbacks):
+                         usuario, clave, tipo_programa, stop_event, callbacks,
+                         trazar=False, grabar=""):
     """Ejecuta el proceso completo del bot de bajas.
 
     Args:
         archivo: Ruta al archivo Excel con las cédulas.
-        plantilla: Ruta a la plantilla Word (o vacío si no se generan).
+        plantilla: Ruta a la plantilla Word (o vacío si no se generan). En
+            modo 'ambos' puede ser un dict {'pnf': ruta, 'pnfa': ruta}.
         headless: bool, ejecutar Chrome sin ventana.
         es_recuperacion: bool, si usa archivo de recuperación.
         usuario: Nombre de usuario SIGAE.
         clave: Contraseña SIGAE.
-        tipo_programa: 'pnf' o 'pnfa'.
+        tipo_programa: 'pnf', 'pnfa' o 'ambos'. Con 'ambos' se leen las dos
+            hojas del libro y cada programa corre a la vez en su propio Chrome
+            y su propia sesión; el reporte y la recuperación salen unificados.
         stop_event: threading.Event para detener el proceso.
         callbacks: dict con funciones:
             - messagebox(type, title, message)
-            - set_driver(driver)  para que la UI pueda cerrarlo
+            - set_driver(driver)  para que la UI pueda cerrarlo (se llama una
+              vez por navegador abierto y con None al terminar todo)
+            - inicio(total)       opcional, al conocer la cantidad de registros
+            - resultado(fila)     opcional, al terminar cada estudiante
+        trazar: bool, registrar cada comando WebDriver y guardar al final un
+            resumen por registro y por línea de código (trazas_*.json).
+        grabar: carpeta donde guardar las páginas vistas, depuradas, para
+            reproducirlas luego sin SIGAE (ver grabacion.py). Vacío = no grabar.
 
     Returns:
-        dict: {'resultados': list, 'pendientes': int, 'reporte': str}
+        dict: {'resultados': list, 'pendientes': int, 'reporte': str, 'trazas': str}
     """
-    driver = None
+    programas = list(HOJAS_PROGRAMA) if tipo_programa == "ambos" else [tipo_programa]
+    ambos = len(programas) > 1
+    hojas = {}
     resultados = []
-    cedulas_procesadas = []
-    nombre_hoja = "BAJAS TOTALES" if tipo_programa == "pnf" else "BAJAS PNFA TOTALES"
+    cedulas_procesadas = {tipo: [] for tipo in programas}
+    candado = threading.Lock()
     reporte_guardado = ""
+    trazas_guardadas = []
+    trazadores = {}
+    ritmo = ControladorRitmo()
+    grabador = GrabadorSigae(grabar, usuario) if grabar else None
 
-    try:
-        print("=== INICIANDO BOT ===")
+    print("=== INICIANDO BOT ===")
 
-        # Leer Excel
+    # Leer Excel (en modo 'ambos' una hoja ausente cuenta como vacía)
+    for tipo in programas:
+        nombre_hoja = HOJAS_PROGRAMA.get(tipo, HOJAS_PROGRAMA['pnfa'])
         try:
             print(f"    📄 Leyendo hoja: {nombre_hoja}...")
-            df = pd.read_excel(archivo, sheet_name=nombre_hoja, dtype={'CÉDULA': str})
-            df.columns = df.columns.str.strip()
-            if 'CÉDULA' in df.columns:
-                df = df.dropna(subset=['CÉDULA'])
-                df['CÉDULA'] = df['CÉDULA'].astype(str).str.strip()
-                df = df.drop_duplicates(subset=['CÉDULA'])
+            hojas[tipo] = _leer_hoja_bot(archivo, nombre_hoja)
         except Exception as e:
+            if ambos and isinstance(e, ValueError):
+                print(f"    ⚠ No existe la hoja {nombre_hoja}, se omite {tipo.upper()}")
+                continue
             callbacks['messagebox']('error', f'Error leyendo Excel: {e}')
-            return {'resultados': [], 'pendientes': 0, 'reporte': ''}
-
-        total = len(df)
-        print(f"Total registros a procesar: {total}")
-
-        # Iniciar navegador
-        ops = Options()
-        ops.add_argument("--start-maximized")
-        if headless:
-            ops.add_argument("--headless")
-
-        servicio = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=servicio, options=ops)
-        callbacks['set_driver'](driver)
-        bot = SigaeBot(driver)
-
-        # Login
-        driver.get(SIGAE_URL)
-        if not bot.login(usuario, clave):
-            print("Error de Login. Abortando.")
-            return {'resultados': [], 'pendientes': total, 'reporte': ''}
-
-        # Procesar cada estudiante
-        for i, row in df.iterrows():
-            if stop_event.is_set():
-                print("--- PROCESO DETENIDO ---")
-                break
+            return {'resultados': [], 'pendientes': 0, 'reporte': '', 'trazas': ''}
 
-            cedula = str(row.get('CÉDULA', 'SN'))
-            print(f"\n[{i+1}/{total}] Procesando: {cedula}")
+    total = sum(len(df) for df in hojas.values())
+    print(f"Total registros a procesar: {total}")
+    if callbacks.get('inicio'):
+        callbacks['inicio'](total)
 
-            exito = False
-            nota = ""
+    def registrar(tipo, registro, exito, nota):
+        fila = registro.fila_resultado(exito, nota)
+        if ambos:
+            fila['PROGRAMA_BOT'] = tipo.upper()
+        with candado:
+            resultados.append(fila)
+            cedulas_procesadas[tipo].append(registro.cedula)
+        if callbacks.get('resultado'):
+            callbacks['resultado'](fila)
 
-            try:
-                if bot.buscar_estudiante(cedula, tipo_programa):
-                    if bot.solicitar_baja_estudiante(cedula):
-                        motivo = str(row.get('CAUSAL', row.get('MOTIVO', 'Desconocido')))
-                        if bot.procesar_formulario_baja(motivo):
-                            exito = True
-                            nota = "Procesado correctamente"
-                            if plantilla and os.path.exists(plantilla):
-                                try:
-                                    d_word = row.to_dict()
-                                    cedula_limpia = cedula
-                                    if cedula_limpia.endswith('.0'):
-                                        cedula_limpia = cedula_limpia[:-2]
-                                    d_word['cedula'] = cedula_limpia
-                                    d_word['fecha'] = str(row.get('FECHA', '')).strip()
-                                    d_word['causal'] = motivo
-                                    d_word['CAUSAL'] = motivo
-                                    generar_notificacion_baja_word(d_word, plantilla)
-                                except Exception as ew:
-                                    print(f"Error Word: {ew}")
-                                    nota = "Baja registrada en SIGAE, pero falló al generar el Word."
-                        else:
-                            nota = "No se pudo completar el formulario"
-                    else:
-                        nota = "Estudiante no encontrado. Verifique la cédula en SIGAE."
-                else:
-                    nota = "Estudiante no encontrado. Verifique la cédula en SIGAE."
-            except Exception as e_proc:
-                nota = f"Error Critico: {str(e_proc)[:50]}"
-                print(nota)
-
-            resultado_fila = row.to_dict()
-            for columna, valor in resultado_fila.items():
-                if pd.notna(valor):
-                    if isinstance(valor, (datetime, pd.Timestamp)):
-                        resultado_fila[columna] = valor.strftime("%d/%m/%Y")
-                    elif str(valor).endswith(" 00:00:00"):
-                        resultado_fila[columna] = str(valor).replace(" 00:00:00", "")
-
-            resultado_fila.update({
-                "ESTADO_BOT": "EXITO" if exito else "FALLO",
-                "NOTA_SISTEMA": nota,
-                "FECHA_PROCESO": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            })
-
-            resultados.append(resultado_fila)
-            cedulas_procesadas.append(cedula)
-            time.sleep(1)
+    def correr(tipo, usar_sesion_guardada):
+        trazadores[tipo] = _procesar_programa(
+            hojas[tipo], tipo, _plantilla_de(plantilla, tipo), headless, usuario, clave,
+            stop_event, callbacks, ritmo, trazar, registrar, usar_sesion_guardada, grabador)
 
-    except Exception as e:
-        if "invalid session id" not in str(e).lower() and "chrome not reachable" not in str(e).lower():
-            print(f"\nERROR GENERAL DEL HILO: {e}")
-            callbacks['messagebox']('error', f'Error fatal: {e}')
+    try:
+        activos = [tipo for tipo in programas if tipo in hojas and not hojas[tipo].empty]
+        if len(activos) > 1:
+            # Cada programa con su propia sesión: PHP serializa las peticiones
+            # de una misma sesión, así que compartir cookies anularía la ganancia.
+            print(f"    🔀 Procesando {' y '.join(t.upper() for t in activos)} en paralelo")
+            hilos = [threading.Thread(target=correr, args=(tipo, n == 0), name=f"bot-{tipo}")
+                     for n, tipo in enumerate(activos)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        elif activos:
+            correr(activos[0], True)
 
     finally:
         print("\n=== FINALIZANDO Y GUARDANDO ===")
-        if driver:
+        for tipo, trazador in trazadores.items():
+            if not trazador:
+                continue
+            print(trazador.reporte())
             try:
-                driver.quit()
-            except:
-                pass
+                sufijo = f"{tipo}_" if ambos else ""
+                ruta = os.path.join(carpeta_con_fecha("Reportes"), f"trazas_{sufijo}{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+                trazador.guardar(ruta)
+                trazas_guardadas.append(ruta)
+                print(f"✓ Traza de comandos guardada: {ruta}")
+            except Exception as e:
+                print(f"Error guardando traza de comandos: {e}")
         callbacks['set_driver'](None)
+        if grabador:
+            try:
+                grabador.cerrar()
+            except Exception as e:
+                print(f"Error guardando la grabación: {e}")
 
         # Guardar reporte
         if resultados:
@@ -159,25 +269,37 @@ def ejecutar_proceso_bot(archivo, plantilla, headless, es_recuperacion,
             except Exception as e:
                 print(f"Error guardando reporte final: {e}")
 
-        # Gestionar pendientes
+        # Gestionar pendientes (una hoja por programa en el mismo archivo)
         pendientes_count = 0
-        if 'df' in locals():
-            try:
-                pendientes = df[~df['CÉDULA'].isin(cedulas_procesadas)]
-                if not pendientes.empty:
-                    pendientes_count = len(pendientes)
-                    pendientes.to_excel(ARCHIVO_RECUPERACION, index=False, sheet_name=nombre_hoja)
-                    print(f"⚠ Quedan {pendientes_count} pendientes. Guardados en: {ARCHIVO_RECUPERACION}")
-                    callbacks['messagebox']('warning', 'Proceso Incompleto', f"Se guardó '{ARCHIVO_RECUPERACION}' con los pendientes.")
-                else:
-                    if os.path.exists(ARCHIVO_RECUPERACION):
-                        try:
-                            os.remove(ARCHIVO_RECUPERACION)
-                        except:
-                            pass
-                        print("✓ Proceso completado totalmente. Archivo de recuperación limpiado.")
-                    callbacks['messagebox']('info', 'Finalizado', 'Proceso completado con éxito.')
-            except Exception as e:
-                print(f"Error gestionando archivo recuperación: {e}")
+        try:
+            pendientes = {}
+            for tipo, df in hojas.items():
+                faltan = df[~df['CÉDULA'].isin(cedulas_procesadas[tipo])]
+                if not faltan.empty:
+                    pendientes[HOJAS_PROGRAMA.get(tipo, HOJAS_PROGRAMA['pnfa'])] = faltan
+            if pendientes:
+                pendientes_count = sum(len(df) for df in pendientes.values())
+                with pd.ExcelWriter(ARCHIVO_RECUPERACION) as writer:
+                    for nombre_hoja, df in pendientes.items():
+                        df.to_excel(writer, index=False, sheet_name=nombre_hoja)
+                print(f"⚠ Quedan {pendientes_count} pendientes. Guardados en: {ARCHIVO_RECUPERACION}")
+                callbacks['messagebox']('warning', 'Proceso Incompleto', f"Se guardó '{ARCHIVO_RECUPERACION}' con los pendientes.")
+            elif hojas:
+                if os.path.exists(ARCHIVO_RECUPERACION):
+                    try:
+                        os.remove(ARCHIVO_RECUPERACION)
+                    except:
+                        pass
+                    print("✓ Proceso completado totalmente. Archivo de recuperación limpiado.")
+                callbacks['messagebox']('info', 'Finalizado', 'Proceso completado con éxito.')
+        except Exception as e:
+            print(f"Error gestionando archivo recuperación: {e}")
+
+        # Al final: el ritmo aprendido nunca debe impedir guardar reporte y pendientes
+        try:
+            ritmo.guardar()
+        except Exception as e:
+            print(f"Error guardando el ritmo aprendido: {e}")
 
-    return {'resultados': resultados, 'pendientes': pendientes_count, 'reporte': reporte_guardado}
+    return {'resultados': resultados, 'pendientes': pendientes_count, 'reporte': reporte_guardado,
+            'trazas': "; ".join(trazas_guardadas)}
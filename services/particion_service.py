@@ -0,0 +1,144 @@
+"""Servicio para repartir un listado entre varios equipos y unir los resultados.
+
+Cada cédula cae siempre en la misma parte (hash SHA-256 de la cédula
+normalizada), así que particionar dos veces el mismo listado da las mismas
+partes. Cada equipo corre su parte con el bot de forma independiente y luego
+se combinan los ``resultado_*.xlsx`` y los archivos de recuperación.
+"""
+import os
+import re
+import hashlib
+import pandas as pd
+from datetime import datetime
+from config import ARCHIVO_RECUPERACION, carpeta_con_fecha
+
+
+def normalizar_cedula(valor):
+    """Deja solo los dígitos de la cédula ('V-12.345.678.0' -> '12345678')."""
+    texto = str(valor).strip()
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    digitos = re.sub(r'\D', '', texto)
+    return digitos or texto.upper()
+
+
+def indice_particion(cedula, partes):
+    """Devuelve la parte (0..partes-1) a la que pertenece una cédula."""
+    resumen = hashlib.sha256(normalizar_cedula(cedula).encode('utf-8')).digest()
+    return int.from_bytes(resumen[:8], 'big') % partes
+
+
+def _nombre_hoja(tipo_programa):
+    return "BAJAS TOTALES" if tipo_programa == "pnf" else "BAJAS PNFA TOTALES"
+
+
+def particionar_excel(archivo, partes, tipo_programa, carpeta_salida=None):
+    """Divide la hoja de bajas en ``partes`` archivos con la misma hoja.
+
+    Returns:
+        list: rutas de los archivos generados (se omiten las partes vacías).
+    """
+    if partes < 2:
+        raise ValueError("Se necesitan al menos 2 partes.")
+
+    nombre_hoja = _nombre_hoja(tipo_programa)
+    df = pd.read_excel(archivo, sheet_name=nombre_hoja, dtype={'CÉDULA': str})
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset=['CÉDULA'])
+
+    carpeta_salida = carpeta_salida or os.path.dirname(os.path.abspath(archivo))
+    os.makedirs(carpeta_salida, exist_ok=True)
+    base = os.path.splitext(os.path.basename(archivo))[0]
+
+    asignacion = df['CÉDULA'].map(lambda c: indice_particion(c, partes))
+    rutas = []
+    for k in range(partes):
+        parte = df[asignacion == k]
+        if parte.empty:
+            continue
+        ruta = os.path.join(carpeta_salida, f"{base}_parte_{k + 1}_de_{partes}.xlsx")
+        parte.to_excel(ruta, index=False, sheet_name=nombre_hoja)
+        print(f"    📦 Parte {k + 1}/{partes}: {len(parte)} registros -> {ruta}")
+        rutas.append(ruta)
+    return rutas
+
+
+def _leer_recuperacion(ruta, nombre_hoja):
+    """Pendientes de un programa; sin su hoja no hay pendientes de ese programa.
+
+    El archivo de recuperación trae una hoja por programa (modo 'ambos'), así
+    que no se cae en otra hoja: serían estudiantes del otro programa.
+    """
+    try:
+        return pd.read_excel(ruta, sheet_name=nombre_hoja, dtype={'CÉDULA': str})
+    except ValueError:
+        print(f"    ⚠ {os.path.basename(ruta)} no tiene la hoja {nombre_hoja}, sin pendientes de ese programa")
+        return pd.DataFrame(columns=['CÉDULA'])
+
+
+def combinar_resultados(reportes, recuperaciones, tipo_programa, salida_pendientes=ARCHIVO_RECUPERACION):
+    """Une los reportes y pendientes de varios equipos en un solo par de archivos.
+
+    Si una cédula aparece varias veces se queda el ``EXITO`` más reciente
+    (según FECHA_PROCESO); si nunca tuvo éxito, el ``FALLO`` más reciente.
+    Los pendientes que ya figuran en algún reporte se descartan.
+
+    Returns:
+        dict: {'reporte', 'pendientes', 'registros', 'exitos', 'fallos',
+               'duplicados', 'total_pendientes'}
+    """
+    nombre_hoja = _nombre_hoja(tipo_programa)
+
+    tablas = []
+    for ruta in reportes:
+        df = pd.read_excel(ruta, dtype={'CÉDULA': str})
+        df.columns = df.columns.str.strip()
+        tablas.append(df)
+    if not tablas:
+        raise ValueError("No se indicó ningún reporte para combinar.")
+    resultados = pd.concat(tablas, ignore_index=True)
+    resultados = resultados.dropna(subset=['CÉDULA'])
+
+    clave = resultados['CÉDULA'].map(normalizar_cedula)
+    orden = pd.DataFrame({
+        'clave': clave,
+        'exito': (resultados['ESTADO_BOT'] == 'EXITO').astype(int),
+        'fecha': pd.to_datetime(resultados['FECHA_PROCESO'], format="%d/%m/%Y %H:%M:%S", errors='coerce'),
+    }).sort_values(['clave', 'exito', 'fecha'], na_position='first', kind='stable')
+    elegidos = orden.drop_duplicates(subset=['clave'], keep='last').index
+    duplicados = len(resultados) - len(elegidos)
+    resultados = resultados.loc[sorted(elegidos)]
+
+    rep_name = os.path.join(
+        carpeta_con_fecha("Reportes"),
+        f"resultado_combinado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    )
+    resultados.to_excel(rep_name, index=False)
+    print(f"✓ Reporte combinado guardado: {rep_name} ({len(resultados)} registros, {duplicados} duplicados resueltos)")
+
+    procesadas = set(clave.loc[elegidos])
+    pendientes = [_leer_recuperacion(ruta, nombre_hoja) for ruta in recuperaciones]
+    ruta_pendientes = ""
+    total_pendientes = 0
+    if pendientes:
+        pendientes = pd.concat(pendientes, ignore_index=True)
+        pendientes.columns = pendientes.columns.str.strip()
+        pendientes = pendientes.dropna(subset=['CÉDULA'])
+        clave_pend = pendientes['CÉDULA'].map(normalizar_cedula)
+        pendientes = pendientes[~clave_pend.isin(procesadas) & ~clave_pend.duplicated()]
+        total_pendientes = len(pendientes)
+        if total_pendientes:
+            pendientes.to_excel(salida_pendientes, index=False, sheet_name=nombre_hoja)
+            ruta_pendientes = salida_pendientes
+            print(f"⚠ Quedan {total_pendientes} pendientes. Guardados en: {salida_pendientes}")
+
+    exitos = int((resultados['ESTADO_BOT'] == 'EXITO').sum())
+    return {
+        'reporte': rep_name,
+        'pendientes': ruta_pendientes,
+        'registros': len(resultados),
+        'exitos': exitos,
+        'fallos': len(resultados) - exitos,
+        'duplicados': duplicados,
+        'total_pendientes': total_pendientes,
+    }
@@ -0,0 +1,91 @@
+"""Caché cifrada de la sesión SIGAE entre ejecuciones.
+
+Las cookies de una sesión autenticada se guardan cifradas con la misma llave
+de seguridad.py, junto con su vencimiento. Así un nuevo arranque del bot (o
+la verificación de la pestaña Acceso) puede saltarse el formulario de login
+mientras la sesión siga viva.
+"""
+import os
+import time
+import hashlib
+from seguridad import cifrar_json, descifrar_json
+from config import SIGAE_URL, ARCHIVO_SESION, DURACION_SESION_MIN
+
+CAMPOS_COOKIE = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+def _huella(usuario, clave):
+    """Identifica usuario+clave sin guardar la clave en la caché."""
+    return hashlib.sha256(f"{usuario}\0{clave}".encode("utf-8")).hexdigest()
+
+
+def guardar_sesion(usuario, clave, cookies):
+    """Guarda cifradas las cookies de la sesión actual."""
+    expira = time.time() + DURACION_SESION_MIN * 60
+    vencimientos = [c['expiry'] for c in cookies if c.get('expiry')]
+    if vencimientos:
+        expira = min(expira, min(vencimientos))
+
+    datos = {
+        'huella': _huella(usuario, clave),
+        'expira': expira,
+        'cookies': [{k: v for k, v in c.items() if k in CAMPOS_COOKIE} for c in cookies],
+    }
+    try:
+        with open(ARCHIVO_SESION, "wb") as f:
+            f.write(cifrar_json(datos))
+    except OSError as e:
+        print(f"    ⚠ No se pudo guardar la sesión: {e}")
+
+
+def cargar_sesion(usuario, clave):
+    """Devuelve las cookies guardadas si son de este usuario y no vencieron."""
+    if not os.path.exists(ARCHIVO_SESION):
+        return None
+    try:
+        with open(ARCHIVO_SESION, "rb") as f:
+            datos = descifrar_json(f.read())
+    except OSError:
+        return None
+
+    if not datos or datos.get('huella') != _huella(usuario, clave):
+        return None
+    if datos.get('expira', 0) <= time.time():
+        invalidar_sesion()
+        return None
+    return datos.get('cookies')
+
+
+def invalidar_sesion():
+    """Borra la sesión guardada."""
+    try:
+        os.remove(ARCHIVO_SESION)
+    except OSError:
+        pass
+
+
+def iniciar_sesion(bot, usuario, clave, tipo_programa="pnf", usar_cache=True):
+    """Abre SIGAE y reutiliza la sesión guardada; si no sirve, hace login.
+
+    La sesión en caché se valida con una sola carga del listado. Si SIGAE
+    redirige al login, la caché se invalida y se usa el formulario que ya
+    quedó en pantalla. Con ``usar_cache=False`` siempre se abre una sesión
+    nueva y la caché no se toca (p. ej. un segundo navegador en paralelo).
+    """
+    bot.driver.get(SIGAE_URL)
+
+    cookies = cargar_sesion(usuario, clave) if usar_cache else None
+    if cookies:
+        if bot.restaurar_sesion(cookies, tipo_programa):
+            print("    ✓ Sesión restaurada desde caché (sin login)")
+            guardar_sesion(usuario, clave, bot.driver.get_cookies())
+            return True
+        print("    ↻ La sesión guardada expiró, iniciando sesión de nuevo...")
+        invalidar_sesion()
+        bot.driver.get(SIGAE_URL)
+
+    if not bot.login(usuario, clave):
+        return False
+    if usar_cache:
+        guardar_sesion(usuario, clave, bot.driver.get_cookies())
+    return True
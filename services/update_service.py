@@ -1,25 +1,520 @@
-"""Servicio de verificación de actualizaciones."""
-import ssl
+"""Servicio de verificación, descarga y aplicación de actualizaciones.
+
+Lo usan tanto la aplicación como el launcher, por eso solo depende de la
+biblioteca estándar. La versión remota se guarda en una caché en disco
+(ETag + TTL) para que el launcher y la app no la descarguen dos veces.
+"""
+import os
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import zipfile
+import threading
+import urllib.error
 import urllib.request
 
+ARCHIVO_CACHE_VERSION = "cache_version.json"
+TTL_CACHE_VERSION = 15 * 60   # segundos
+TIMEOUT_VERSION = 3           # segundos
+
+TIMEOUT_DESCARGA    = 10                  # segundos
+TAM_BLOQUE          = 256 * 1024          # bytes leídos por iteración
+UMBRAL_PARALELO     = 32 * 1024 * 1024    # assets mayores se bajan por tramos
+HILOS_DESCARGA      = 4
+GUARDAR_ESTADO_CADA = 4 * 1024 * 1024     # persistir avance cada N bytes
+PASOS_PROGRESO_ZIP  = 10                  # actualizaciones de UI durante la extracción
+
+
+def _leer_cache(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_cache(ruta, datos):
+    try:
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
 
-def verificar_actualizacion(version_actual: str, url_version: str):
+
+def consultar_version_remota(url_version, directorio=".", ttl=TTL_CACHE_VERSION,
+                             timeout=TIMEOUT_VERSION):
+    """Devuelve la versión publicada en url_version, o None si no hay conexión.
+
+    Si la caché de `directorio` es más reciente que `ttl` no se toca la red.
+    Si venció, se revalida con If-None-Match: un 304 solo renueva la marca de
+    tiempo sin volver a descargar el archivo.
+    """
+    ruta = os.path.join(directorio, ARCHIVO_CACHE_VERSION)
+    cache = _leer_cache(ruta)
+    if cache and cache.get("url") != url_version:
+        cache = None
+
+    if cache and time.time() - cache.get("consultado", 0) < ttl:
+        return cache.get("version")
+
+    headers = {"User-Agent": "SIGAE-Launcher/1.0"}
+    if cache and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+
+    try:
+        req = urllib.request.Request(url_version, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            version = resp.read().decode("utf-8").strip()
+            etag = resp.headers.get("ETag", "")
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not cache:
+            print(f"No se pudo verificar actualizaciones: {e}")
+            return None
+        version, etag = cache.get("version"), cache.get("etag", "")
+    except Exception as e:
+        print(f"No se pudo verificar actualizaciones: {e}")
+        return None
+
+    _guardar_cache(ruta, {
+        "url": url_version,
+        "version": version,
+        "etag": etag,
+        "consultado": time.time(),
+    })
+    return version
+
+
+def verificar_actualizacion(version_actual: str, url_version: str, directorio="."):
     """Compara la versión local con la remota.
 
     Returns:
         tuple: (hay_update: bool, version_remota: str)
     """
-    try:
-        contexto_ssl = ssl._create_unverified_context()
-        with urllib.request.urlopen(url_version, context=contexto_ssl) as response:
-            version_remota = response.read().decode('utf-8').strip()
+    version_remota = consultar_version_remota(url_version, directorio)
+    if not version_remota:
+        return False, None
 
+    try:
         tupla_remota = tuple(map(int, version_remota.split('.')))
         tupla_actual = tuple(map(int, version_actual.split('.')))
-
-        if tupla_remota > tupla_actual:
-            return True, version_remota
-        return False, version_remota
-    except Exception as e:
+    except ValueError as e:
         print(f"No se pudo verificar actualizaciones: {e}")
         return False, None
+
+    if tupla_remota > tupla_actual:
+        return True, version_remota
+    return False, version_remota
+
+
+# --- DESCARGA DEL RELEASE ---
+
+def _sha256_de_asset(asset: dict, assets: list) -> str | None:
+    """
+    SHA-256 publicado para un asset: campo 'digest' de la API de GitHub
+    ("sha256:<hex>") o, en su defecto, un asset hermano '<nombre>.sha256'.
+    """
+    digest = asset.get("digest") or ""
+    if digest.startswith("sha256:"):
+        return digest.split(":", 1)[1].strip().lower()
+
+    nombre_suma = asset.get("name", "") + ".sha256"
+    for otro in assets:
+        if otro.get("name") == nombre_suma:
+            try:
+                req = urllib.request.Request(
+                    otro["browser_download_url"],
+                    headers={"User-Agent": "SIGAE-Launcher/1.0"},
+                )
+                with urllib.request.urlopen(req, timeout=TIMEOUT_DESCARGA) as resp:
+                    # Formato típico de sha256sum: "<hex>  <archivo>"
+                    return resp.read().decode("utf-8").split()[0].strip().lower()
+            except Exception:
+                return None
+    return None
+
+
+def obtener_url_descarga(url_api: str) -> tuple[str, str, str, str | None] | tuple[None, None, None, None]:
+    """
+    Consulta la API de GitHub (url_api) para obtener el asset del último release.
+    Prioridad: .exe > .zip > primero disponible.
+    Retorna (url_descarga, tag_version, nombre_archivo, sha256) o
+    (None, None, None, None) si falla. sha256 es None si el release no lo publica.
+    """
+    try:
+        req = urllib.request.Request(
+            url_api,
+            headers={
+                "User-Agent": "SIGAE-Launcher/1.0",
+                "Accept": "application/vnd.github+json",
+            },
+        )
+        with urllib.request.urlopen(req, timeout=TIMEOUT_DESCARGA) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+
+        tag = data.get("tag_name", "").lstrip("v")
+        assets = data.get("assets", [])
+
+        # 1) Preferir asset .exe directo
+        for asset in assets:
+            nombre = asset.get("name", "")
+            if nombre.endswith(".exe"):
+                return asset["browser_download_url"], tag, nombre, _sha256_de_asset(asset, assets)
+
+        # 2) Aceptar .zip (se extrae el .exe dentro)
+        for asset in assets:
+            nombre = asset.get("name", "")
+            if nombre.endswith(".zip"):
+                return asset["browser_download_url"], tag, nombre, _sha256_de_asset(asset, assets)
+
+        # 3) Primer asset disponible
+        if assets:
+            nombre = assets[0].get("name", "asset")
+            return assets[0]["browser_download_url"], tag, nombre, _sha256_de_asset(assets[0], assets)
+
+        return None, None, None, None
+
+    except Exception:
+        return None, None, None, None
+
+
+# ─────────────────────────────────────────────
+#  DESCARGA REANUDABLE
+# ─────────────────────────────────────────────
+
+class ErrorIntegridad(Exception):
+    """El archivo descargado no coincide con el SHA-256 publicado."""
+
+
+def _abrir_rango(url: str, inicio: int, fin: int | None = None):
+    """Abre la URL pidiendo el rango de bytes [inicio, fin] (fin incluido)."""
+    rango = f"bytes={inicio}-" if fin is None else f"bytes={inicio}-{fin}"
+    req = urllib.request.Request(
+        url,
+        headers={"User-Agent": "SIGAE-Launcher/1.0", "Range": rango},
+    )
+    return urllib.request.urlopen(req, timeout=TIMEOUT_DESCARGA)
+
+
+def _sondear_descarga(url: str) -> tuple[int, bool, str]:
+    """
+    Pide el primer byte para conocer el tamaño total, si el servidor acepta
+    rangos y su ETag. Retorna (tamano, acepta_rangos, etag).
+    """
+    with _abrir_rango(url, 0, 0) as resp:
+        etag = resp.headers.get("ETag", "")
+        if resp.status == 206:
+            # Content-Range: bytes 0-0/12345
+            total = resp.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            if total.isdigit():
+                return int(total), True, etag
+        return int(resp.headers.get("Content-Length") or 0), False, etag
+
+
+def _sha256_archivo(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def descargar_reanudable(url: str, ruta_destino: str, sha256: str | None = None,
+                         progreso=None, hilos: int = HILOS_DESCARGA,
+                         limitador=None) -> None:
+    """
+    Descarga url en ruta_destino con reanudación por HTTP Range.
+
+    Los bytes se escriben en ruta_destino + '.part' y el avance de cada tramo
+    en ruta_destino + '.part.json'; ambos sobreviven a reinicios del launcher,
+    así que una conexión caída retoma donde quedó. Si el asset supera
+    UMBRAL_PARALELO se baja en `hilos` tramos en paralelo. Con sha256 se
+    verifica el archivo completo antes de moverlo a ruta_destino; si no
+    coincide se descarta y se lanza ErrorIntegridad.
+
+    progreso(descargado, total) se llama desde el/los hilos de descarga.
+    limitador(bytes_leidos), si se indica, se llama tras cada bloque y puede
+    dormir para frenar la descarga (p. ej. mientras corre el bot).
+    """
+    ruta_part   = ruta_destino + ".part"
+    ruta_estado = ruta_part + ".json"
+
+    total, acepta_rangos, etag = _sondear_descarga(url)
+
+    estado = None
+    if acepta_rangos and os.path.exists(ruta_part) and os.path.exists(ruta_estado):
+        try:
+            with open(ruta_estado, "r", encoding="utf-8") as f:
+                estado = json.load(f)
+            if (estado.get("url") != url or estado.get("tamano") != total
+                    or estado.get("etag") != etag
+                    or os.path.getsize(ruta_part) != total):
+                estado = None
+        except (OSError, ValueError):
+            estado = None
+
+    if not acepta_rangos or total <= 0:
+        # Sin soporte de rangos: descarga completa en un solo flujo
+        _descargar_sin_rangos(url, ruta_part, progreso, limitador)
+    else:
+        if estado is None:
+            n = max(1, hilos) if total >= UMBRAL_PARALELO else 1
+            tam_tramo = -(-total // n)
+            estado = {
+                "url": url, "tamano": total, "etag": etag,
+                "tramos": [
+                    [ini, min(ini + tam_tramo, total) - 1, 0]
+                    for ini in range(0, total, tam_tramo)
+                ],
+            }
+            with open(ruta_part, "wb") as f:
+                f.truncate(total)
+        _descargar_tramos(url, ruta_part, ruta_estado, estado, progreso, limitador)
+
+    if sha256:
+        obtenido = _sha256_archivo(ruta_part)
+        if obtenido != sha256.lower():
+            for ruta in (ruta_part, ruta_estado):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            raise ErrorIntegridad(
+                f"SHA-256 no coincide (esperado {sha256[:12]}…, obtenido {obtenido[:12]}…)"
+            )
+
+    os.replace(ruta_part, ruta_destino)
+    if os.path.exists(ruta_estado):
+        os.remove(ruta_estado)
+
+
+def _descargar_sin_rangos(url: str, ruta_part: str, progreso, limitador=None) -> None:
+    req = urllib.request.Request(url, headers={"User-Agent": "SIGAE-Launcher/1.0"})
+    with urllib.request.urlopen(req, timeout=TIMEOUT_DESCARGA) as resp, open(ruta_part, "wb") as f:
+        total = int(resp.headers.get("Content-Length") or 0)
+        descargado = 0
+        for bloque in iter(lambda: resp.read(TAM_BLOQUE), b""):
+            f.write(bloque)
+            descargado += len(bloque)
+            if progreso:
+                progreso(descargado, total)
+            if limitador:
+                limitador(len(bloque))
+
+
+def _descargar_tramos(url: str, ruta_part: str, ruta_estado: str,
+                      estado: dict, progreso, limitador=None) -> None:
+    """Completa los tramos pendientes de `estado`, uno por hilo."""
+    lock = threading.Lock()
+    total = estado["tamano"]
+    errores: list[Exception] = []
+    pendiente_guardar = [0]
+
+    def _guardar_estado() -> None:
+        with open(ruta_estado, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+
+    def _bajar(tramo: list) -> None:
+        inicio, fin, _ = tramo
+        try:
+            with _abrir_rango(url, inicio + tramo[2], fin) as resp, open(ruta_part, "r+b") as f:
+                if resp.status != 206:
+                    raise IOError("El servidor dejó de aceptar rangos")
+                f.seek(inicio + tramo[2])
+                while tramo[2] < fin - inicio + 1:
+                    bloque = resp.read(min(TAM_BLOQUE, fin - inicio + 1 - tramo[2]))
+                    if not bloque:
+                        raise IOError("Conexión cerrada antes de completar el tramo")
+                    f.write(bloque)
+                    # El avance del tramo solo cuenta bytes ya vaciados al archivo:
+                    # _guardar_estado persiste el de todos los hilos, no solo el propio.
+                    f.flush()
+                    with lock:
+                        tramo[2] += len(bloque)
+                        pendiente_guardar[0] += len(bloque)
+                        if pendiente_guardar[0] >= GUARDAR_ESTADO_CADA:
+                            _guardar_estado()
+                            pendiente_guardar[0] = 0
+                        descargado = sum(t[2] for t in estado["tramos"])
+                    if progreso:
+                        progreso(descargado, total)
+                    if limitador:
+                        limitador(len(bloque))
+        except Exception as exc:
+            with lock:
+                errores.append(exc)
+
+    pendientes = [t for t in estado["tramos"] if t[2] < t[1] - t[0] + 1]
+    _guardar_estado()
+
+    if len(pendientes) == 1:
+        _bajar(pendientes[0])
+    else:
+        hilos = [threading.Thread(target=_bajar, args=(t,), daemon=True) for t in pendientes]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+    _guardar_estado()
+    if errores:
+        raise errores[0]
+
+
+# --- EXTRACCIÓN INCREMENTAL ---
+
+def _crc32_archivo(ruta: str) -> int:
+    crc = 0
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(bloque, crc)
+    return crc & 0xFFFFFFFF
+
+
+def _sin_cambios(entrada: zipfile.ZipInfo, destino: str) -> bool:
+    """True si el archivo en disco ya tiene el mismo tamaño y CRC32 que la entrada."""
+    try:
+        if os.path.getsize(destino) != entrada.file_size:
+            return False
+    except OSError:
+        return False
+    return _crc32_archivo(destino) == entrada.CRC
+
+
+def extraer_zip_incremental(ruta_zip: str, dir_base: str, omitir: tuple = (),
+                            progreso=None) -> tuple[int, int]:
+    """
+    Extrae ruta_zip sobre dir_base escribiendo solo lo que cambió.
+
+    Cada entrada se compara por tamaño y CRC32 con el archivo existente; las
+    idénticas se saltan. Las demás se escriben en '<archivo>.nuevo' y se
+    reemplazan con os.replace, así un corte nunca deja un archivo a medias.
+    `omitir` son nombres de archivo (en minúsculas) que no se tocan.
+    progreso(fraccion) se llama como máximo PASOS_PROGRESO_ZIP veces.
+    Retorna (escritos, sin_cambios).
+    """
+    base_real = os.path.realpath(dir_base)
+    escritos = sin_cambios = 0
+
+    with zipfile.ZipFile(ruta_zip, "r") as zf:
+        entradas = zf.infolist()
+        total_bytes = sum(e.file_size for e in entradas) or 1
+        procesados = 0
+        ultimo_paso = 0
+
+        for entrada in entradas:
+            procesados += entrada.file_size
+            destino = os.path.realpath(os.path.join(base_real, entrada.filename))
+            # Ignorar rutas que intenten salir del directorio (zip slip)
+            if os.path.commonpath([destino, base_real]) != base_real:
+                continue
+
+            if entrada.is_dir():
+                os.makedirs(destino, exist_ok=True)
+            elif os.path.basename(destino).lower() in omitir:
+                pass
+            elif _sin_cambios(entrada, destino):
+                sin_cambios += 1
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                temporal = destino + ".nuevo"
+                with zf.open(entrada) as origen, open(temporal, "wb") as salida:
+                    shutil.copyfileobj(origen, salida, TAM_BLOQUE)
+                os.replace(temporal, destino)
+                escritos += 1
+
+            paso = procesados * PASOS_PROGRESO_ZIP // total_bytes
+            if progreso and paso > ultimo_paso:
+                ultimo_paso = paso
+                progreso(procesados / total_bytes)
+
+    return escritos, sin_cambios
+
+
+# --- PRE-DESCARGA EN SEGUNDO PLANO ---
+
+DIR_PREPARADA = "actualizacion_preparada"
+MANIFIESTO_PREPARADA = "listo.json"
+LIMITE_BPS_BOT_ACTIVO = 128 * 1024   # velocidad máxima mientras corre el bot
+
+
+def _es_mas_nueva(version_a: str, version_b: str) -> bool:
+    try:
+        return tuple(map(int, version_a.split('.'))) > tuple(map(int, version_b.split('.')))
+    except (AttributeError, ValueError):
+        return False
+
+
+def leer_actualizacion_preparada(directorio="."):
+    """Manifiesto {'version', 'archivo'} de una descarga ya completa, o None."""
+    ruta = os.path.join(directorio, DIR_PREPARADA, MANIFIESTO_PREPARADA)
+    manifiesto = _leer_cache(ruta)
+    if not manifiesto:
+        return None
+    if not os.path.exists(os.path.join(directorio, DIR_PREPARADA, manifiesto.get("archivo", ""))):
+        return None
+    return manifiesto
+
+
+def predescargar_actualizacion(url_api, directorio=".", bot_activo=None,
+                               limite_bps=LIMITE_BPS_BOT_ACTIVO):
+    """Baja el último release a DIR_PREPARADA mientras la aplicación sigue en uso.
+
+    La descarga es reanudable y verificada (ver descargar_reanudable). Mientras
+    `bot_activo` (threading.Event) esté activo se limita a `limite_bps` para no
+    competir con el bot por el ancho de banda. Al terminar se escribe el
+    manifiesto que el launcher usa para aplicar la actualización al inicio.
+
+    Returns:
+        str | None: versión preparada, o None si no hay release disponible.
+    """
+    url, tag, nombre, sha256 = obtener_url_descarga(url_api)
+    if not url:
+        return None
+
+    existente = leer_actualizacion_preparada(directorio)
+    if existente and existente.get("version") == tag:
+        return tag
+
+    carpeta = os.path.join(directorio, DIR_PREPARADA)
+    os.makedirs(carpeta, exist_ok=True)
+
+    def limitador(leidos):
+        if bot_activo is not None and bot_activo.is_set():
+            time.sleep(leidos / limite_bps)
+
+    descargar_reanudable(url, os.path.join(carpeta, nombre), sha256=sha256,
+                         hilos=1, limitador=limitador)
+    _guardar_cache(os.path.join(carpeta, MANIFIESTO_PREPARADA),
+                   {"version": tag, "archivo": nombre})
+    return tag
+
+
+def aplicar_actualizacion_preparada(dir_base, nombre_exe, version_local, omitir=()):
+    """Instala (desde el launcher) una actualización pre-descargada por la app.
+
+    Solo se aplica si es más nueva que version_local; si no, se descarta. Un
+    .zip se extrae de forma incremental y un .exe reemplaza a nombre_exe.
+
+    Returns:
+        str | None: la versión aplicada, o None si no había nada que aplicar.
+    """
+    manifiesto = leer_actualizacion_preparada(dir_base)
+    carpeta = os.path.join(dir_base, DIR_PREPARADA)
+    if not manifiesto:
+        return None
+    if not _es_mas_nueva(manifiesto.get("version", ""), version_local):
+        shutil.rmtree(carpeta, ignore_errors=True)
+        return None
+
+    ruta = os.path.join(carpeta, manifiesto["archivo"])
+    if ruta.endswith(".zip"):
+        extraer_zip_incremental(ruta, dir_base, omitir=omitir)
+    else:
+        os.replace(ruta, os.path.join(dir_base, nombre_exe))
+
+    shutil.rmtree(carpeta, ignore_errors=True)
+    return manifiesto["version"]
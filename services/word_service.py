@@ -1,11 +1,15 @@
 """Servicio de generación masiva de documentos Word."""
 import os
 import time
-import pandas as pd
-from generar_notificacion import generar_notificacion_baja_word
+from generar_notificacion import generar_notificacion_baja_word, crear_lote_notificaciones
+from config import carpeta_con_fecha
+from registros import iterar_registros, CAUSAL_POR_DEFECTO
+from cache_excel import leer_excel_normalizado
+from manifiesto import ManifiestoNotificaciones, huella_archivo, huella_datos
 
 
-def generar_words_desde_excel(archivo, plantilla, tipo_programa, stop_event, callbacks):
+def generar_words_desde_excel(archivo, plantilla, tipo_programa, stop_event, callbacks,
+                              modo_salida="individual", motor="docx", forzar=False):
     """Genera documentos Word a partir de un archivo Excel.
 
     Args:
@@ -16,6 +20,13 @@ def generar_words_desde_excel(archivo, plantilla, tipo_programa, stop_event, cal
         callbacks: dict con funciones de la UI:
             - messagebox(type, title, message)
             - ui_update(func)
+        modo_salida: 'individual' (un .docx por estudiante), 'combinado'
+            (un solo .docx con una sección por estudiante, siempre con el
+            motor 'xml') o 'zip'.
+        motor: 'docx' (python-docx) o 'xml' (sustitución directa, más rápida
+            y conserva el formato de la plantilla).
+        forzar: bool, en modo 'individual' regenerar aunque el manifiesto
+            indique que el documento de la cédula ya está al día.
 
     Returns:
         tuple: (documentos_creados: int, fue_detenido: bool)
@@ -34,50 +45,67 @@ def generar_words_desde_excel(archivo, plantilla, tipo_programa, stop_event, cal
         print("=== INICIANDO GENERADOR WORD ===")
         try:
             print(f"    📄 Leyendo hoja: {nombre_hoja}...")
-            df = pd.read_excel(archivo, sheet_name=nombre_hoja, dtype={'CÉDULA': str})
+            df = leer_excel_normalizado(archivo, nombre_hoja)
         except Exception:
             callbacks['messagebox']('error', 'Error leyendo Excel', f"No se encontró la pestaña '{nombre_hoja}'.")
             return 0, False
 
-        df.columns = df.columns.str.strip()
         total = len(df)
         print(f"Registros encontrados: {total}")
 
         cont_ok = 0
+        omitidos = 0
+        carpeta = carpeta_con_fecha("Notificaciones")
+        lote = crear_lote_notificaciones(modo_salida, carpeta, motor)
 
-        for i, row in df.iterrows():
-            if stop_event.is_set():
-                print(f"--- PROCESO INTERRUMPIDO POR USUARIO EN REGISTRO {i} ---")
-                break
+        # Los lotes (combinado/zip) siempre llevan todas las filas
+        manifiesto = None if lote else ManifiestoNotificaciones()
+        if manifiesto:
+            firma_plantilla = huella_archivo(plantilla)
 
-            try:
-                datos = row.to_dict()
-                cedula = str(datos.get('CÉDULA', 'SN'))
-                if cedula.endswith('.0'):
-                    cedula = cedula[:-2]
-                datos['cedula'] = cedula
-
-                causal = str(datos.get('CAUSAL', datos.get('MOTIVO', 'Desconocido')))
-                if causal.lower() == 'nan':
-                    causal = 'DESINCORPORACION POR MOTIVOS PERSONALES'
-                datos['causal'] = causal
-                datos['CAUSAL'] = causal
-
-                print(f"[{i+1}/{total}] Generando doc para: {cedula}...")
-                generar_notificacion_baja_word(datos, plantilla)
-                cont_ok += 1
-                time.sleep(0.05)
-
-            except Exception as e_row:
-                print(f"Error en fila {i}: {e_row}")
+        # Cerrar el lote y guardar el manifiesto aunque la corrida se corte a
+        # medias, para no dejar un zip/docx incompleto ni perder lo generado.
+        try:
+            for registro in iterar_registros(df):
+                i = registro.indice
+                if stop_event.is_set():
+                    print(f"--- PROCESO INTERRUMPIDO POR USUARIO EN REGISTRO {i} ---")
+                    break
+
+                try:
+                    datos = registro.para_word(CAUSAL_POR_DEFECTO)
+                    if lote:
+                        print(f"[{i+1}/{total}] Generando doc para: {registro.cedula}...")
+                        lote.agregar(datos, plantilla)
+                    else:
+                        firma_datos = huella_datos(datos)
+                        if not forzar and manifiesto.vigente(registro.cedula, firma_plantilla, firma_datos, motor, carpeta):
+                            omitidos += 1
+                            continue
+                        print(f"[{i+1}/{total}] Generando doc para: {registro.cedula}...")
+                        ruta = generar_notificacion_baja_word(datos, plantilla, motor)
+                        if not ruta:
+                            continue
+                        manifiesto.registrar(registro.cedula, firma_plantilla, firma_datos, motor, carpeta, ruta)
+                        time.sleep(0.05)
+                    cont_ok += 1
+
+                except Exception as e_row:
+                    print(f"Error en fila {i}: {e_row}")
+        finally:
+            if lote:
+                lote.cerrar()
+            if manifiesto:
+                manifiesto.guardar()
 
         fue_detenido = stop_event.is_set()
+        nota_omitidos = f" ({omitidos} sin cambios, omitidos)" if omitidos else ""
 
         if not fue_detenido:
-            callbacks['messagebox']('info', 'Proceso terminado', f'Se generaron {cont_ok} documentos.')
-            print(f"✓ Finalizado. {cont_ok} documentos creados.")
+            callbacks['messagebox']('info', 'Proceso terminado', f'Se generaron {cont_ok} documentos{nota_omitidos}.')
+            print(f"✓ Finalizado. {cont_ok} documentos creados{nota_omitidos}.")
         else:
-            callbacks['messagebox']('warning', 'Detenido', f'Proceso detenido. Se generaron {cont_ok} documentos.')
+            callbacks['messagebox']('warning', 'Detenido', f'Proceso detenido. Se generaron {cont_ok} documentos{nota_omitidos}.')
 
         return cont_ok, fue_detenido
 
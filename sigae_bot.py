@@ -1,4 +1,6 @@
+import re
 from datetime import datetime
+from urllib.parse import urlencode
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import Select, WebDriverWait
@@ -6,6 +8,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import pandas as pd
 import time
+from config import SIGAE_URL
 class SigaeBot:
     """Clase para automatizar procesos en el sistema SIGAE."""
     
@@ -16,21 +19,44 @@ class SigaeBot:
     SUBMENU_LISTA_PNF = (By.XPATH, "//a[contains(@href, 'alumno-pnf')][.//span[contains(text(), 'Lista PNF')]]")
     SELECT_NACIONALIDAD = (By.NAME, "AlumnoSearch[nacionalidad]")
     INPUT_CEDULA = (By.NAME, "AlumnoSearch[cedula]")
-    ELEMENTO_VACIO = (By.CSS_SELECTOR, ".empty")
     OPCION_SOLICITAR_BAJA = (By.CSS_SELECTOR, 'a[href*="solicitar-baja"]')
     SELECT_MOTIVO = (By.ID, "alumnobajaslicencias-id_estatus_academico")
     TEXTAREA_DESCRIPCION = (By.ID, "alumnobajaslicencias-descripcion_solicitud")
     BOTON_ENVIAR = (By.ID, "button-submit-inscripcion")
     
-    # URL principal (debe estar en config.py)
-    URL_PRINCIPAL = "http://sigae.ucs.gob.ve"
+    # Variantes del botón de acción en la fila del estudiante: enlace directo
+    # a la baja o botón de menú desplegable (en orden de prueba por defecto)
+    VARIANTES_ACCION = (
+        'directo',
+        "a.dropdown-toggle",
+        "button.dropdown-toggle",
+        ".btn-group > button",
+        ".dropdown > button",
+        "a[data-toggle='dropdown']",
+        "button[data-toggle='dropdown']",
+        ".btn.dropdown-toggle",
+    )
+    # Variante que funcionó por programa; compartida entre instancias (modo 'ambos')
+    VARIANTES_APRENDIDAS = {}
 
-    def __init__(self, driver):
-        """Inicializa la instancia con el driver de Selenium."""
+    # URL principal (config.SIGAE_URL, que puede apuntar a un servidor de replay)
+    URL_PRINCIPAL = SIGAE_URL
+
+    def __init__(self, driver, ritmo=None):
+        """Inicializa la instancia con el driver de Selenium.
+
+        ``ritmo`` (ControladorRitmo, opcional) ajusta los timeouts según la
+        latencia medida; sin él se usan los valores fijos de siempre.
+        """
         self.driver = driver
+        self.ritmo = ritmo
         self.wait = WebDriverWait(self.driver, 15)
         self._inicializar_mapeo_causales()
-        self.tipo_prog = ""
+        self.tipo_prog = ""   # programa de esta sesión ('pnf'/'pnfa'), fijado al navegar o buscar
+        self.ultimo_error = ""
+        self.ultima_busqueda = None
+        self.grabador = None   # GrabadorSigae opcional (grabacion.py)
+        self._tras_envio = False   # la pestaña quedó en la redirección de un envío
 
     def _inicializar_mapeo_causales(self):
         """Inicializa el diccionario de mapeo de causales de baja."""
@@ -49,10 +75,25 @@ class SigaeBot:
         }
 
     # --- MÉTODOS BÁSICOS ---
+    def _timeout(self, base):
+        """Timeout efectivo para una espera diseñada con ``base`` segundos."""
+        return self.ritmo.timeout(base) if self.ritmo else base
+
+    def _medir(self, inicio, exito=True):
+        """Informa al controlador de ritmo cuánto tardó SIGAE desde ``inicio``."""
+        if self.ritmo:
+            self.ritmo.registrar_latencia(time.perf_counter() - inicio, exito)
+
+    def _grabar(self, etiqueta, inicio=None, **extra):
+        """Si hay un grabador asignado, guarda la página actual con su latencia."""
+        if self.grabador:
+            latencia = time.perf_counter() - inicio if inicio is not None else None
+            self.grabador.capturar(self.driver, etiqueta, latencia, **extra)
+
     def esperar_elemento(self, localizador, timeout=15, mensaje_error="Elemento no encontrado"):
         """Espera a que un elemento esté presente y visible."""
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return WebDriverWait(self.driver, self._timeout(timeout)).until(
                 EC.visibility_of_element_located(localizador)
             )
         except TimeoutException:
@@ -62,7 +103,7 @@ class SigaeBot:
     def esperar_presencia_elemento(self, localizador, timeout=15, mensaje_error="Elemento no encontrado"):
         """Espera a que un elemento exista en el DOM, sin importar si es visible o no."""
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return WebDriverWait(self.driver, self._timeout(timeout)).until(
                 EC.presence_of_element_located(localizador)
             )
         except TimeoutException:
@@ -100,7 +141,7 @@ class SigaeBot:
     def esperar_url_contenga(self, texto_url, timeout=15):
         """Espera dinámicamente hasta que la URL cambie al texto esperado."""
         try:
-            WebDriverWait(self.driver, timeout).until(
+            WebDriverWait(self.driver, self._timeout(timeout)).until(
                 EC.url_contains(texto_url)
             )
             return True
@@ -110,7 +151,7 @@ class SigaeBot:
     def esperar_desaparicion(self, localizador, timeout=10):
         """Espera dinámicamente a que un elemento (ej. pantalla de carga) desaparezca."""
         try:
-            WebDriverWait(self.driver, timeout).until(
+            WebDriverWait(self.driver, self._timeout(timeout)).until(
                 EC.invisibility_of_element_located(localizador)
             )
             return True
@@ -155,6 +196,7 @@ class SigaeBot:
         """Inicia sesión en el sistema SIGAE con las credenciales proporcionadas."""
         try:
             print("    ↻ Iniciando sesión...")
+            self._grabar('login')
             
             # Intentar escribir usuario
             if not self.escribir_en_campo(self.INPUT_USUARIO, usuario):
@@ -173,7 +215,7 @@ class SigaeBot:
             elementos_login = self.driver.find_elements(*self.INPUT_USUARIO)
             
             try:
-                WebDriverWait(self.driver, 5).until(
+                WebDriverWait(self.driver, self._timeout(5)).until(
                     EC.staleness_of(campo_clave)
                 )
             except TimeoutException:
@@ -191,6 +233,28 @@ class SigaeBot:
             print(f"Error en login: {e}")
             return False
 
+    def restaurar_sesion(self, cookies, tipo_programa="pnf"):
+        """Inyecta cookies de una sesión guardada y verifica que siga activa.
+
+        El driver debe estar ya en el dominio de SIGAE. La verificación es una
+        sola carga del listado: si SIGAE muestra el login, la sesión no sirve.
+        """
+        try:
+            for cookie in cookies:
+                self.driver.add_cookie(cookie)
+
+            tipo = str(tipo_programa).strip().lower()
+            self.driver.get(f"{self.URL_PRINCIPAL}/index.php?r=estudiante%2Falumno-{tipo}")
+            if self.driver.find_elements(*self.INPUT_USUARIO):
+                return False
+            if f"alumno-{tipo}" not in self.driver.current_url:
+                return False
+            self.tipo_prog = tipo
+            return True
+        except Exception as e:
+            print(f"    ⚠ No se pudo restaurar la sesión guardada: {e}")
+            return False
+
     # --- NAVEGACIÓN ---
     def navegar_a_listado(self, tipo_programa="pnf"):
         """Navega directamente a la lista de estudiantes PNF mediante URL."""
@@ -203,10 +267,14 @@ class SigaeBot:
             url_lista = f"{self.URL_PRINCIPAL}/index.php?r=estudiante%2Falumno-{tipo}"
             
             # Navegar directo, sin hacer clics en menús
+            inicio = time.perf_counter()
             self.driver.get(url_lista)
             
             # Verificar que llegamos correctamente
-            if self.esperar_url_contenga(f"alumno-{tipo}"):
+            llego = self.esperar_url_contenga(f"alumno-{tipo}")
+            self._medir(inicio, llego)
+            if llego:
+                self._grabar('listado', inicio)
                 print("    ✓ Listado PNF cargado instantáneamente")
                 return True
             else:
@@ -218,143 +286,265 @@ class SigaeBot:
             return False
 
     # --- BÚSQUEDA ---
+    def url_busqueda(self, cedula, tipo_programa="pnf", nacionalidad=""):
+        """URL del listado ya filtrado por cédula (lo mismo que envía el filtro de la tabla)."""
+        consulta = urlencode({
+            'r': f"estudiante/alumno-{tipo_programa}",
+            'AlumnoSearch[nacionalidad]': nacionalidad,
+            'AlumnoSearch[cedula]': cedula,
+        })
+        return f"{self.URL_PRINCIPAL}/index.php?{consulta}"
+
     def buscar_estudiante(self, cedula, tipo_programa="pnf", nacionalidad=""):
-        """Busca un estudiante por cédula en el sistema."""
+        """Busca un estudiante por cédula en el sistema.
+
+        Si la pestaña no está en el listado (login, redirección tras un envío)
+        se pide directamente la URL filtrada: una sola carga en lugar de
+        listado + filtro. En el listado, la cédula nueva se escribe sobre la
+        anterior sin un envío previo para limpiar el filtro.
+        """
         tipo = str(tipo_programa).strip().lower()
+        self.tipo_prog = tipo
+        self.ultima_busqueda = None
 
         try:
             print(f"    🔍 Buscando estudiante {cedula}...")
-            
-            # Verificar si ya estamos en el listado correcto
-            if f"alumno-{tipo}" not in self.driver.current_url:
-                print("    ↻ No estamos en listado PNF, navegando...")
-                if not self.navegar_a_listado(tipo): 
-                    print("    ✗ No se pudo navegar al listado PNF")
-                    return False
-            
-            # Limpiar filtros previos si existen
-            try:
-                campo_cedula = self.driver.find_element(*self.INPUT_CEDULA)
-                if campo_cedula.get_attribute("value"):
-                    campo_cedula.clear()
-                    # Presionar Enter para limpiar búsqueda
-                    campo_cedula.send_keys(Keys.RETURN)
-                    time.sleep(1.5)
-            except:
-                pass
-            
-            # Configurar nacionalidad si es necesario
-            try:
-                selector_nacionalidad = self.driver.find_element(*self.SELECT_NACIONALIDAD)
-                if selector_nacionalidad.get_attribute("value") != nacionalidad:
-                    Select(selector_nacionalidad).select_by_value(nacionalidad)
-                    time.sleep(0.5)
-            except:
-                print("    ⚠ No se pudo configurar nacionalidad, continuando...")
-            
-            # Escribir la cédula y buscar
-            if not self.escribir_en_campo(self.INPUT_CEDULA, cedula):
+
+            resultado = None
+            inicio = time.perf_counter()
+            if self._tras_envio or f"alumno-{tipo}" not in self.driver.current_url:
+                self._tras_envio = False
+                resultado = self._buscar_por_url(cedula, tipo, nacionalidad)
+            if resultado is None:
+                inicio = time.perf_counter()
+                resultado = self._buscar_en_filtro(cedula, tipo, nacionalidad)
+            if resultado is False:
                 return False
-            
-            # Presionar Enter para buscar
-            campo_cedula = self.driver.find_element(*self.INPUT_CEDULA)
-            campo_cedula.send_keys(Keys.RETURN)
-            
-            # Esperar resultados
-            time.sleep(2.5)
-            
-            # Verificar si hay resultados
-            try:
-                # Primero intentar encontrar el mensaje de "no hay resultados"
-                elementos_vacios = self.driver.find_elements(*self.ELEMENTO_VACIO)
-                if elementos_vacios:
-                    for elemento in elementos_vacios:
-                        if "no hay" in elemento.text.lower() or "vacio" in elemento.text.lower() or "empty" in elemento.text.lower():
-                            print(f"    ✗ No hay resultados para {cedula}")
-                            return False
-                
-                # Si no hay mensaje de vacío, verificar si hay una tabla con resultados
-                # Buscar cualquier fila de tabla que no sea el encabezado
-                filas_tabla = self.driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
-                if len(filas_tabla) > 0:
-                    print(f"    ✓ Estudiante {cedula} encontrado")
-                    time.sleep(1)  # Pequeña pausa para estabilizar
-                    return True
-                else:
-                    print(f"    ✗ Tabla vacía para {cedula}")
-                    return False
-                    
-            except Exception as e:
-                print(f"    ⚠ Error verificando resultados: {e}")
-                # Si no podemos determinar, asumir que sí hay resultados
-                print(f"    ⚠ Asumiendo que {cedula} fue encontrado")
+            if resultado is None:
+                print(f"    ✗ SIGAE no devolvió la búsqueda de {cedula} a tiempo")
+                return False
+            self.ultima_busqueda = resultado
+            if resultado['vacio']:
+                self._grabar('busqueda_vacia', inicio)
+            elif resultado['coincide']:
+                self._grabar('busqueda_directo' if resultado['baja_visible'] else 'busqueda_menu', inicio)
+            else:
+                self._grabar('busqueda_sin_fila', inicio)
+
+            if resultado['vacio']:
+                print(f"    ✗ No hay resultados para {cedula} ({resultado['vacio']})")
+                return False
+            if resultado['coincide']:
+                print(f"    ✓ Estudiante {cedula} encontrado")
                 return True
+            print(f"    ✗ {cedula} no figura entre las {resultado['filas']} filas devueltas")
+            return False
                 
         except Exception as e:
             print(f"Error al buscar estudiante {cedula}: {e}")
             return False
 
+    def _buscar_por_url(self, cedula, tipo, nacionalidad):
+        """Abre el listado ya filtrado. None si SIGAE no aplicó el filtro así."""
+        print("    ↻ Abriendo la búsqueda filtrada directamente...")
+        inicio = time.perf_counter()
+        self.driver.get(self.url_busqueda(cedula, tipo, nacionalidad))
+        if f"alumno-{tipo}" not in self.driver.current_url:
+            self._medir(inicio, False)
+            return None
+        resultado = self._sondear_resultados(cedula)
+        self._medir(inicio, resultado is not None)
+        if resultado is None or resultado['vacio'] or resultado['coincide']:
+            return resultado
+        # Llegó el listado completo: el filtro por URL no se aplicó
+        print("    ⚠ El listado no vino filtrado, se usa el filtro de la tabla")
+        return None
+
+    def _buscar_en_filtro(self, cedula, tipo, nacionalidad):
+        """Escribe la cédula en el filtro de la tabla y espera la tabla nueva.
+
+        Devuelve el resumen de la búsqueda, None si no llegó a tiempo o False
+        si no se pudo llegar al listado o escribir la cédula.
+        """
+        if f"alumno-{tipo}" not in self.driver.current_url:
+            print("    ↻ No estamos en listado PNF, navegando...")
+            if not self.navegar_a_listado(tipo):
+                print("    ✗ No se pudo navegar al listado PNF")
+                return False
+
+        # Configurar nacionalidad si es necesario
+        try:
+            selector_nacionalidad = self.driver.find_element(*self.SELECT_NACIONALIDAD)
+            if selector_nacionalidad.get_attribute("value") != nacionalidad:
+                Select(selector_nacionalidad).select_by_value(nacionalidad)
+                time.sleep(0.5)
+        except:
+            print("    ⚠ No se pudo configurar nacionalidad, continuando...")
+
+        # Escribir la cédula (reemplaza la anterior, sin limpiar el filtro antes)
+        if not self.escribir_en_campo(self.INPUT_CEDULA, cedula):
+            return False
+
+        # Marcar la tabla actual (para reconocer la nueva) y presionar Enter para buscar
+        campo_cedula = self.driver.execute_script("""
+            document.querySelectorAll('table').forEach(function (t) { t.__sigaeViejo = true; });
+            return document.getElementsByName(arguments[0])[0];
+        """, self.INPUT_CEDULA[1])
+        inicio = time.perf_counter()
+        campo_cedula.send_keys(Keys.RETURN)
+
+        # Esperar resultados: una sola consulta al DOM devuelve todo
+        resultado = self._sondear_resultados(cedula)
+        self._medir(inicio, resultado is not None)
+        return resultado
+
+    def _digitos_cedula(self, cedula):
+        """Cédula solo con dígitos ('12345678.0' o 'V-12.345.678' -> '12345678')."""
+        cedula_texto = str(cedula).strip()
+        if cedula_texto.endswith('.0'):
+            cedula_texto = cedula_texto[:-2]
+        return re.sub(r'\D', '', cedula_texto)
+
+    def _sondear_resultados(self, cedula, timeout=10):
+        """Espera la tabla nueva de la búsqueda y la resume en un solo script.
+
+        Retorna un dict con 'vacio' (texto del marcador de sin resultados),
+        'filas', 'cedulas' (de cada fila), 'coincide' (fila exacta de la
+        cédula), 'enlaces' de esa fila y 'enlace_baja' (elemento del enlace
+        solicitar-baja, aunque esté dentro de un menú cerrado) con
+        'baja_visible'. Retorna None si la tabla no se renovó a tiempo.
+        """
+        script = """
+        var cedula = arguments[0], selectorBaja = arguments[1];
+        var tabla = document.querySelector('table');
+        if (!tabla || tabla.__sigaeViejo) return null;
+        var vacio = tabla.querySelector('.empty') || document.querySelector('.empty');
+        var res = {cedula: cedula, vacio: vacio ? (vacio.textContent.trim() || 'vacío') : '',
+                   filas: 0, cedulas: [], coincide: false, enlaces: [],
+                   enlace_baja: null, baja_visible: false};
+        if (vacio) return res;
+        var filas = tabla.querySelectorAll('tbody tr');
+        for (var i = 0; i < filas.length; i++) {
+            var celdas = filas[i].cells, coincide = false, ced = null;
+            res.filas++;
+            for (var j = 0; j < celdas.length; j++) {
+                var texto = celdas[j].textContent.trim();
+                if (ced === null && /^[VvEe]?-?[\\d.]{6,12}$/.test(texto)) ced = texto.replace(/\\D/g, '');
+                if (texto.replace(/\\D/g, '') === cedula) coincide = true;
+            }
+            if (ced !== null) res.cedulas.push(ced);
+            if (coincide && !res.coincide) {
+                res.coincide = true;
+                res.enlaces = Array.prototype.map.call(filas[i].querySelectorAll('a[href]'), function (a) {
+                    return {texto: a.textContent.trim(), href: a.getAttribute('href')};
+                });
+                var baja = filas[i].querySelector(selectorBaja);
+                res.enlace_baja = baja;
+                res.baja_visible = !!(baja && baja.getClientRects().length);
+            }
+        }
+        return res;
+        """
+        cedula_digitos = self._digitos_cedula(cedula)
+        try:
+            return WebDriverWait(self.driver, self._timeout(timeout), poll_frequency=0.2).until(
+                lambda d: d.execute_script(script, cedula_digitos, self.OPCION_SOLICITAR_BAJA[1])
+            )
+        except TimeoutException:
+            return None
+
     # --- SOLICITUD DE BAJA ---
+    def _localizar_accion_baja(self, cedula, variantes):
+        """Busca la fila exacta de la cédula y su botón de acción en un solo script.
+
+        Compara solo los dígitos de cada celda con la cédula (sin coincidencias
+        parciales con otras cédulas) y prueba las variantes en orden hasta dar
+        con un elemento visible. Retorna {'variante', 'elemento'} o None si la
+        fila aún no está en la tabla.
+        """
+        script = """
+        var cedula = arguments[0], variantes = arguments[1], directo = arguments[2];
+        var filas = document.querySelectorAll('table tbody tr');
+        for (var i = 0; i < filas.length; i++) {
+            var celdas = filas[i].cells, coincide = false;
+            for (var j = 0; j < celdas.length; j++) {
+                if (celdas[j].textContent.replace(/\\D/g, '') === cedula) { coincide = true; break; }
+            }
+            if (!coincide) continue;
+            for (var k = 0; k < variantes.length; k++) {
+                var selector = variantes[k] === 'directo' ? directo : variantes[k];
+                var candidatos = filas[i].querySelectorAll(selector);
+                for (var m = 0; m < candidatos.length; m++) {
+                    if (candidatos[m].getClientRects().length) {
+                        return {variante: variantes[k], elemento: candidatos[m]};
+                    }
+                }
+            }
+            return {variante: null, elemento: null};
+        }
+        return null;
+        """
+        cedula_digitos = self._digitos_cedula(cedula)
+        try:
+            return WebDriverWait(self.driver, self._timeout(1)).until(
+                lambda d: d.execute_script(script, cedula_digitos, variantes, self.OPCION_SOLICITAR_BAJA[1])
+            )
+        except TimeoutException:
+            return None
+
     def solicitar_baja_estudiante(self, cedula):
-        """Abre el formulario de solicitud de baja para un estudiante específico."""
+        """Abre el formulario de solicitud de baja para un estudiante específico.
+
+        Si la búsqueda previa ya trajo el enlace de baja de la fila, se usa
+        directamente. Si no, la variante de botón que funcionó (enlace directo
+        o uno de los menús desplegables) se recuerda por programa y se prueba
+        primero la próxima vez.
+        """
         try:
             print(f"    📝 Abriendo formulario para {cedula}...")
-            
-            # Construir XPath para encontrar la fila del estudiante
-            xpath_fila = f"//tr[td[contains(text(), '{cedula}')]]"
-            
-            # Esperar a que la fila sea visible
-            fila_estudiante = self.esperar_elemento((By.XPATH, xpath_fila),
-                                                    timeout=1,
-                                                    mensaje_error=f"Fila del estudiante {cedula}")
-            if not fila_estudiante:
+
+            busqueda = self.ultima_busqueda
+            if busqueda and busqueda['cedula'] == self._digitos_cedula(cedula):
+                if not busqueda['coincide']:
+                    print(f"    ✗ No se encontró la fila para {cedula}")
+                    return False
+                if busqueda['enlace_baja']:
+                    try:
+                        print("    ↻ Abriendo la baja con el enlace de la búsqueda...")
+                        self.driver.execute_script("arguments[0].click();", busqueda['enlace_baja'])
+                        print(f"    ✓ Formulario abierto para {cedula}")
+                        return True
+                    except StaleElementReferenceException:
+                        print("    ⚠ La tabla cambió desde la búsqueda, localizando de nuevo...")
+
+            tipo = self.tipo_prog
+            aprendida = self.VARIANTES_APRENDIDAS.get(tipo)
+            variantes = [aprendida] if aprendida else []
+            variantes += [v for v in self.VARIANTES_ACCION if v != aprendida]
+
+            hallazgo = self._localizar_accion_baja(cedula, variantes)
+            if not hallazgo:
                 print(f"    ✗ No se encontró la fila para {cedula}")
                 return False
-
-            try:
-                opcion_baja_directa = fila_estudiante.find_element(By.CSS_SELECTOR, 'a[href*="solicitar-baja"]')
-                if opcion_baja_directa.is_displayed():
-                    print("    ↻ Clic en botón directo de baja (Sin menú)...")
-                    self.driver.execute_script("arguments[0].click();", opcion_baja_directa)
-                    time.sleep(0.5)
-                    print(f"    ✓ Formulario abierto para {cedula}")
-                    self.tipo_prog = "pnfa"
-                    return True
-            except:
-                self.tipo_prog = "pnf"
-                pass
-            
-            # Intentar diferentes selectores para el botón del menú
-            selectores_menu = [
-                "a.dropdown-toggle",
-                "button.dropdown-toggle", 
-                ".btn-group > button",
-                ".dropdown > button",
-                "a[data-toggle='dropdown']",
-                "button[data-toggle='dropdown']",
-                ".btn.dropdown-toggle"
-            ]
-            
-            boton_menu = None
-            for selector in selectores_menu:
-                try:
-                    elementos = fila_estudiante.find_elements(By.CSS_SELECTOR, selector)
-                    for elemento in elementos:
-                        if elemento.is_displayed():
-                            boton_menu = elemento
-                            break
-                    if boton_menu:
-                        break
-                except:
-                    continue
-            
-            if not boton_menu:
+            if not hallazgo['variante']:
                 print(f"    ✗ No se encontró el botón del menú para {cedula}")
                 return False
-            
+
+            variante = hallazgo['variante']
+            if variante != aprendida:
+                self.VARIANTES_APRENDIDAS[tipo] = variante
+                print(f"    🧠 Variante de acción para {tipo}: {variante}")
+
+            if variante == 'directo':
+                print("    ↻ Clic en botón directo de baja (Sin menú)...")
+                self.driver.execute_script("arguments[0].click();", hallazgo['elemento'])
+                time.sleep(0.5)
+                print(f"    ✓ Formulario abierto para {cedula}")
+                return True
+
             # Hacer click en el botón del menú
             print("    ↻ Abriendo menú desplegable...")
-            self.driver.execute_script("arguments[0].click();", boton_menu)
+            self.driver.execute_script("arguments[0].click();", hallazgo['elemento'])
             time.sleep(0.5)  # Esperar a que se abra el menú
             
             # Buscar y hacer click en la opción de baja
@@ -379,8 +569,12 @@ class SigaeBot:
 
     # --- PROCESAMIENTO DE FORMULARIO ---
     def procesar_formulario_baja(self, causal_texto):
-        """Completa y envía el formulario de baja con el motivo especificado."""
+        """Completa y envía el formulario de baja con el motivo especificado.
 
+        Si falla, ``self.ultimo_error`` queda con el motivo concreto (campo
+        ausente o errores de validación mostrados por SIGAE).
+        """
+        self.ultimo_error = ""
         try:
             print(f"    ✍️  Procesando formulario...")
             
@@ -390,264 +584,125 @@ class SigaeBot:
                                          mensaje_error="Campo de motivo en formulario"):
                 print("    ⚠ Formulario no se cargó completamente, pero continuamos...")
                         
-            # Completar los campos del formulario en orden
-            print("    ↻ Seleccionando motivo...")
-            self._seleccionar_motivo_select2(causal_texto)
-            time.sleep(0.25)  
-            
-            print("    ↻ Estableciendo fecha...")
-            self._establecer_fecha_actual()
-            time.sleep(0.25)
-            
-            print("    ↻ Escribiendo descripción...")
-            self._escribir_descripcion(causal_texto)
-            time.sleep(0.25)
+            print("    ↻ Completando y enviando formulario...")
             
-            # Enviar el formulario
-            print("    ↻ Enviando formulario...")
-            
-            # Guardamos la URL actual antes de hacer clic
+            # Guardamos la URL actual antes de enviar
             url_formulario = self.driver.current_url
-            
-            if self._enviar_formulario():
-                print(f"    ✓ Formulario enviado: {causal_texto}")
-                
-                print("    ⏳ Verificando redirección del sistema...")
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.url_changes(url_formulario)
-                    )
-                except TimeoutException:
-                    print("    ⚠ La URL no cambió rápido, pero forzaremos la salida.")
-
-                print("    ↻ Evadiendo pop-up visual y volviendo al inicio...")
+            self._grabar('formulario')
+            
+            inicio = time.perf_counter()
+            resultado = self._llenar_y_enviar_formulario(causal_texto)
+            if not resultado or not resultado.get('enviado'):
+                errores = (resultado or {}).get('errores') or ["No se pudo ejecutar el llenado"]
+                self.ultimo_error = "Formulario incompleto: " + "; ".join(errores)
+                print(f"    ✗ {self.ultimo_error}")
+                return False
+
+            print(f"    ✓ Formulario enviado: {causal_texto} "
+                  f"(motivo {resultado['motivo']}, fecha {resultado['fecha']})")
                 
-                url_lista_pnf = f"{self.URL_PRINCIPAL}/index.php?r=estudiante%2Falumno-{self.tipo_prog}"
-                self.driver.get(url_lista_pnf)
+            print("    ⏳ Verificando redirección del sistema...")
+            try:
+                WebDriverWait(self.driver, self._timeout(10)).until(
+                    EC.url_changes(url_formulario)
+                )
+                self._medir(inicio)
+                self._grabar('redireccion', inicio, desde=url_formulario)
+            except TimeoutException:
+                self._medir(inicio, exito=False)
+                errores = self._leer_errores_formulario()
+                if errores:
+                    self._grabar('formulario_errores', inicio)
+                    self.ultimo_error = "SIGAE rechazó el formulario: " + "; ".join(errores)
+                    print(f"    ✗ {self.ultimo_error}")
+                    return False
+                print("    ⚠ La URL no cambió rápido, pero forzaremos la salida.")
 
-                return True
-            else:
-                print(f"    ✗ Problema al enviar formulario")
-                return False
+            # Sin volver al listado: la próxima búsqueda sale de aquí con la
+            # URL ya filtrada (y así también se evita el pop-up de la redirección)
+            self._tras_envio = True
+            return True
 
         except Exception as error:
+            self.ultimo_error = f"Error en formulario: {str(error)[:50]}"
             print(f"Error al procesar formulario: {error}")
             return False
 
-    def _seleccionar_motivo_select2(self, causal_texto):
-        """Selecciona el motivo de baja en el formulario usando JavaScript para Select2."""
-        id_causal = self.obtener_id_causal(causal_texto)
-        
-        # Script para interactuar con Select2
-        script = f"""
-        try {{
-            // Método 1: Intentar usar jQuery si está disponible
-            if (typeof jQuery !== 'undefined' && jQuery.fn.select2) {{
-                var $select = jQuery('#alumnobajaslicencias-id_estatus_academico');
-                if ($select.length) {{
-                    // Establecer el valor
-                    $select.val('{id_causal}');
-                    // Disparar los eventos necesarios para Select2
-                    $select.trigger('change.select2');
-                    $select.trigger('change');
-                    console.log('Select2 actualizado con valor: ' + '{id_causal}');
-                    return true;
-                }}
-            }}
-            
-            // Método 2: JavaScript puro
-            var select = document.getElementById('alumnobajaslicencias-id_estatus_academico');
-            if (select) {{
-                select.value = '{id_causal}';
-                
-                // Disparar eventos para activar la validación
-                var event = new Event('change', {{ bubbles: true }});
-                select.dispatchEvent(event);
-                
-                // También disparar input event
-                var inputEvent = new Event('input', {{ bubbles: true }});
-                select.dispatchEvent(inputEvent);
-                
-                console.log('Select actualizado con valor: ' + '{id_causal}');
-                return true;
-            }}
-            
-            console.log('No se pudo encontrar el elemento select');
-            return false;
-        }} catch(e) {{
-            console.log('Error al seleccionar motivo: ' + e.message);
-            return false;
-        }}
-        """
-        
-        try:
-            # Ejecutar el script
-            resultado = self.driver.execute_script(script)
-            
-            # Verificar visualmente que se seleccionó
-            time.sleep(1)
-            
-            if resultado:
-                print(f"    ✓ Motivo seleccionado: {id_causal} ({causal_texto})")
-            else:
-                print(f"    ⚠ No se pudo confirmar la selección del motivo {id_causal}")
-                
-        except Exception as e:
-            print(f"    ⚠ Error ejecutando script para seleccionar motivo: {e}")
+    def _llenar_y_enviar_formulario(self, causal_texto):
+        """Fija motivo (Select2), fecha y descripción y envía, todo en un script.
 
-    def _establecer_fecha_actual(self):
-        """Establece la fecha actual en el campo correspondiente."""
-        fecha_actual = datetime.now().strftime("%d/%m/%Y")
-        
-        # Script para establecer la fecha
-        script = f"""
-        try {{
-            // Método 1: Usar jQuery si está disponible
-            if (typeof jQuery !== 'undefined') {{
-                var $fecha = jQuery('#alumnobajaslicencias-fecha_inicio');
-                if ($fecha.length) {{
-                    // Establecer el valor
-                    $fecha.val('{fecha_actual}');
-                    
-                    // Disparar eventos para el datepicker
-                    $fecha.trigger('change');
-                    $fecha.trigger('input');
-                    
-                    // Si hay un datepicker material, activarlo
-                    if ($fecha.hasClass('krajee-datepicker')) {{
-                        $fecha.trigger('dp.change');
-                    }}
-                    
-                    console.log('Fecha establecida (jQuery): ' + '{fecha_actual}');
-                    return true;
-                }}
-            }}
-            
-            // Método 2: JavaScript puro
-            var fechaField = document.getElementById('alumnobajaslicencias-fecha_inicio');
-            if (fechaField) {{
-                fechaField.value = '{fecha_actual}';
-                
-                // Disparar eventos
-                var changeEvent = new Event('change', {{ bubbles: true }});
-                fechaField.dispatchEvent(changeEvent);
-                
-                var inputEvent = new Event('input', {{ bubbles: true }});
-                fechaField.dispatchEvent(inputEvent);
-                
-                console.log('Fecha establecida (JS puro): ' + '{fecha_actual}');
-                return true;
-            }}
-            
-            console.log('No se pudo encontrar el campo de fecha');
-            return false;
-        }} catch(e) {{
-            console.log('Error al establecer fecha: ' + e.message);
-            return false;
-        }}
+        Los valores viajan como argumentos del script (sin interpolar en el JS).
+        Retorna {'motivo', 'fecha', 'descripcion', 'errores', 'enviado'} con el
+        valor que quedó en cada campo; no envía si falta algún campo o si el
+        formulario ya muestra errores de validación.
         """
-        
-        try:
-            resultado = self.driver.execute_script(script)
-            if resultado:
-                print(f"    ✓ Fecha establecida: {fecha_actual}")
-            else:
-                print(f"    ⚠ No se pudo establecer la fecha")
-                
-        except Exception as e:
-            print(f"    ⚠ Error estableciendo fecha: {e}")
-
-    def _escribir_descripcion(self, causal_texto):
-        """Escribe la descripción del motivo en el formulario."""
+        id_causal = self.obtener_id_causal(causal_texto)
+        fecha_actual = datetime.now().strftime("%d/%m/%Y")
         descripcion = f"Proceso automatizado - {causal_texto}"
-        
-        # Script para escribir en el textarea
-        script = f"""
-        try {{
-            // Método 1: Usar jQuery
-            if (typeof jQuery !== 'undefined') {{
-                var $textarea = jQuery('#alumnobajaslicencias-descripcion_solicitud');
-                if ($textarea.length) {{
-                    $textarea.val('{descripcion}');
-                    $textarea.trigger('change');
-                    $textarea.trigger('input');
-                    console.log('Descripción escrita (jQuery)');
-                    return true;
-                }}
-            }}
-            
-            // Método 2: JavaScript puro
-            var textarea = document.getElementById('alumnobajaslicencias-descripcion_solicitud');
-            if (textarea) {{
-                textarea.value = '{descripcion}';
-                
-                var changeEvent = new Event('change', {{ bubbles: true }});
-                textarea.dispatchEvent(changeEvent);
-                
-                var inputEvent = new Event('input', {{ bubbles: true }});
-                textarea.dispatchEvent(inputEvent);
-                
-                console.log('Descripción escrita (JS puro)');
-                return true;
-            }}
-            
-            console.log('No se pudo encontrar el textarea');
-            return false;
-        }} catch(e) {{
-            console.log('Error al escribir descripción: ' + e.message);
-            return false;
-        }}
+
+        script = """
+        var idCausal = arguments[0], fecha = arguments[1], descripcion = arguments[2];
+        var $ = window.jQuery;
+        var errores = [];
+
+        function fijar(id, valor, eventosExtra) {
+            var campo = document.getElementById(id);
+            if (!campo) { errores.push('No se encontró el campo ' + id); return null; }
+            if ($) {
+                var $campo = $(campo).val(valor);
+                eventosExtra.forEach(function (ev) { $campo.trigger(ev); });
+                $campo.trigger('change').trigger('input');
+            } else {
+                campo.value = valor;
+                campo.dispatchEvent(new Event('change', { bubbles: true }));
+                campo.dispatchEvent(new Event('input', { bubbles: true }));
+            }
+            return campo.value;
+        }
+
+        var fechaCampo = document.getElementById('alumnobajaslicencias-fecha_inicio');
+        var resultado = {
+            motivo: fijar('alumnobajaslicencias-id_estatus_academico', idCausal, ['change.select2']),
+            fecha: fijar('alumnobajaslicencias-fecha_inicio', fecha,
+                         fechaCampo && fechaCampo.classList.contains('krajee-datepicker') ? ['dp.change'] : []),
+            descripcion: fijar('alumnobajaslicencias-descripcion_solicitud', descripcion, []),
+            enviado: false
+        };
+        if (resultado.motivo !== null && resultado.motivo !== idCausal) {
+            errores.push('El motivo quedó en "' + resultado.motivo + '" en lugar de "' + idCausal + '"');
+        }
+
+        document.querySelectorAll('.has-error .help-block, .help-block-error').forEach(function (el) {
+            var texto = el.textContent.trim();
+            if (texto) errores.push(texto);
+        });
+
+        if (!errores.length) {
+            var boton = document.getElementById('button-submit-inscripcion')
+                     || document.querySelector("button[type='submit']");
+            if (boton) {
+                boton.click();
+                resultado.enviado = true;
+            } else {
+                errores.push('No se encontró el botón de enviar');
+            }
+        }
+        resultado.errores = errores;
+        return resultado;
         """
-        
-        try:
-            resultado = self.driver.execute_script(script)
-            if resultado:
-                print(f"    ✓ Descripción escrita: {descripcion[:50]}...")
-            else:
-                # Fallback: usar el método tradicional de Selenium
-                if self.escribir_en_campo(self.TEXTAREA_DESCRIPCION, descripcion):
-                    print(f"    ✓ Descripción escrita (fallback): {descripcion[:50]}...")
-                else:
-                    print("    ⚠ No se pudo escribir la descripción")
-                    
-        except Exception as e:
-            print(f"    ⚠ Error escribiendo descripción: {e}")
+        return self.driver.execute_script(script, id_causal, fecha_actual, descripcion)
 
-    def _enviar_formulario(self):
-        """Envía el formulario completado."""
+    def _leer_errores_formulario(self):
+        """Devuelve los mensajes de validación (Yii) visibles en el formulario."""
         try:
-            # Buscar el botón de enviar
-            boton_enviar = self.esperar_elemento(self.BOTON_ENVIAR, 
-                                                mensaje_error="Botón de enviar formulario")
-            if not boton_enviar:
-                # Intentar encontrar otro botón de submit
-                try:
-                    boton_enviar = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-                except:
-                    print("    ✗ No se encontró botón de enviar")
-                    return False
-            
-            # Hacer scroll para asegurar visibilidad
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
-                boton_enviar
-            )
-            time.sleep(0.5)
-            
-            # Primero intentar hacer click normal
-            try:
-                boton_enviar.click()
-                print("    ✓ Clic normal en botón enviar")
-            except:
-                # Si falla, usar JavaScript
-                self.driver.execute_script("arguments[0].click();", boton_enviar)
-                print("    ✓ Clic con JavaScript en botón enviar")
-            
-            return True
-            
-        except Exception as error:
-            print(f"Error al enviar formulario: {error}")
-            return False
+            return self.driver.execute_script("""
+            return Array.prototype.map.call(
+                document.querySelectorAll('.has-error .help-block, .help-block-error'),
+                function (el) { return el.textContent.trim(); }
+            ).filter(function (texto) { return texto; });
+            """) or []
+        except Exception:
+            return []
 
     # --- MÉTODOS DE UTILIDAD ---
     def verificar_conexion(self):
@@ -0,0 +1,208 @@
+"""Pruebas de la descarga reanudable y la extracción incremental.
+
+Usan un servidor http.server local que atiende rangos (Range / 206) y puede
+cortar la conexión a mitad de un tramo o servir un cuerpo corrupto.
+"""
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+from services import update_service
+from services.update_service import (
+    ErrorIntegridad, descargar_reanudable, extraer_zip_incremental,
+)
+
+ETAG = '"v1"'
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Sirve `server.datos` con soporte opcional de rangos y fallas."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        datos = srv.datos
+        if srv.corrupto:
+            datos = bytes(b ^ 0xFF for b in datos[:16]) + datos[16:]
+        total = len(datos)
+
+        rango = self.headers.get("Range")
+        inicio, fin = 0, total - 1
+        if rango and srv.acepta_rangos:
+            desde, _, hasta = rango.removeprefix("bytes=").partition("-")
+            inicio = int(desde)
+            fin = int(hasta) if hasta else total - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {inicio}-{fin}/{total}")
+        else:
+            self.send_response(200)
+        cuerpo = datos[inicio:fin + 1]
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+
+        with srv.candado:
+            srv.peticiones.append(rango)
+        # El sondeo (bytes=0-0) nunca se corta; los tramos sí, si se pidió
+        if srv.cortar_tras is not None and len(cuerpo) > 1:
+            self.wfile.write(cuerpo[:srv.cortar_tras])
+            self.close_connection = True
+            return
+        self.wfile.write(cuerpo)
+
+
+class _Base(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="sigae_update_")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+        self.datos = os.urandom(300_000)
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Manejador)
+        self.servidor.daemon_threads = True
+        self.servidor.datos = self.datos
+        self.servidor.acepta_rangos = True
+        self.servidor.corrupto = False
+        self.servidor.cortar_tras = None
+        self.servidor.peticiones = []
+        self.servidor.candado = threading.Lock()
+        hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        hilo.start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+        self.url = f"http://127.0.0.1:{self.servidor.server_port}/release.zip"
+        self.destino = os.path.join(self.dir, "release.zip")
+        self.sha = hashlib.sha256(self.datos).hexdigest()
+
+        # Bloques chicos para que el estado se guarde varias veces por tramo
+        for nombre, valor in (("TAM_BLOQUE", 4096), ("GUARDAR_ESTADO_CADA", 16384)):
+            parche = mock.patch.object(update_service, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+
+class TestDescargaReanudable(_Base):
+
+    def test_reanuda_desde_el_avance_guardado(self):
+        self.servidor.cortar_tras = 100_000
+        with self.assertRaises(Exception):
+            descargar_reanudable(self.url, self.destino, sha256=self.sha)
+
+        ruta_estado = self.destino + ".part.json"
+        self.assertTrue(os.path.exists(self.destino + ".part"))
+        with open(ruta_estado, encoding="utf-8") as f:
+            guardado = json.load(f)["tramos"][0][2]
+        self.assertGreater(guardado, 0)
+        self.assertFalse(os.path.exists(self.destino))
+
+        self.servidor.cortar_tras = None
+        self.servidor.peticiones.clear()
+        descargar_reanudable(self.url, self.destino, sha256=self.sha)
+
+        with open(self.destino, "rb") as f:
+            self.assertEqual(f.read(), self.datos)
+        self.assertIn(f"bytes={guardado}-{len(self.datos) - 1}", self.servidor.peticiones)
+        self.assertFalse(os.path.exists(ruta_estado))
+
+    def test_tramos_paralelos_solo_persisten_bytes_escritos(self):
+        """Cada avance guardado debe estar ya en disco (regresión del flush)."""
+        ruta_part = self.destino + ".part"
+        json_real = update_service.json
+        revisiones = []
+
+        def dump_verificado(estado, f, *args, **kwargs):
+            if "tramos" in estado:
+                with open(ruta_part, "rb") as en_disco:
+                    contenido = en_disco.read()
+                for ini, _, hecho in estado["tramos"]:
+                    self.assertEqual(contenido[ini:ini + hecho], self.datos[ini:ini + hecho],
+                                     f"tramo {ini}: avance {hecho} no está en disco")
+                revisiones.append(len(estado["tramos"]))
+            return json_real.dump(estado, f, *args, **kwargs)
+
+        espia = SimpleNamespace(load=json_real.load, loads=json_real.loads, dump=dump_verificado)
+        # Bloques menores que el búfer de escritura: sin flush, los demás
+        # hilos siempre tienen bytes pendientes cuando se guarda el estado.
+        with mock.patch.object(update_service, "UMBRAL_PARALELO", 1), \
+                mock.patch.object(update_service, "TAM_BLOQUE", 512), \
+                mock.patch.object(update_service, "json", espia):
+            self.servidor.cortar_tras = 50_000
+            with self.assertRaises(Exception):
+                descargar_reanudable(self.url, self.destino, sha256=self.sha, hilos=4)
+            self.servidor.cortar_tras = None
+            descargar_reanudable(self.url, self.destino, sha256=self.sha, hilos=4)
+
+        self.assertTrue(revisiones)
+        self.assertEqual(set(revisiones), {4})
+        with open(self.destino, "rb") as f:
+            self.assertEqual(f.read(), self.datos)
+
+    def test_rechaza_cuerpo_corrupto(self):
+        self.servidor.corrupto = True
+        with self.assertRaises(ErrorIntegridad):
+            descargar_reanudable(self.url, self.destino, sha256=self.sha)
+
+        self.assertFalse(os.path.exists(self.destino))
+        self.assertFalse(os.path.exists(self.destino + ".part"))
+        self.assertFalse(os.path.exists(self.destino + ".part.json"))
+
+    def test_servidor_sin_rangos(self):
+        self.servidor.acepta_rangos = False
+        descargar_reanudable(self.url, self.destino, sha256=self.sha)
+        with open(self.destino, "rb") as f:
+            self.assertEqual(f.read(), self.datos)
+
+
+class TestExtraccionIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="sigae_zip_")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.base = os.path.join(self.dir, "app")
+        os.makedirs(self.base)
+        self.zip = os.path.join(self.dir, "release.zip")
+        with zipfile.ZipFile(self.zip, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("igual.txt", b"sin cambios")
+            zf.writestr("distinto.txt", b"version nueva")
+            zf.writestr("sub/nuevo.txt", b"recien llegado")
+            zf.writestr("launcher.exe", b"no tocar")
+            zf.writestr("../fuera.txt", b"zip slip")
+
+    def _escribir(self, nombre, contenido):
+        ruta = os.path.join(self.base, nombre)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        os.utime(ruta, (1_000_000, 1_000_000))
+        return ruta
+
+    def test_salta_archivos_con_mismo_crc(self):
+        igual = self._escribir("igual.txt", b"sin cambios")
+        distinto = self._escribir("distinto.txt", b"version vieja!")
+        lanzador = self._escribir("launcher.exe", b"original")
+
+        escritos, sin_cambios = extraer_zip_incremental(self.zip, self.base, omitir=("launcher.exe",))
+
+        self.assertEqual((escritos, sin_cambios), (2, 1))
+        self.assertEqual(os.path.getmtime(igual), 1_000_000)
+        with open(distinto, "rb") as f:
+            self.assertEqual(f.read(), b"version nueva")
+        with open(os.path.join(self.base, "sub", "nuevo.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"recien llegado")
+        with open(lanzador, "rb") as f:
+            self.assertEqual(f.read(), b"original")
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "fuera.txt")))
+        self.assertEqual([n for n in os.listdir(self.base) if n.endswith(".nuevo")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Traza opcional de los comandos WebDriver que emite el bot.
+
+Envuelve ``driver.command_executor.execute`` para anotar cada comando
+(findElement, executeScript, get, getCurrentUrl, ...) con su duración, el
+estudiante en proceso y la línea de sigae_bot.py que lo originó. Al final se
+obtiene el conteo de comandos por registro y un ranking de los puntos del
+código que más tiempo consumen en idas y vueltas al navegador.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+
+SIN_REGISTRO = "(sin registro)"
+
+
+class TrazadorComandos:
+    """Registra los comandos WebDriver de un driver mientras esté activo."""
+
+    def __init__(self, driver, archivo_origen="sigae_bot.py"):
+        self.archivo_origen = archivo_origen
+        self.registro_actual = SIN_REGISTRO
+        self.por_registro = defaultdict(Counter)
+        self.tiempo_por_registro = defaultdict(float)
+        self.por_sitio = defaultdict(lambda: [0, 0.0])   # (sitio, comando) -> [veces, segundos]
+        self._lock = threading.Lock()
+        self._executor = driver.command_executor
+        self._original = self._executor.execute
+        self._executor.execute = self._execute
+
+    def iniciar_registro(self, cedula):
+        """Atribuye los comandos siguientes al estudiante ``cedula``."""
+        self.registro_actual = str(cedula)
+
+    def detener(self):
+        """Devuelve el executor original al driver."""
+        self._executor.execute = self._original
+
+    def _sitio(self):
+        """Primera línea de sigae_bot.py en la pila (o la primera ajena a Selenium)."""
+        marco = sys._getframe(2)
+        alternativo = None
+        while marco:
+            archivo = marco.f_code.co_filename
+            if archivo.endswith(self.archivo_origen):
+                return f"{os.path.basename(archivo)}:{marco.f_lineno} {marco.f_code.co_name}"
+            if alternativo is None and f"{os.sep}selenium{os.sep}" not in archivo and not archivo.endswith("trazador.py"):
+                alternativo = marco
+            marco = marco.f_back
+        if alternativo is None:
+            return "?"
+        return f"{os.path.basename(alternativo.f_code.co_filename)}:{alternativo.f_lineno} {alternativo.f_code.co_name}"
+
+    def _execute(self, comando, params=None):
+        sitio = self._sitio()
+        inicio = time.perf_counter()
+        try:
+            return self._original(comando, params)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                self.por_registro[self.registro_actual][comando] += 1
+                self.tiempo_por_registro[self.registro_actual] += duracion
+                acumulado = self.por_sitio[(sitio, comando)]
+                acumulado[0] += 1
+                acumulado[1] += duracion
+
+    # --- RESULTADOS ---
+    def resumen(self, top=15):
+        """Dict con los conteos por registro y los sitios más costosos."""
+        registros = {
+            cedula: {
+                "comandos": sum(conteo.values()),
+                "segundos": round(self.tiempo_por_registro[cedula], 3),
+                "por_comando": dict(conteo.most_common()),
+            }
+            for cedula, conteo in self.por_registro.items()
+        }
+        sitios = sorted(self.por_sitio.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "registros": registros,
+            "sitios": [
+                {"sitio": sitio, "comando": comando, "veces": veces, "segundos": round(segundos, 3)}
+                for (sitio, comando), (veces, segundos) in sitios
+            ],
+        }
+
+    def reporte(self, top=15):
+        """Texto legible con el resumen, para la consola."""
+        datos = self.resumen(top)
+        reales = {c: r for c, r in datos["registros"].items() if c != SIN_REGISTRO}
+        total = sum(r["comandos"] for r in datos["registros"].values())
+        lineas = ["=== TRAZA DE COMANDOS WEBDRIVER ==="]
+        promedio = sum(r["comandos"] for r in reales.values()) / len(reales) if reales else 0
+        lineas.append(f"Comandos: {total} | Registros: {len(reales)} | Promedio por registro: {promedio:.1f}")
+        lineas.append("Por registro:")
+        for cedula, r in datos["registros"].items():
+            detalle = ", ".join(f"{c} {n}" for c, n in list(r["por_comando"].items())[:5])
+            lineas.append(f"  {cedula}: {r['comandos']} comandos, {r['segundos']:.2f} s ({detalle})")
+        lineas.append("Sitios más costosos:")
+        for n, s in enumerate(datos["sitios"], 1):
+            lineas.append(f"  {n:2d}. {s['sitio']}  {s['comando']}  x{s['veces']}  {s['segundos']:.2f} s")
+        return "\n".join(lineas)
+
+    def guardar(self, ruta):
+        """Escribe el resumen completo en JSON."""
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.resumen(top=50), f, ensure_ascii=False, indent=4)